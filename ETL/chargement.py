@@ -0,0 +1,120 @@
+# chargement.py
+#
+# Chargement en masse de suivi_pandemie, partagé par les scripts ETL (etl_commun.py, etl_sources.py) :
+# une seule connexion et une seule transaction pour tout le run, lignes écrites par lots
+# (executemany multi-lignes) ou par LOAD DATA LOCAL INFILE depuis un CSV temporaire
+# quand le serveur l'autorise, avec un bilan en lignes/seconde.
+# En mode upsert, une ligne dont la clé (id_pandemie, pays_id, date_jour) existe déjà est mise
+# à jour (ON DUPLICATE KEY UPDATE sur MySQL, INSERT OR REPLACE sur une connexion sqlite3).
+# Les requêtes des scripts sont écrites pour pymysql (%s) et passent par lire / ecrire,
+# qui les adaptent au paramètre ? de sqlite3.
+
+import os
+import csv
+import time
+import logging
+import sqlite3
+import tempfile
+from contextlib import closing
+import pandas as pd
+
+TAILLE_LOT = 5000
+METHODES = ["auto", "executemany", "load_data"]
+CLE_SUIVI = ["id_pandemie", "pays_id", "date_jour"]
+
+
+# Lignes prêtes pour le driver : types Python natifs, NaN -> NULL
+def lignes_sql(df, colonnes):
+    valeurs = df[colonnes].astype(object)
+    return list(valeurs.where(pd.notna(valeurs), None).itertuples(index=False, name=None))
+
+def dialecte(conn):
+    return "sqlite" if isinstance(conn, sqlite3.Connection) else "mysql"
+
+# Requête écrite avec des paramètres %s, adaptée au dialecte de la connexion
+def adapter(conn, requete):
+    return requete.replace("%s", "?") if dialecte(conn) == "sqlite" else requete
+
+# SELECT : toutes les lignes
+def lire(conn, requete, params=()):
+    with closing(conn.cursor()) as cursor:
+        cursor.execute(adapter(conn, requete), params)
+        return cursor.fetchall()
+
+# INSERT / UPDATE / DELETE sans commit : id de la dernière ligne insérée
+def ecrire(conn, requete, params=()):
+    with closing(conn.cursor()) as cursor:
+        cursor.execute(adapter(conn, requete), params)
+        return cursor.lastrowid
+
+# INSERT multi-lignes ; avec `cles`, les lignes en conflit sur ces colonnes sont mises à jour
+def requete_insertion(table, colonnes, cles=None, dialecte="mysql"):
+    if dialecte == "sqlite":
+        return (f"INSERT {'OR REPLACE ' if cles else ''}INTO {table} ({', '.join(colonnes)}) "
+                f"VALUES ({', '.join(['?'] * len(colonnes))})")
+    requete = (f"INSERT INTO {table} ({', '.join(colonnes)}) "
+               f"VALUES ({', '.join(['%s'] * len(colonnes))})")
+    if cles:
+        requete += " ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = VALUES({c})" for c in colonnes if c not in cles)
+    return requete
+
+# Vrai si le client (connexion ouverte avec local_infile) et le serveur acceptent LOAD DATA LOCAL INFILE
+def load_data_disponible(conn, local_infile):
+    if not local_infile or dialecte(conn) != "mysql":
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT @@local_infile")
+        return bool(cursor.fetchone()[0])
+
+# Méthode effective, résolue une fois par connexion : "auto" -> load_data si disponible, sinon executemany
+# (toujours executemany sur sqlite3, sans LOAD DATA)
+def choisir_methode(conn, methode, local_infile):
+    if dialecte(conn) == "sqlite":
+        return "executemany"
+    if methode != "auto":
+        return methode
+    return "load_data" if load_data_disponible(conn, local_infile) else "executemany"
+
+def inserer_executemany(cursor, table, colonnes, lignes, taille_lot=TAILLE_LOT, requete=None):
+    requete = requete or requete_insertion(table, colonnes)
+    for debut in range(0, len(lignes), taille_lot):
+        # pymysql regroupe un executemany d'INSERT ... VALUES [ON DUPLICATE KEY UPDATE] en INSERT multi-lignes
+        cursor.executemany(requete, lignes[debut:debut + taille_lot])
+
+def inserer_load_data(cursor, table, colonnes, lignes, remplacer=False):
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", delete=False) as f:
+        ecrivain = csv.writer(f, lineterminator="\n")
+        ecrivain.writerows(["\\N" if v is None else v for v in ligne] for ligne in lignes)
+        chemin = f.name
+    try:
+        cursor.execute(
+            # REPLACE : une ligne dont la clé unique existe déjà remplace l'ancienne
+            f"LOAD DATA LOCAL INFILE %s {'REPLACE ' if remplacer else ''}INTO TABLE {table} "
+            f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' LINES TERMINATED BY '\\n' "
+            f"({', '.join(colonnes)})",
+            (chemin,),
+        )
+    finally:
+        os.remove(chemin)
+
+# Insère (ou met à jour si upsert) les lignes de df dans suivi_pandemie sans commit
+# (la transaction appartient à l'appelant) ; `methode` résolue par choisir_methode
+def charger_suivis(conn, df, id_logging, id_pandemie, colonnes_mesures, methode="executemany", taille_lot=TAILLE_LOT,
+                   upsert=False):
+    colonnes = ["id_logging", "id_pandemie", "pays_id", "date_jour"] + list(colonnes_mesures)
+    df = df.assign(id_logging=id_logging, id_pandemie=id_pandemie)
+    lignes = lignes_sql(df, colonnes)
+
+    requete = requete_insertion("suivi_pandemie", colonnes, CLE_SUIVI if upsert else None, dialecte(conn))
+    debut = time.perf_counter()
+    with closing(conn.cursor()) as cursor:
+        if methode == "load_data":
+            inserer_load_data(cursor, "suivi_pandemie", colonnes, lignes, remplacer=upsert)
+        else:
+            inserer_executemany(cursor, "suivi_pandemie", colonnes, lignes, taille_lot, requete)
+    duree = time.perf_counter() - debut
+    debit = len(lignes) / duree if duree > 0 else float("inf")
+    logging.info("%d lignes chargées dans suivi_pandemie (%s, lots de %d) en %.2fs, soit %.0f lignes/s",
+                 len(lignes), methode, taille_lot, duree, debit)
+    print(f"{len(lignes)} lignes chargées ({methode}) en {duree:.2f}s, soit {debit:.0f} lignes/s")
+    return len(lignes)
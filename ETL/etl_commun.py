@@ -0,0 +1,237 @@
+# etl_commun.py
+#
+# Pipeline ETL d'une source CSV vers suivi_pandemie, commun à etl_suivi_pandemie.py (profil covid),
+# etl_suivi_pandemie3.py (profil variole) et etl_sources.py (manifeste) : connexion, mapping des pays,
+# transformation selon le profil de colonnes (profils.py), pandémie retrouvée ou créée,
+# chargement incrémental en upsert (incremental.py), complet ou en flux (flux.py).
+# Base MySQL d'après le .env, ou fichier SQLite si DB_NAME est absent et DATABASE_URL vaut
+# sqlite:///... (comme pandemie_api/database.py) ; les requêtes passent par chargement.lire / ecrire.
+
+import pandas as pd
+import pymysql
+import sqlite3
+import argparse
+import logging
+import os
+from datetime import datetime
+from dotenv import load_dotenv
+from chargement import charger_suivis, choisir_methode, dialecte, lire, ecrire, METHODES, TAILLE_LOT
+from flux import lire_par_chunks, ingerer_en_flux, Dedoublonneur, MOTEURS, TAILLE_CHUNK
+from incremental import trouver_pandemie, FiltreDelta
+from profils import PROFILS
+
+# Configuration des logs
+def creation_logs():
+    log_dir = "log"
+    os.makedirs(log_dir, exist_ok=True)
+    log_file = os.path.join(log_dir, "etl.log")
+    logging.basicConfig(
+        filename=log_file,
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
+# Compte les valeurs nulles et doublons dans le DataFrame et les log
+def count_nulls_and_duplicates(df):
+    nulls = df.isnull().sum()
+    duplicates = df.duplicated().sum()
+    logging.info("Valeurs nulles par colonne :\n%s", nulls)
+    logging.info("Nombre de doublons : %d", duplicates)
+
+
+def connexion_bbd(local_infile=False):
+    # Charge le fichier .env
+    load_dotenv("../.env")
+    url = os.getenv("DATABASE_URL", "")
+    # Connexion à la bdd
+    try:
+        if not os.getenv("DB_NAME") and url.startswith("sqlite:///"):
+            conn = sqlite3.connect(url[len("sqlite:///"):])
+            logging.info(f"Connexion à la base SQLite {url} réussie")
+            return conn
+        conn = pymysql.connect(
+            host=os.getenv("DB_HOST"),
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"),
+            database=os.getenv("DB_NAME"),
+            local_infile=local_infile
+        )
+        logging.info("Connexion à la base de données réussie")
+        return conn
+    except Exception as e:
+        logging.error("Erreur de connexion à la base de données : %s", e)
+        return None
+
+
+# Charge les correspondances pays depuis la base de données
+def recup_pays_bdd(conn):
+    try:
+        rows = lire(conn, "SELECT nom, id FROM pays")
+        mapping = {nom: id_ for nom, id_ in rows}
+        logging.info(f"Mapping chargé : {mapping}")
+        return mapping
+    except Exception as e:
+        logging.error(f"Erreur lors du chargement des pays : {e}")
+        return {}
+
+# Transforme les données : renommage (colonnes du profil), nettoyage, mapping pays, format date ;
+# les valeurs nulles restent NULL en base, quel que soit le mode (complet ou flux), pour que
+# les empreintes du FiltreDelta ne dépendent pas du découpage en chunks
+def transformation_data(df, country_mapping, colonnes):
+    df = df.rename(columns=colonnes)
+
+    df = df.drop_duplicates()
+    df.columns = [col.lower().strip() for col in df.columns]
+
+    num_cols = df.select_dtypes(include=["number"]).columns
+    for col in num_cols:
+        nb_nulls = df[col].isnull().sum()
+        if nb_nulls:
+            logging.info(f"{nb_nulls} valeurs nulles dans '{col}' conservées (NULL en base)")
+
+    for col in num_cols:
+        negative_count = (df[col] < 0).sum()
+        if negative_count > 0:
+            logging.info(
+                "%d valeurs négatives détectées dans '%s' ➜ conversion en positif", negative_count, col
+            )
+            df[col] = df[col].abs()
+    df['pays_id'] = df['nom_pays'].map(country_mapping)
+    df = df.dropna(subset=['pays_id'])
+    df['pays_id'] = df['pays_id'].astype(int)
+    df['date_jour'] = pd.to_datetime(df['date_jour']).dt.date
+
+    return df
+
+# Insère une pandémie dans la table `pandemie` et retourne l'id généré (commit par main)
+def insert_pandemie(conn, virus_id, nom_maladie, date_debut, date_fin):
+    try:
+        id_pandemie = ecrire(conn, """
+            INSERT INTO pandemie (virus_id, nom_maladie, date_apparition, date_fin)
+            VALUES (%s, %s, %s, %s)
+        """, (virus_id, nom_maladie, date_debut, date_fin))
+        logging.info(f"Pandémie insérée avec ID {id_pandemie}, maladie : {nom_maladie}, virus ID : {virus_id}, début : {date_debut}, fin : {date_fin}")
+        return id_pandemie
+    except Exception as e:
+        logging.error(f"Erreur lors de l'insertion dans pandemie : {e}")
+        return None
+
+# Retrouve la pandémie déjà chargée pour ce virus et ce nom, sinon l'insère
+def obtenir_pandemie(conn, virus_id, nom_maladie, date_debut, date_fin):
+    try:
+        id_pandemie = trouver_pandemie(conn, virus_id, nom_maladie)
+    except Exception as e:
+        logging.error(f"Erreur lors de la recherche de la pandémie : {e}")
+        return None
+    if id_pandemie:
+        logging.info(f"Pandémie existante réutilisée : ID {id_pandemie}, maladie : {nom_maladie}, virus ID : {virus_id}")
+        return id_pandemie
+    return insert_pandemie(conn, virus_id, nom_maladie, date_debut, date_fin)
+
+# Élargit les dates d'une pandémie aux dates chargées (connues seulement à la fin du flux) ;
+# MIN / MAX à plusieurs arguments tiennent lieu de LEAST / GREATEST sur SQLite
+def maj_dates_pandemie(conn, id_pandemie, date_debut, date_fin):
+    plus_petit, plus_grand = ("MIN", "MAX") if dialecte(conn) == "sqlite" else ("LEAST", "GREATEST")
+    ecrire(conn, f"""
+        UPDATE pandemie SET date_apparition = {plus_petit}(date_apparition, %s),
+                            date_fin = {plus_grand}(COALESCE(date_fin, %s), %s)
+        WHERE id_pandemie = %s
+    """, (date_debut, date_fin, date_fin, id_pandemie))
+    logging.info(f"Pandémie {id_pandemie} : dates élargies à {date_debut} - {date_fin}")
+
+# Insère une ligne dans logging_insert et retourne son id
+def insert_logging(conn, description):
+    return ecrire(conn, "INSERT INTO logging_insert (date_insertion, description) VALUES (%s, %s)",
+                  (datetime.now(), description))
+
+# Charge les lignes nouvelles ou modifiées dans suivi_pandemie (upsert en masse) et log l'insertion ;
+# une seule ligne par (pays, date), la première, comme en flux ; retourne le nombre de lignes
+# chargées, None en cas d'erreur (commit par main)
+def insert_to_db(conn, df, id_pandemie, description, colonnes_mesures, methode="executemany", taille_lot=TAILLE_LOT):
+    try:
+        df = Dedoublonneur().filtrer(df)
+        delta = FiltreDelta(conn, id_pandemie, colonnes_mesures)(df)
+        if delta.empty:
+            return 0
+        id_logging = insert_logging(conn, description)
+        nb = charger_suivis(conn, delta, id_logging, id_pandemie, colonnes_mesures, methode, taille_lot, upsert=True)
+        logging.info(f"{nb} lignes insérées dans suivi_pandemie avec id_logging = {id_logging} et description = '{description}'")
+        return nb
+    except Exception as e:
+        logging.error(f"Erreur MySQL : {e}")
+        return None
+
+# Lit le CSV par chunks typés et charge au fil de l'eau les lignes nouvelles ou modifiées
+# (mémoire bornée) ; retourne le nombre de lignes chargées, None en cas d'erreur (commit par main)
+def insert_en_flux(conn, args, country_mapping, profil, methode="executemany"):
+    try:
+        id_logging = insert_logging(conn, args.description)
+        # pour une nouvelle pandémie, dates provisoires élargies une fois le fichier entièrement lu
+        id_pandemie = obtenir_pandemie(conn, args.virus_id, args.nom_maladie, datetime.now().date(), None)
+        if not id_pandemie:
+            return None
+        chunks = lire_par_chunks(args.input_file, profil["dtypes"], args.taille_chunk, args.moteur)
+        nb, date_debut, date_fin = ingerer_en_flux(
+            conn, chunks, lambda df: transformation_data(df, country_mapping, profil["colonnes"]), id_pandemie,
+            id_logging, profil["mesures"], methode, args.taille_lot,
+            filtre=FiltreDelta(conn, id_pandemie, profil["mesures"]), upsert=True)
+        if nb:
+            maj_dates_pandemie(conn, id_pandemie, date_debut, date_fin)
+            logging.info(f"{nb} lignes insérées en flux dans suivi_pandemie avec id_logging = {id_logging} et description = '{args.description}'")
+        return nb
+    except Exception as e:
+        logging.error(f"Erreur MySQL : {e}")
+        return None
+
+# Fonction principale d'un script mono-source, paramétrée par le nom du profil de colonnes
+def main(nom_profil):
+    profil = PROFILS[nom_profil]
+    creation_logs()
+    parser = argparse.ArgumentParser(description=f"ETL vers suivi_pandemie (profil {nom_profil})")
+    parser.add_argument("--input_file", required=True, help="Chemin vers fichier CSV data-sets")
+    parser.add_argument("--virus_id", type=int, required=True, help="ID du virus pour la table pandemie 1=covid 2=variole")
+    parser.add_argument("--nom_maladie", required=True, help="Nom de la maladie pour la table pandemie ex: COVID-19")
+    parser.add_argument("--description", required=False, help="Plus d'infos sur l'insertion de suivi pandemie")
+    parser.add_argument("--methode", choices=METHODES, default="auto", help="Chargement : executemany par lots, LOAD DATA LOCAL INFILE, ou auto (LOAD DATA si le serveur l'autorise)")
+    parser.add_argument("--taille_lot", type=int, default=TAILLE_LOT, help="Nombre de lignes par executemany")
+    parser.add_argument("--streaming", action="store_true", help="Lecture par chunks typés, chaque chunk chargé aussitôt (mémoire bornée)")
+    parser.add_argument("--taille_chunk", type=int, default=TAILLE_CHUNK, help="Nombre de lignes lues par chunk (--streaming)")
+    parser.add_argument("--moteur", choices=MOTEURS, default="c", help="Lecteur CSV en mode --streaming (pyarrow si installé)")
+    args = parser.parse_args()
+
+    logging.info(f"Début du pipeline ETL (profil {nom_profil})")
+    if not args.streaming:
+        df = pd.read_csv(args.input_file)
+        count_nulls_and_duplicates(df)
+
+    # Une seule connexion et une seule transaction pour tout le run
+    local_infile = args.methode != "executemany"
+    conn = connexion_bbd(local_infile=local_infile)
+    if conn is None:
+        return
+    try:
+        methode = choisir_methode(conn, args.methode, local_infile)
+        country_mapping = recup_pays_bdd(conn)
+        if args.streaming:
+            nb = insert_en_flux(conn, args, country_mapping, profil, methode)
+        else:
+            clean_df = transformation_data(df, country_mapping, profil["colonnes"])
+            date_debut, date_fin = clean_df['date_jour'].min(), clean_df['date_jour'].max()
+            id_pandemie = obtenir_pandemie(conn, args.virus_id, args.nom_maladie, date_debut, date_fin)
+            nb = id_pandemie and insert_to_db(conn, clean_df, id_pandemie, args.description, profil["mesures"],
+                                              methode, args.taille_lot)
+            if nb:
+                maj_dates_pandemie(conn, id_pandemie, date_debut, date_fin)
+        if nb:
+            conn.commit()
+        elif nb == 0:
+            # run idempotent : rien de nouveau, pas de ligne logging_insert ni de pandémie vide
+            conn.rollback()
+            logging.info("Aucune ligne nouvelle ou modifiée, base inchangée")
+        else:
+            conn.rollback()
+            logging.error("Transaction annulée, aucune ligne insérée")
+    finally:
+        conn.close()
+
+    logging.info("Pipeline ETL terminé")
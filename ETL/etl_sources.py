@@ -0,0 +1,165 @@
+# etl_sources.py
+#
+# Point d'entrée multi-sources : charge dans suivi_pandemie toutes les sources d'un manifeste JSON,
+# en parallèle sur un pool de processus (etl.py reste le pipeline générique JSON/CSV vers fichier).
+# - Chaque source donne son fichier, son profil de colonnes (profils.py), virus_id, nom_maladie
+#   et une description (cf. manifeste.json)
+# - Le processus principal crée au préalable, une seule fois par source et dans une seule
+#   transaction, la ligne logging_insert et, si elle n'existe pas encore, la pandémie ; deux sources
+#   de la même pandémie (ex. données régionales) partagent donc la même ligne pandemie
+# - Les sources sont regroupées par pandémie : un groupe par tâche du pool, ses sources traitées
+#   l'une après l'autre dans l'ordre du manifeste. Deux sources de la même pandémie ne s'écrivent
+#   donc jamais en même temps (pas de verrous concurrents sur la clé unique) et le filtre delta
+#   de chacune voit les lignes validées par la précédente ; une clé (pays, date) présente dans
+#   les deux est mise à jour par la dernière
+# - Pour chaque source, le worker ouvre sa connexion, lit le fichier par chunks, transforme, filtre
+#   le delta (incremental.py) et écrit par lots en upsert dans sa propre transaction
+# - À la fin, les dates des pandémies sont élargies ; la ligne logging_insert d'une source en échec
+#   ou sans ligne nouvelle, et une pandémie créée restée vide, sont supprimées
+#
+# Usage : python etl_sources.py --manifeste manifeste.json --workers 4
+
+import os
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from chargement import choisir_methode, ecrire, METHODES, TAILLE_LOT
+from flux import lire_par_chunks, ingerer_en_flux, MOTEURS, TAILLE_CHUNK
+from incremental import trouver_pandemie, FiltreDelta
+from profils import PROFILS
+from etl_commun import (creation_logs, connexion_bbd, recup_pays_bdd, transformation_data,
+                                insert_pandemie, insert_logging, maj_dates_pandemie)
+
+
+# Lit et valide le manifeste : {"sources": [{"fichier", "profil", "virus_id", "nom_maladie", "description"}]}
+def lire_manifeste(chemin):
+    with open(chemin, encoding="utf-8") as f:
+        sources = json.load(f)["sources"]
+    dossier = os.path.dirname(os.path.abspath(chemin))
+    for source in sources:
+        manquants = {"fichier", "profil", "virus_id", "nom_maladie"} - source.keys()
+        if manquants:
+            raise ValueError(f"Source {source} : champs manquants {sorted(manquants)}")
+        if source["profil"] not in PROFILS:
+            raise ValueError(f"Profil inconnu '{source['profil']}', profils disponibles : {sorted(PROFILS)}")
+        # chemins relatifs au manifeste
+        source["fichier"] = os.path.join(dossier, source["fichier"])
+    return sources
+
+# Crée une fois par source la ligne logging_insert et, si besoin, la pandémie (commit ici, avant les workers)
+def preparer_sources(conn, sources):
+    creees = set()
+    for source in sources:
+        id_pandemie = trouver_pandemie(conn, source["virus_id"], source["nom_maladie"])
+        if id_pandemie is None:
+            # dates provisoires, élargies à la fin du run
+            id_pandemie = insert_pandemie(conn, source["virus_id"], source["nom_maladie"], datetime.now().date(), None)
+            if id_pandemie is None:
+                raise RuntimeError(f"Impossible de créer la pandémie {source['nom_maladie']}")
+            creees.add(id_pandemie)
+        source["id_pandemie"] = id_pandemie
+        source["id_logging"] = insert_logging(conn, source.get("description"))
+        logging.info(f"Source {source['fichier']} : pandémie {id_pandemie}, id_logging {source['id_logging']}")
+    conn.commit()
+    return creees
+
+# Worker : une connexion et une transaction par source, lecture par chunks et écriture par lots
+def traiter_source(source, country_mapping, methode, taille_lot, taille_chunk, moteur):
+    debut = time.perf_counter()
+    profil = PROFILS[source["profil"]]
+    local_infile = methode != "executemany"
+    conn = connexion_bbd(local_infile=local_infile)
+    if conn is None:
+        return {**source, "nb": None, "erreur": "connexion impossible"}
+    try:
+        methode = choisir_methode(conn, methode, local_infile)
+        chunks = lire_par_chunks(source["fichier"], profil["dtypes"], taille_chunk, moteur)
+        nb, date_debut, date_fin = ingerer_en_flux(
+            conn, chunks, lambda df: transformation_data(df, country_mapping, profil["colonnes"]),
+            source["id_pandemie"], source["id_logging"], profil["mesures"], methode, taille_lot,
+            filtre=FiltreDelta(conn, source["id_pandemie"], profil["mesures"]), upsert=True)
+        conn.commit()
+        return {**source, "nb": nb, "date_debut": date_debut, "date_fin": date_fin,
+                "duree_s": time.perf_counter() - debut, "pid": os.getpid()}
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"Erreur sur {source['fichier']} : {e}")
+        return {**source, "nb": None, "erreur": str(e)}
+    finally:
+        conn.close()
+
+# Worker : les sources d'une même pandémie, l'une après l'autre (chacune validée avant la suivante)
+def traiter_groupe(groupe, country_mapping, methode, taille_lot, taille_chunk, moteur):
+    return [traiter_source(source, country_mapping, methode, taille_lot, taille_chunk, moteur) for source in groupe]
+
+# Sources regroupées par pandémie, dans l'ordre du manifeste
+def grouper_par_pandemie(sources):
+    groupes = {}
+    for source in sources:
+        groupes.setdefault(source["id_pandemie"], []).append(source)
+    return list(groupes.values())
+
+# Élargit les dates des pandémies chargées et supprime ce qui est resté vide
+def finaliser(conn, resultats, creees):
+    for r in resultats:
+        if r["nb"]:
+            maj_dates_pandemie(conn, r["id_pandemie"], r["date_debut"], r["date_fin"])
+        else:
+            ecrire(conn, "DELETE FROM logging_insert WHERE id_logging = %s", (r["id_logging"],))
+    for id_pandemie in creees:
+        ecrire(conn, """
+            DELETE FROM pandemie WHERE id_pandemie = %s
+            AND NOT EXISTS (SELECT 1 FROM suivi_pandemie WHERE id_pandemie = %s)
+        """, (id_pandemie, id_pandemie))
+    conn.commit()
+
+def main():
+    creation_logs()
+    parser = argparse.ArgumentParser(description="ETL parallèle de plusieurs sources vers suivi_pandemie")
+    parser.add_argument("--manifeste", required=True, help="Fichier JSON listant les sources (cf. manifeste.json)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Nombre de processus de chargement")
+    parser.add_argument("--methode", choices=METHODES, default="auto", help="Chargement : executemany par lots, LOAD DATA LOCAL INFILE, ou auto (LOAD DATA si le serveur l'autorise)")
+    parser.add_argument("--taille_lot", type=int, default=TAILLE_LOT, help="Nombre de lignes par executemany")
+    parser.add_argument("--taille_chunk", type=int, default=TAILLE_CHUNK, help="Nombre de lignes lues par chunk")
+    parser.add_argument("--moteur", choices=MOTEURS, default="c", help="Lecteur CSV (pyarrow si installé)")
+    args = parser.parse_args()
+
+    sources = lire_manifeste(args.manifeste)
+    logging.info(f"Début du pipeline ETL : {len(sources)} sources, {args.workers} workers")
+    debut = time.perf_counter()
+
+    conn = connexion_bbd()
+    if conn is None:
+        return
+    try:
+        country_mapping = recup_pays_bdd(conn)
+        creees = preparer_sources(conn, sources)
+        groupes = grouper_par_pandemie(sources)
+        logging.info(f"{len(groupes)} pandémie(s) à charger en parallèle")
+
+        resultats = []
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(groupes))) as pool:
+            futures = [pool.submit(traiter_groupe, groupe, country_mapping, args.methode,
+                                   args.taille_lot, args.taille_chunk, args.moteur) for groupe in groupes]
+            for future in as_completed(futures):
+                for r in future.result():
+                    resultats.append(r)
+                    if r["nb"] is None:
+                        print(f"ÉCHEC {r['fichier']} : {r['erreur']}")
+                    else:
+                        print(f"{r['fichier']} : {r['nb']} lignes chargées en {r['duree_s']:.1f}s (pid {r['pid']})")
+        finaliser(conn, resultats, creees)
+    finally:
+        conn.close()
+
+    total = sum(r["nb"] or 0 for r in resultats)
+    duree = time.perf_counter() - debut
+    logging.info(f"Pipeline ETL terminé : {total} lignes en {duree:.1f}s, "
+                 f"{sum(r['nb'] is None for r in resultats)} source(s) en échec")
+    print(f"Total : {total} lignes en {duree:.1f}s")
+
+if __name__ == "__main__":
+    main()
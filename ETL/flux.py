@@ -0,0 +1,90 @@
+# flux.py
+#
+# Ingestion en flux d'un CSV (--streaming des scripts ETL), à mémoire bornée :
+# lecture par chunks de taille fixe avec des types explicites (moteur C de pandas, ou pyarrow
+# s'il est installé), transformation chunk par chunk, dédoublonnage entre chunks sur la clé
+# (pays, date) et envoi de chaque chunk au chargeur en masse (chargement.py) dans la transaction
+# en cours. Seules les clés déjà vues (un entier par ligne) restent en mémoire.
+# Les valeurs manquantes restent NULL, comme en chargement complet.
+
+import time
+import logging
+import numpy as np
+import pandas as pd
+from chargement import charger_suivis, TAILLE_LOT
+
+TAILLE_CHUNK = 100_000
+MOTEURS = ["c", "pyarrow"]
+
+
+# Chunks du CSV, seules les colonnes de `dtypes` sont lues ; les dates restent des chaînes
+def lire_par_chunks(chemin, dtypes, taille_chunk=TAILLE_CHUNK, moteur="c"):
+    if moteur == "pyarrow":
+        try:
+            from pyarrow import csv as pa_csv
+        except ImportError:
+            logging.warning("pyarrow non installé, lecture avec le moteur C de pandas")
+        else:
+            yield from _chunks_pyarrow(pa_csv, chemin, dtypes, taille_chunk)
+            return
+    yield from pd.read_csv(chemin, usecols=list(dtypes), dtype=dtypes, chunksize=taille_chunk)
+
+def _chunks_pyarrow(pa_csv, chemin, dtypes, taille_chunk):
+    import pyarrow as pa
+    types = {col: pa.string() if t is str else pa.from_numpy_dtype(np.dtype(t)) for col, t in dtypes.items()}
+    lecteur = pa_csv.open_csv(
+        chemin,
+        # ~100 octets par ligne : blocs de l'ordre de taille_chunk lignes
+        read_options=pa_csv.ReadOptions(block_size=max(1 << 20, taille_chunk * 100)),
+        convert_options=pa_csv.ConvertOptions(column_types=types, include_columns=list(dtypes)),
+    )
+    for lot in lecteur:
+        yield lot.to_pandas()
+
+# Écarte les lignes dont la clé (pays_id, date_jour) a déjà été vue, dans ce chunk ou un précédent :
+# la première ligne lue l'emporte. Règle unique des deux modes (complet et flux), appliquée avant
+# le filtre delta : avec deux lignes d'un même jour aux mesures différentes (ex. doublons du Congo
+# dans covid.csv), en garder une seule rend le run idempotent.
+class Dedoublonneur:
+    def __init__(self):
+        self.vues = set()
+        self.ecartees = 0
+
+    @staticmethod
+    def cles(df):
+        jours = pd.to_datetime(df['date_jour']).to_numpy().astype("datetime64[D]").astype(np.int64)
+        return df['pays_id'].to_numpy(np.int64) * 100_000 + jours
+
+    def filtrer(self, df):
+        cles = self.cles(df)
+        garder = ~pd.Series(cles).duplicated().to_numpy()
+        garder &= np.fromiter((c not in self.vues for c in cles), bool, len(cles))
+        self.vues.update(cles[garder].tolist())
+        ecartees = int((~garder).sum())
+        if ecartees:
+            self.ecartees += ecartees
+            logging.info("%d lignes écartées : clé (pays_id, date_jour) déjà lue, la première est gardée", ecartees)
+        return df[garder]
+
+# Transforme, filtre (delta incrémental, cf. incremental.py) et charge chaque chunk ;
+# renvoie (lignes chargées, première date, dernière date)
+def ingerer_en_flux(conn, chunks, transformer, id_pandemie, id_logging, colonnes_mesures,
+                    methode="executemany", taille_lot=TAILLE_LOT, filtre=None, upsert=False):
+    dedoublonneur = Dedoublonneur()
+    total, lus, date_debut, date_fin = 0, 0, None, None
+    debut = time.perf_counter()
+    for numero, brut in enumerate(chunks, 1):
+        lus += len(brut)
+        df = dedoublonneur.filtrer(transformer(brut))
+        if filtre is not None:
+            df = filtre(df)
+        if df.empty:
+            continue
+        total += charger_suivis(conn, df, id_logging, id_pandemie, colonnes_mesures, methode, taille_lot, upsert)
+        date_debut = min(filter(None, [date_debut, df['date_jour'].min()]))
+        date_fin = max(filter(None, [date_fin, df['date_jour'].max()]))
+        logging.info("Chunk %d : %d lignes lues au total, %d chargées", numero, lus, total)
+    duree = time.perf_counter() - debut
+    logging.info("Flux terminé : %d lignes lues, %d chargées en %.1fs (%.0f lignes/s)",
+                 lus, total, duree, total / duree if duree > 0 else 0)
+    return total, date_debut, date_fin
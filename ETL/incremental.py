@@ -0,0 +1,80 @@
+# incremental.py
+#
+# Chargement incrémental et idempotent de suivi_pandemie, partagé par les scripts ETL :
+# la pandémie existante est retrouvée par (virus_id, nom_maladie) au lieu d'être recréée,
+# et seules les lignes nouvelles ou modifiées sont chargées. Une ligne est nouvelle si sa date
+# dépasse le filigrane (dernière date_jour déjà en base pour la pandémie) ; en deçà, elle n'est
+# rechargée que si l'empreinte de ses mesures diffère de celle de la ligne en base.
+# Les lignes retenues sont écrites en upsert sur la clé unique (id_pandemie, pays_id, date_jour).
+
+import logging
+import numpy as np
+import pandas as pd
+from chargement import lire
+
+
+# Id de la pandémie déjà chargée pour ce virus et ce nom de maladie (casse ignorée), ou None
+def trouver_pandemie(conn, virus_id, nom_maladie):
+    rows = lire(conn, "SELECT id_pandemie FROM pandemie WHERE virus_id = %s AND LOWER(nom_maladie) = LOWER(%s) "
+                       "ORDER BY id_pandemie LIMIT 1", (virus_id, nom_maladie))
+    return rows[0][0] if rows else None
+
+# Dernière date_jour chargée pour la pandémie (None si aucune ligne)
+def filigrane(conn, id_pandemie):
+    date_max = lire(conn, "SELECT MAX(date_jour) FROM suivi_pandemie WHERE id_pandemie = %s", (id_pandemie,))[0][0]
+    # sqlite3 renvoie la date sous forme de chaîne
+    return pd.to_datetime(date_max).date() if date_max is not None else None
+
+# Lignes de la pandémie déjà en base entre deux dates, limitées aux pays `pays` s'ils sont donnés,
+# pour comparer les empreintes
+def suivis_existants(conn, id_pandemie, date_debut, date_fin, colonnes_mesures, pays=None):
+    colonnes = ["pays_id", "date_jour"] + list(colonnes_mesures)
+    requete = (f"SELECT {', '.join(colonnes)} FROM suivi_pandemie "
+               "WHERE id_pandemie = %s AND date_jour BETWEEN %s AND %s")
+    params = [id_pandemie, date_debut, date_fin]
+    if pays is not None:
+        pays = [int(p) for p in pays]
+        requete += f" AND pays_id IN ({', '.join(['%s'] * len(pays))})"
+        params += pays
+    rows = lire(conn, requete, params)
+    df = pd.DataFrame(list(rows), columns=colonnes)
+    df['date_jour'] = pd.to_datetime(df['date_jour']).dt.date
+    return df
+
+# Empreinte 64 bits des mesures d'une ligne ; arrondies comme les colonnes entières de la base
+def empreintes(df, colonnes_mesures):
+    mesures = df[list(colonnes_mesures)].astype("float64").round()
+    return pd.util.hash_pandas_object(mesures, index=False).to_numpy()
+
+# Triplets (pays_id, date_jour, empreinte) : une ligne est inchangée si son triplet est déjà en base
+def triplets(df, colonnes_mesures):
+    return pd.MultiIndex.from_arrays([df['pays_id'].to_numpy(np.int64), df['date_jour'],
+                                      empreintes(df, colonnes_mesures)])
+
+class FiltreDelta:
+    """Garde les lignes nouvelles (après le filigrane) ou modifiées (empreinte différente)."""
+
+    def __init__(self, conn, id_pandemie, colonnes_mesures):
+        self.conn = conn
+        self.id_pandemie = id_pandemie
+        self.colonnes_mesures = list(colonnes_mesures)
+        self.filigrane = filigrane(conn, id_pandemie) if id_pandemie else None
+        logging.info(f"Filigrane de la pandémie {id_pandemie} : {self.filigrane}")
+
+    def __call__(self, df):
+        if self.filigrane is None or df.empty:
+            return df
+        anciennes = (df['date_jour'] <= self.filigrane).to_numpy()
+        if not anciennes.any():
+            return df
+        deja = df[anciennes]
+        # seuls les pays et la plage de dates du chunk sont relus (index de la clé unique)
+        existants = suivis_existants(self.conn, self.id_pandemie, deja['date_jour'].min(),
+                                     deja['date_jour'].max(), self.colonnes_mesures,
+                                     pays=np.unique(deja['pays_id'].to_numpy()))
+        modifiees = ~triplets(deja, self.colonnes_mesures).isin(triplets(existants, self.colonnes_mesures))
+        garder = ~anciennes
+        garder[anciennes] = modifiees
+        logging.info(f"Delta : {int((~anciennes).sum())} lignes nouvelles, {int(modifiees.sum())} modifiées, "
+                     f"{int((~modifiees).sum())} inchangées ignorées")
+        return df[garder]
@@ -0,0 +1,44 @@
+# profils.py
+#
+# Profils de colonnes des sources CSV : renommage vers les colonnes de suivi_pandemie,
+# colonnes lues et leur type (lecture par chunks, cf. flux.py) et mesures chargées.
+# Utilisés par etl_commun.py, via etl_suivi_pandemie.py (covid) et etl_suivi_pandemie3.py (variole),
+# et par etl_sources.py via le champ "profil" du manifeste.
+
+PROFILS = {
+    # Données COVID-19 par pays (data/covid.csv)
+    "covid": {
+        "colonnes": {
+            'Date': 'date_jour',
+            'Country/Region': 'nom_pays',
+            'Confirmed': 'total_cas',
+            'Deaths': 'total_mort',
+            'Recovered': 'guerison',
+            'New cases': 'nouveau_cas',
+            'New deaths': 'nouveau_mort',
+            'New recovered': 'nouvelle_guerison'
+        },
+        "dtypes": {
+            'Date': str, 'Country/Region': str,
+            'Confirmed': 'float64', 'Deaths': 'float64', 'Recovered': 'float64',
+            'New cases': 'float64', 'New deaths': 'float64', 'New recovered': 'float64',
+        },
+        "mesures": ['total_cas', 'total_mort', 'guerison', 'nouveau_cas', 'nouveau_mort', 'nouvelle_guerison'],
+    },
+    # Données variole du singe par pays (data/variole.csv)
+    "variole": {
+        "colonnes": {
+            'pays': 'nom_pays',
+            'date': 'date_jour',
+            'total_cases': 'total_cas',
+            'total_deaths': 'total_mort',
+            'new_cases': 'nouveau_cas',
+            'new_deaths': 'nouveau_mort'
+        },
+        "dtypes": {
+            'pays': str, 'date': str,
+            'total_cases': 'float64', 'total_deaths': 'float64', 'new_cases': 'float64', 'new_deaths': 'float64',
+        },
+        "mesures": ['total_cas', 'total_mort', 'nouveau_cas', 'nouveau_mort'],
+    },
+}
@@ -0,0 +1,30 @@
+import pandas as pd
+from chargement import requete_insertion, choisir_methode, charger_suivis, lire, ecrire, CLE_SUIVI
+from test.test_incremental import base_sqlite
+
+MESURES = ["total_cas", "nouveau_cas"]
+
+
+def test_requete_insertion_selon_le_dialecte():
+    colonnes = ["id_pandemie", "pays_id", "date_jour", "nouveau_cas"]
+    assert requete_insertion("t", colonnes) == \
+        "INSERT INTO t (id_pandemie, pays_id, date_jour, nouveau_cas) VALUES (%s, %s, %s, %s)"
+    assert requete_insertion("t", colonnes, CLE_SUIVI).endswith(
+        "ON DUPLICATE KEY UPDATE nouveau_cas = VALUES(nouveau_cas)")
+    assert requete_insertion("t", colonnes, CLE_SUIVI, "sqlite") == \
+        "INSERT OR REPLACE INTO t (id_pandemie, pays_id, date_jour, nouveau_cas) VALUES (?, ?, ?, ?)"
+
+
+def test_upsert_sqlite_par_lots():
+    conn = base_sqlite()
+    assert choisir_methode(conn, "auto", local_infile=True) == "executemany"
+    id_logging = ecrire(conn, "INSERT INTO logging_insert (description) VALUES (%s)", ("test",))
+    df = pd.DataFrame({"pays_id": [1, 1, 2], "date_jour": ["2020-03-01", "2020-03-02", "2020-03-01"],
+                       "total_cas": [1.0, 3.0, None], "nouveau_cas": [1.0, 2.0, 4.0]})
+    assert charger_suivis(conn, df, id_logging, 1, MESURES, taille_lot=2, upsert=True) == 3
+
+    modifie = df.iloc[[1]].assign(nouveau_cas=9.0)
+    charger_suivis(conn, modifie, id_logging, 1, MESURES, upsert=True)
+    assert lire(conn, "SELECT pays_id, date_jour, total_cas, nouveau_cas FROM suivi_pandemie "
+                      "WHERE id_pandemie = %s ORDER BY pays_id, date_jour", (1,)) == [
+        (1, "2020-03-01", 1, 1), (1, "2020-03-02", 3, 9), (2, "2020-03-01", None, 4)]
@@ -0,0 +1,39 @@
+import json
+import sys
+import sqlite3
+import etl_sources
+from etl_sources import grouper_par_pandemie
+from test.test_incremental import base_sqlite, ecrire_csv
+
+
+def test_sources_d_une_pandemie_dans_un_seul_groupe():
+    sources = [{"fichier": "a", "id_pandemie": 1}, {"fichier": "b", "id_pandemie": 2},
+               {"fichier": "c", "id_pandemie": 1}]
+    assert [[s["fichier"] for s in g] for g in grouper_par_pandemie(sources)] == [["a", "c"], ["b"]]
+
+
+def test_manifeste_deux_sources_meme_pandemie(tmp_path, monkeypatch):
+    base = tmp_path / "base.db"
+    base_sqlite(str(base)).close()
+    ecrire_csv(tmp_path / "a.csv", jours=4, jumeaux=False)
+    ecrire_csv(tmp_path / "b.csv", jours=6)
+    source = {"profil": "covid", "virus_id": 1, "nom_maladie": "covid-19"}
+    (tmp_path / "manifeste.json").write_text(json.dumps({"sources": [
+        {**source, "fichier": "a.csv", "description": "a"}, {**source, "fichier": "b.csv", "description": "b"}]}))
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{base}")
+    monkeypatch.setenv("DB_NAME", "")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["etl_sources.py", "--manifeste", "manifeste.json", "--workers", "2"])
+
+    etl_sources.main()
+    conn = sqlite3.connect(base)
+    # b ne recharge que ses 2 jours nouveaux : les 4 premiers jours de a sont déjà validés et identiques
+    assert conn.execute("SELECT id_logging, COUNT(*) FROM suivi_pandemie GROUP BY id_logging").fetchall() == \
+        [(1, 8), (2, 4)]
+    assert conn.execute("SELECT date_apparition, date_fin FROM pandemie").fetchall() == \
+        [("2020-03-01", "2020-03-06")]
+
+    etl_sources.main()
+    assert conn.execute("SELECT COUNT(*) FROM suivi_pandemie").fetchone()[0] == 12
+    assert conn.execute("SELECT COUNT(*) FROM logging_insert").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM pandemie").fetchone()[0] == 1
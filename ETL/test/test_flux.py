@@ -0,0 +1,32 @@
+import pandas as pd
+from flux import lire_par_chunks, ingerer_en_flux, Dedoublonneur
+from profils import PROFILS
+from etl_commun import transformation_data
+from test.test_incremental import base_sqlite, ecrire_csv, MAPPING
+
+PROFIL = PROFILS["covid"]
+
+
+def test_dedoublonneur_garde_la_premiere_ligne_entre_chunks():
+    dedoublonneur = Dedoublonneur()
+    a = pd.DataFrame({"pays_id": [1, 1, 2], "date_jour": ["2020-03-01", "2020-03-01", "2020-03-01"], "v": [1, 2, 3]})
+    b = pd.DataFrame({"pays_id": [2, 1], "date_jour": ["2020-03-01", "2020-03-02"], "v": [4, 5]})
+    assert dedoublonneur.filtrer(a)["v"].tolist() == [1, 3]
+    assert dedoublonneur.filtrer(b)["v"].tolist() == [5]
+    assert dedoublonneur.ecartees == 2
+
+
+def test_chunks_types_et_bornes(tmp_path):
+    chemin = ecrire_csv(tmp_path / "covid.csv", jours=5)
+    chunks = list(lire_par_chunks(chemin, PROFIL["dtypes"], taille_chunk=4))
+    assert [len(c) for c in chunks] == [4, 4, 4, 3]
+    assert all(c["Confirmed"].dtype == "float64" for c in chunks)
+
+
+def test_ingerer_en_flux_charge_chaque_chunk(tmp_path):
+    conn = base_sqlite()
+    chunks = lire_par_chunks(ecrire_csv(tmp_path / "covid.csv", jours=5), PROFIL["dtypes"], taille_chunk=4)
+    nb, debut, fin = ingerer_en_flux(conn, chunks, lambda df: transformation_data(df, MAPPING, PROFIL["colonnes"]),
+                                     1, 1, PROFIL["mesures"], taille_lot=2, upsert=True)
+    assert (nb, str(debut), str(fin)) == (10, "2020-03-01", "2020-03-05")
+    assert conn.execute("SELECT COUNT(*) FROM suivi_pandemie").fetchone()[0] == 10
@@ -0,0 +1,124 @@
+import sqlite3
+import argparse
+import pandas as pd
+import pytest
+from profils import PROFILS
+from incremental import FiltreDelta, filigrane, trouver_pandemie, suivis_existants
+from etl_commun import transformation_data, obtenir_pandemie, insert_to_db, insert_en_flux
+
+PROFIL = PROFILS["covid"]
+SCHEMA = """
+CREATE TABLE pandemie (id_pandemie INTEGER PRIMARY KEY AUTOINCREMENT, virus_id INT, nom_maladie TEXT,
+                       date_apparition DATE, date_fin DATE);
+CREATE TABLE logging_insert (id_logging INTEGER PRIMARY KEY AUTOINCREMENT, date_insertion TEXT, description TEXT);
+CREATE TABLE pays (id INTEGER PRIMARY KEY, nom TEXT);
+CREATE TABLE suivi_pandemie (id INTEGER PRIMARY KEY AUTOINCREMENT, id_logging INT, id_pandemie INT, pays_id INT,
+                             date_jour DATE, total_cas INT, total_mort INT, guerison INT, nouveau_cas INT,
+                             nouveau_mort INT, nouvelle_guerison INT, UNIQUE (id_pandemie, pays_id, date_jour));
+INSERT INTO pays (id, nom) VALUES (1, 'France'), (2, 'Congo');
+"""
+MAPPING = {"France": 1, "Congo": 2}
+
+
+def base_sqlite(chemin=":memory:"):
+    conn = sqlite3.connect(chemin)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def ecrire_csv(chemin, jours=5, jumeaux=True):
+    """CSV au format covid ; avec `jumeaux`, deux lignes Congo par jour aux mesures différentes."""
+    lignes = []
+    for j in range(jours):
+        date = f"2020-03-{j + 1:02d}"
+        lignes.append([date, "France", 10 * j, j, 0, 10, 1, 0])
+        lignes.append([date, "Congo", 5 * j, 0, 0, 5, 0, 0])
+        if jumeaux:
+            lignes.append([date, "Congo", 7 * j, 1, 0, 7, 1, 0])
+    pd.DataFrame(lignes, columns=list(PROFIL["colonnes"])).to_csv(chemin, index=False)
+    return chemin
+
+
+def args_flux(chemin):
+    return argparse.Namespace(input_file=str(chemin), virus_id=1, nom_maladie="covid-19", description="test",
+                              taille_chunk=4, moteur="c", taille_lot=3)
+
+
+def charger_complet(conn, chemin):
+    df = transformation_data(pd.read_csv(chemin), MAPPING, PROFIL["colonnes"])
+    id_pandemie = obtenir_pandemie(conn, 1, "covid-19", df["date_jour"].min(), df["date_jour"].max())
+    nb = insert_to_db(conn, df, id_pandemie, "test", PROFIL["mesures"], taille_lot=3)
+    conn.commit()
+    return nb
+
+
+def suivis(conn):
+    return conn.execute("SELECT pays_id, date_jour, nouveau_cas FROM suivi_pandemie ORDER BY pays_id, date_jour").fetchall()
+
+
+@pytest.mark.parametrize("premier, second", [("complet", "complet"), ("flux", "flux"), ("complet", "flux"),
+                                              ("flux", "complet")])
+def test_second_run_ne_charge_rien_malgre_les_jumeaux(tmp_path, premier, second):
+    chemin = ecrire_csv(tmp_path / "covid.csv")
+    conn = base_sqlite()
+
+    def lancer(mode):
+        if mode == "complet":
+            return charger_complet(conn, chemin)
+        nb = insert_en_flux(conn, args_flux(chemin), MAPPING, PROFIL)
+        conn.commit() if nb else conn.rollback()
+        return nb
+
+    assert lancer(premier) == 10
+    charges = suivis(conn)
+    assert lancer(second) == 0
+    assert suivis(conn) == charges
+    # une seule règle dans les deux modes : la première ligne lue d'un (pays, date) l'emporte
+    assert [n for p, _, n in charges if p == 2] == [5] * 5
+    assert conn.execute("SELECT COUNT(*) FROM logging_insert").fetchone()[0] == 1
+
+
+def test_delta_nouvelles_et_modifiees(tmp_path):
+    conn = base_sqlite()
+    charger_complet(conn, ecrire_csv(tmp_path / "avant.csv", jours=3, jumeaux=False))
+    id_pandemie = trouver_pandemie(conn, 1, "COVID-19")
+    assert str(filigrane(conn, id_pandemie)) == "2020-03-03"
+
+    df = transformation_data(pd.read_csv(ecrire_csv(tmp_path / "apres.csv", jours=4, jumeaux=False)), MAPPING,
+                             PROFIL["colonnes"])
+    df.loc[(df["pays_id"] == 1) & (df["date_jour"].astype(str) == "2020-03-02"), "nouveau_cas"] = 99
+    delta = FiltreDelta(conn, id_pandemie, PROFIL["mesures"])(df)
+    assert sorted((int(p), str(d)) for p, d in zip(delta["pays_id"], delta["date_jour"])) == [
+        (1, "2020-03-02"), (1, "2020-03-04"), (2, "2020-03-04")]
+
+
+def test_relecture_bornee_aux_pays_et_dates_du_chunk(tmp_path, monkeypatch):
+    conn = base_sqlite()
+    charger_complet(conn, ecrire_csv(tmp_path / "covid.csv", jours=5, jumeaux=False))
+    id_pandemie = trouver_pandemie(conn, 1, "covid-19")
+    existants = suivis_existants(conn, id_pandemie, "2020-03-02", "2020-03-03", PROFIL["mesures"], pays=[2])
+    assert existants["pays_id"].tolist() == [2, 2]
+
+    lus = []
+    monkeypatch.setattr("incremental.suivis_existants",
+                        lambda *a, **k: lus.append(a[2:4] + (list(k["pays"]),)) or suivis_existants(*a, **k))
+    df = transformation_data(pd.read_csv(tmp_path / "covid.csv"), MAPPING, PROFIL["colonnes"])
+    chunk = df[(df["pays_id"] == 1) & (df["date_jour"].astype(str).isin(["2020-03-02", "2020-03-03"]))]
+    assert FiltreDelta(conn, id_pandemie, PROFIL["mesures"])(chunk).empty
+    assert [(str(d1), str(d2), p) for d1, d2, p in lus] == [("2020-03-02", "2020-03-03", [1])]
+
+
+def test_mesure_nulle_flux_puis_complet(tmp_path):
+    chemin = ecrire_csv(tmp_path / "covid.csv", jours=6, jumeaux=False)
+    df = pd.read_csv(chemin)
+    # les médianes des chunks (4 lignes) diffèrent de celle du fichier entier
+    df.loc[df["Country/Region"] == "France", "New cases"] = range(10, 70, 10)
+    df.loc[[1, 7], "New cases"] = None
+    df.to_csv(chemin, index=False)
+    conn = base_sqlite()
+
+    nb = insert_en_flux(conn, args_flux(chemin), MAPPING, PROFIL)
+    conn.commit()
+    assert nb == 12
+    assert charger_complet(conn, chemin) == 0
+    assert sum(n is None for _, _, n in suivis(conn)) == 2
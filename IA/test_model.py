@@ -1,10 +1,20 @@
 import os
+import sys
+import time
+import pickle
+import threading
 import numpy as np
 import pandas as pd
 import joblib
-from sqlalchemy import create_engine
+from threadpoolctl import threadpool_limits
+from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pandemie_api"))
+from cache_features import charger_ou_calculer
+
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.linear_model import LinearRegression
 from xgboost import XGBRegressor
@@ -53,21 +63,55 @@ def get_engine():
     )
 
 
+COLONNES_SUIVI = [
+    "pays_id", "date_jour", "nouveau_cas", "nouveau_mort", "nouvelle_guerison",
+    "total_cas", "total_mort", "guerison",
+]
+
+
 def charger_donnees(pandemie_id: int, pays_id: int) -> pd.DataFrame:
     """
-    Charge depuis la table `suivi_pandemie` les enregistrements pour (pandemie_id, pays_id),
-    réindexe journalier, imputations des NaN, et retourne un DataFrame indexé par date_jour.
+    Charge depuis la table `suivi_pandemie` les enregistrements pour (pandemie_id, pays_id)
+    (filtrage côté SQL), réindexe journalier, imputations des NaN, et retourne un DataFrame
+    indexé par date_jour.
     """
-    engine = get_engine()
-    df = pd.read_sql("SELECT * FROM suivi_pandemie", con=engine)
-
-    df_filt = df[
-        (df["id_pandemie"] == pandemie_id) & (df["pays_id"] == pays_id)
-    ].copy()
-
+    df_filt = pd.read_sql(
+        text(
+            f"SELECT {', '.join(COLONNES_SUIVI)} FROM suivi_pandemie "
+            "WHERE id_pandemie = :pandemie AND pays_id = :pays"
+        ),
+        con=get_engine(),
+        params={"pandemie": pandemie_id, "pays": pays_id},
+    )
     if df_filt.empty:
         raise ValueError(f"Aucune donnée pour pandemie_id={pandemie_id} et pays_id={pays_id}")
+    return preparer_pays(df_filt)
+
+
+def charger_pandemie(pandemie_id: int) -> dict:
+    """
+    Charge en une seule requête tous les pays d'une pandémie et renvoie
+    {pays_id: DataFrame préparé comme par charger_donnees}.
+    """
+    df = pd.read_sql(
+        text(
+            f"SELECT {', '.join(COLONNES_SUIVI)} FROM suivi_pandemie "
+            "WHERE id_pandemie = :pandemie ORDER BY pays_id, date_jour"
+        ),
+        con=get_engine(),
+        params={"pandemie": pandemie_id},
+    )
+    if df.empty:
+        raise ValueError(f"Aucune donnée pour pandemie_id={pandemie_id}")
+    return {int(pays_id): preparer_pays(groupe) for pays_id, groupe in df.groupby("pays_id")}
+
 
+def preparer_pays(df_filt: pd.DataFrame) -> pd.DataFrame:
+    """
+    Réindexe journalier les lignes d'un pays et impute les NaN
+    (0 pour les valeurs journalières, report de la dernière valeur pour les cumuls).
+    """
+    df_filt = df_filt.copy()
     df_filt["date_jour"] = pd.to_datetime(df_filt["date_jour"])
     df_filt = df_filt.set_index("date_jour").sort_index()
 
@@ -87,6 +131,24 @@ def charger_donnees(pandemie_id: int, pays_id: int) -> pd.DataFrame:
     return df_pand
 
 
+def version_donnees(pandemie_id: int, pays_id: int) -> str:
+    """
+    Empreinte légère des lignes (pandemie_id, pays_id) : nombre, dernier id_logging, dernière date.
+    Change dès qu'une ligne est ajoutée ou rechargée par l'ETL.
+    """
+    with get_engine().connect() as conn:
+        ligne = conn.execute(
+            text("SELECT COUNT(*), MAX(id_logging), MAX(date_jour) FROM suivi_pandemie "
+                 "WHERE id_pandemie = :pandemie AND pays_id = :pays"),
+            {"pandemie": pandemie_id, "pays": pays_id},
+        ).one()
+    return "-".join(str(v) for v in ligne)
+
+
+# À incrémenter à chaque modification de creer_features (invalide le cache disque)
+VERSION_FEATURES = 1
+
+
 def creer_features(df: pd.DataFrame, n_lags: int = 7) -> (np.ndarray, np.ndarray, pd.DataFrame):
     """
     À partir du DataFrame indexé sur date (contenant au moins :
@@ -141,6 +203,26 @@ def creer_features(df: pd.DataFrame, n_lags: int = 7) -> (np.ndarray, np.ndarray
     return X, y, df_feats
 
 
+def features_pays(pandemie_id: int, pays_id: int, n_lags: int = 7, utiliser_cache: bool = True,
+                  donnees: pd.DataFrame = None):
+    """
+    Comme creer_features(charger_donnees(...)), mais lit df_feats depuis le cache disque
+    tant que les données et VERSION_FEATURES n'ont pas changé. Renvoie (X, y, df_feats).
+    `donnees` : lignes du pays déjà préparées (cf. charger_pandemie), utilisées à la place
+    de charger_donnees quand le cache est absent.
+    """
+    parties = ("IA", pandemie_id, pays_id, n_lags, VERSION_FEATURES, version_donnees(pandemie_id, pays_id))
+    df_feats = charger_ou_calculer(
+        parties,
+        lambda: creer_features(donnees if donnees is not None else charger_donnees(pandemie_id, pays_id),
+                               n_lags=n_lags)[2],
+        utiliser_cache,
+    )
+    X = df_feats.drop(columns=["nouveau_cas", "nouveau_mort", "total_cas", "jour_semaine"]).values
+    y = df_feats["nouveau_cas"].values
+    return X, y, df_feats
+
+
 def evaluer_modele(model, X: np.ndarray, y: np.ndarray) -> dict:
     """
     Calcule MAE, RMSE (via sqrt de MSE) et R² sur (X, y) pour un modèle sklearn-like.
@@ -149,8 +231,165 @@ def evaluer_modele(model, X: np.ndarray, y: np.ndarray) -> dict:
     return compute_metrics(y, y_pred)
 
 
+MODELES = [
+    "RandomForest",
+    "XGBoost",
+    "LinearRegression",
+    "DecisionTree",
+    "ExtraTrees",
+    "GradientBoost",
+    "AdaBoost",
+    "KNN",
+    "Ridge",
+    "Lasso",
+    "SVR",
+]
+
+
+def creer_modele(modele_type: str, n_jobs: int = None):
+    """
+    Instancie le modèle `modele_type` ; les modèles sensibles à l'échelle
+    (Ridge, Lasso, SVR, KNN) sont précédés d'une standardisation apprise sur le train.
+    `n_jobs` borne les threads de XGBoost (par défaut : tous les cœurs).
+    """
+    if modele_type == "RandomForest":
+        return RandomForestRegressor(n_estimators=100, random_state=42)
+    if modele_type == "XGBoost":
+        return XGBRegressor(
+            n_estimators=200,
+            learning_rate=0.1,
+            random_state=42,
+            objective="reg:squarederror",
+            n_jobs=n_jobs,
+        )
+    if modele_type == "LinearRegression":
+        return LinearRegression()
+    if modele_type == "DecisionTree":
+        return DecisionTreeRegressor(random_state=42)
+    if modele_type == "ExtraTrees":
+        return ExtraTreesRegressor(n_estimators=100, random_state=42)
+    if modele_type == "GradientBoost":
+        return GradientBoostingRegressor(n_estimators=100, learning_rate=0.1, random_state=42)
+    if modele_type == "AdaBoost":
+        return AdaBoostRegressor(n_estimators=100, learning_rate=0.1, random_state=42)
+    if modele_type == "KNN":
+        return Pipeline([("scaler", StandardScaler()), ("knn", KNeighborsRegressor(n_neighbors=5))])
+    if modele_type == "Ridge":
+        return Pipeline([("scaler", StandardScaler()), ("ridge", Ridge(alpha=1.0))])
+    if modele_type == "Lasso":
+        return Pipeline([("scaler", StandardScaler()), ("lasso", Lasso(alpha=0.1))])
+    if modele_type == "SVR":
+        return Pipeline([("scaler", StandardScaler()), ("svr", SVR(kernel="rbf", C=1.0, epsilon=0.1))])
+    raise ValueError(f"Modèle non reconnu : {modele_type}")
+
+
+COLONNES_RESULTATS = [
+    "modele", "phase", "MAE", "RMSE", "R2",
+    "fit_s", "latence_p50_ms", "latence_p99_ms", "rss_pic_mo", "taille_mo",
+]
+REPETITIONS_LATENCE = 100
+
+
+class EchantillonneurRSS:
+    """
+    Échantillonne la mémoire résidente du processus (/proc/self/statm) dans un thread
+    pendant le bloc `with` ; `delta_mo` = pic observé moins RSS à l'entrée (NaN hors Linux).
+    """
+
+    def __init__(self, intervalle_s: float = 0.005):
+        self.intervalle_s = intervalle_s
+        self.delta_mo = float("nan")
+        self._stop = threading.Event()
+
+    @staticmethod
+    def rss_octets():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            return None
+
+    def _boucle(self):
+        while not self._stop.wait(self.intervalle_s):
+            self._pic = max(self._pic, self.rss_octets())
+
+    def __enter__(self):
+        self._depart = self.rss_octets()
+        if self._depart is not None:
+            self._pic = self._depart
+            self._thread = threading.Thread(target=self._boucle, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._depart is not None:
+            self._stop.set()
+            self._thread.join()
+            self._pic = max(self._pic, self.rss_octets())
+            self.delta_mo = (self._pic - self._depart) / 1e6
+        return False
+
+
+def latences_par_ligne(model, X: np.ndarray, repetitions: int = REPETITIONS_LATENCE) -> np.ndarray:
+    """Latences (ms) d'appels predict sur une seule ligne, lignes prises à tour de rôle dans X."""
+    durees = []
+    for i in range(repetitions):
+        ligne = X[i % len(X)][None, :]
+        debut = time.perf_counter()
+        model.predict(ligne)
+        durees.append(time.perf_counter() - debut)
+    return np.array(durees) * 1000
+
+
+def evaluer_un_modele(modele_type: str, X: np.ndarray, y: np.ndarray, n_jobs: int = None) -> list:
+    """
+    Découpage temporel (75% train, 15% validation, 10% test), entraînement de `modele_type`
+    sur le train et métriques (MAE, RMSE, R2) des trois phases. Renvoie une ligne par phase,
+    complétée des coûts du modèle (identiques sur les trois lignes) : durée du fit, latence
+    predict par ligne (p50/p99), pic de RSS pendant le fit et taille sérialisée.
+    """
+    n = len(X)
+    idx_train_end = int(0.75 * n)
+    idx_val_end = int(0.90 * n)
+    phases = {
+        "train": (X[:idx_train_end], y[:idx_train_end]),
+        "validation": (X[idx_train_end:idx_val_end], y[idx_train_end:idx_val_end]),
+        "test": (X[idx_val_end:], y[idx_val_end:]),
+    }
+
+    model = creer_modele(modele_type, n_jobs)
+    with EchantillonneurRSS() as rss:
+        debut = time.perf_counter()
+        model.fit(*phases["train"])
+        fit_s = time.perf_counter() - debut
+    latences = latences_par_ligne(model, phases["test"][0])
+    couts = {
+        "fit_s": fit_s,
+        "latence_p50_ms": np.percentile(latences, 50),
+        "latence_p99_ms": np.percentile(latences, 99),
+        "rss_pic_mo": rss.delta_mo,
+        "taille_mo": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)) / 1e6,
+    }
+
+    results = []
+    for phase, (X_phase, y_phase) in phases.items():
+        m = evaluer_modele(model, X_phase, y_phase)
+        results.append(
+            {
+                "modele": modele_type,
+                "phase": phase,
+                "MAE": m["MAE"],
+                "RMSE": m["RMSE"],
+                "R2": m["R2"],
+                **couts,
+            }
+        )
+    return results
+
+
 def benchmark_models(
-    pandemie_id: int, pays_id: int, n_lags: int = 7, modele_list: list = None
+    pandemie_id: int, pays_id: int, n_lags: int = 7, modele_list: list = None,
+    utiliser_cache: bool = True,
 ) -> pd.DataFrame:
     """
     Pour un (pandemie_id, pays_id) donné, compare plusieurs modèles sklearn :
@@ -163,151 +402,116 @@ def benchmark_models(
     if modele_list is None:
         modele_list = ["RandomForest", "XGBoost", "LinearRegression"]
 
-    # 1) Charger les données et dériver les features
-    df_pand = charger_donnees(pandemie_id, pays_id)
-    X, y, df_feats = creer_features(df_pand, n_lags=n_lags)
-
-    # 2) Découpage temporel (75% train, 15% validation, 10% test)
-    n = len(X)
-    idx_train_end = int(0.75 * n)
-    idx_val_end = int(0.90 * n)
+    # 1) Charger les données et dériver les features (cache disque si disponible)
+    X, y, df_feats = features_pays(pandemie_id, pays_id, n_lags=n_lags, utiliser_cache=utiliser_cache)
 
+    # 2) Un découpage temporel et une évaluation par modèle
     results = []
-
     for modele_type in modele_list:
-        # --- 1) Pour les modèles sklearn “non séquentiels” (features multivariées) ---
-        if modele_type in [
-            "RandomForest",
-            "XGBoost",
-            "LinearRegression",
-            "DecisionTree",
-            "ExtraTrees",
-            "GradientBoost",
-            "AdaBoost",
-            "Ridge",
-            "Lasso",
-            "SVR",
-        ]:
-            # 1.1) Découpage de X et y
-            X_train, y_train = X[:idx_train_end], y[:idx_train_end]
-            X_val, y_val = X[idx_train_end:idx_val_end], y[idx_train_end:idx_val_end]
-            X_test, y_test = X[idx_val_end:], y[idx_val_end:]
-
-            # 1.2) Si le modèle est sensible à l'échelle, standardiser
-            if modele_type in ["Ridge", "Lasso", "SVR"]:
-                scaler = StandardScaler()
-                X_train = scaler.fit_transform(X_train)
-                X_val = scaler.transform(X_val)
-                X_test = scaler.transform(X_test)
-
-            # 1.3) Instanciation du modèle
-            if modele_type == "RandomForest":
-                model = RandomForestRegressor(n_estimators=100, random_state=42)
-            elif modele_type == "XGBoost":
-                model = XGBRegressor(
-                    n_estimators=200,
-                    learning_rate=0.1,
-                    random_state=42,
-                    objective="reg:squarederror",
-                )
-            elif modele_type == "LinearRegression":
-                model = LinearRegression()
-            elif modele_type == "DecisionTree":
-                model = DecisionTreeRegressor(random_state=42)
-            elif modele_type == "ExtraTrees":
-                model = ExtraTreesRegressor(n_estimators=100, random_state=42)
-            elif modele_type == "GradientBoost":
-                model = GradientBoostingRegressor(
-                    n_estimators=100, learning_rate=0.1, random_state=42
-                )
-            elif modele_type == "AdaBoost":
-                model = AdaBoostRegressor(
-                    n_estimators=100, learning_rate=0.1, random_state=42
-                )
-            elif modele_type == "Ridge":
-                model = Ridge(alpha=1.0)
-            elif modele_type == "Lasso":
-                model = Lasso(alpha=0.1)
-            elif modele_type == "SVR":
-                model = SVR(kernel="rbf", C=1.0, epsilon=0.1)
-            else:
-                raise ValueError(f"Impossible de gérer {modele_type} dans cette branche.")
-
-            # 1.4) Entraînement et prédictions
-            model.fit(X_train, y_train)
-            pred_train = model.predict(X_train)
-            pred_val = model.predict(X_val)
-            pred_test = model.predict(X_test)
-
-            # 1.5) Calcul des métriques pour chaque phase
-            metrics_train = compute_metrics(y_train, pred_train)
-            metrics_val = compute_metrics(y_val, pred_val)
-            metrics_test = compute_metrics(y_test, pred_test)
-
-            # 1.6) Stocker les résultats
-            for phase, m in zip(
-                ["train", "validation", "test"], [metrics_train, metrics_val, metrics_test]
-            ):
-                results.append(
-                    {
-                        "modele": modele_type,
-                        "phase": phase,
-                        "MAE": m["MAE"],
-                        "RMSE": m["RMSE"],
-                        "R2": m["R2"],
-                    }
-                )
-
-        # --- 2) Pour KNeighborsRegressor (exemple avec Pipeline) ---
-        elif modele_type == "KNN":
-            # 2.1) Découpage
-            X_train, y_train = X[:idx_train_end], y[:idx_train_end]
-            X_val, y_val = X[idx_train_end:idx_val_end], y[idx_train_end:idx_val_end]
-            X_test, y_test = X[idx_val_end:], y[idx_val_end:]
-
-            # 2.2) Pipeline : standardisation + KNN
-            pipeline_knn = Pipeline(
-                [
-                    ("scaler", StandardScaler()),
-                    ("knn", KNeighborsRegressor(n_neighbors=5)),
-                ]
-            )
-
-            # 2.3) Entraînement
-            pipeline_knn.fit(X_train, y_train)
-
-            # 2.4) Prédictions
-            pred_train = pipeline_knn.predict(X_train)
-            pred_val = pipeline_knn.predict(X_val)
-            pred_test = pipeline_knn.predict(X_test)
-
-            # 2.5) Calcul des métriques
-            metrics_train = compute_metrics(y_train, pred_train)
-            metrics_val = compute_metrics(y_val, pred_val)
-            metrics_test = compute_metrics(y_test, pred_test)
-
-            # 2.6) Stocker les résultats
-            for phase, m in zip(
-                ["train", "validation", "test"], [metrics_train, metrics_val, metrics_test]
-            ):
-                results.append(
-                    {
-                        "modele": modele_type,
-                        "phase": phase,
-                        "MAE": m["MAE"],
-                        "RMSE": m["RMSE"],
-                        "R2": m["R2"],
-                    }
-                )
+        results.extend(evaluer_un_modele(modele_type, X, y))
 
-        else:
-            raise ValueError(f"Modèle non reconnu : {modele_type}")
-
-    # Fin de la boucle sur modele_type
-    df_results = pd.DataFrame(results, columns=["modele", "phase", "MAE", "RMSE", "R2"])
+    df_results = pd.DataFrame(results, columns=COLONNES_RESULTATS)
     return df_results
 
 
+def resume_pareto(df_bench: pd.DataFrame, phase: str = "test") -> pd.DataFrame:
+    """
+    Vue de synthèse par modèle (moyennes sur les pays, phase `phase`) classée par fronts de
+    Pareto précision / latence : rang 1 = modèles qu'aucun autre ne bat à la fois en MAE
+    et en latence p50, rang 2 = non dominés une fois le rang 1 retiré, etc.
+    """
+    resume = (
+        df_bench[df_bench["phase"] == phase]
+        .groupby("modele")[["MAE", "RMSE", "R2", "fit_s", "latence_p50_ms", "latence_p99_ms", "rss_pic_mo", "taille_mo"]]
+        .mean()
+    )
+    points = resume[["MAE", "latence_p50_ms"]].to_numpy()
+    rangs = np.zeros(len(resume), dtype=int)
+    rang = 0
+    while (rangs == 0).any():
+        rang += 1
+        # le front du tour est calculé sur les points restants au début du tour
+        restants = np.flatnonzero(rangs == 0)
+        autres = points[restants]
+        for i in restants:
+            domine = ((autres <= points[i]).all(axis=1) & (autres < points[i]).any(axis=1)).any()
+            if not domine:
+                rangs[i] = rang
+    resume["rang_pareto"] = rangs
+    return resume.reset_index().sort_values(["rang_pareto", "MAE"], ignore_index=True)
+
+
+# ===================================================================
+# Balayage de tous les pays (--pays all)
+# ===================================================================
+MIN_OBSERVATIONS = 30
+
+# features par pays, transmises une fois à chaque worker du pool
+_features_balayage = {}
+
+
+def _init_balayage(features: dict):
+    _features_balayage.update(features)
+    # un cœur par worker : borne aussi les threads BLAS/OpenMP du processus
+    threadpool_limits(1)
+
+
+def _tache_balayage(modele_type: str, pays_id: int) -> list:
+    X, y = _features_balayage[pays_id]
+    lignes = evaluer_un_modele(modele_type, X, y, n_jobs=1)
+    for ligne in lignes:
+        ligne["pays_id"] = pays_id
+    return lignes
+
+
+def noms_des_pays() -> dict:
+    df_pays = pd.read_sql("SELECT id, nom FROM pays", con=get_engine())
+    return dict(zip(df_pays["id"], df_pays["nom"]))
+
+
+def balayage(pandemie_id: int, n_lags: int = 7, modele_list: list = None, workers: int = None,
+             utiliser_cache: bool = True) -> pd.DataFrame:
+    """
+    Benchmark de tous les pays d'une pandémie : une seule requête SQL, features construites
+    une fois par pays (cache disque, cf. features_pays), couples (modèle, pays) répartis sur
+    un pool de processus à un thread chacun.
+    Les pays avec moins de MIN_OBSERVATIONS lignes de features sont ignorés.
+    """
+    if modele_list is None:
+        modele_list = ["RandomForest", "XGBoost", "LinearRegression"]
+
+    debut = time.perf_counter()
+    features = {}
+    for pays_id, df_pand in charger_pandemie(pandemie_id).items():
+        X, y, _ = features_pays(pandemie_id, pays_id, n_lags=n_lags, utiliser_cache=utiliser_cache,
+                                donnees=df_pand)
+        if len(X) >= MIN_OBSERVATIONS:
+            features[pays_id] = (X, y)
+    taches = [(modele_type, pays_id) for pays_id in features for modele_type in modele_list]
+    print(
+        f"{len(features)} pays prêts en {time.perf_counter() - debut:.1f}s, "
+        f"{len(taches)} couples (modèle, pays) à évaluer"
+    )
+
+    results = []
+    debut = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_balayage, initargs=(features,)) as pool:
+        futures = {pool.submit(_tache_balayage, *tache): tache for tache in taches}
+        for k, future in enumerate(as_completed(futures), start=1):
+            modele_type, pays_id = futures[future]
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                print(f"    [ERREUR] {modele_type} / pays {pays_id} : {e}")
+            ecoule = time.perf_counter() - debut
+            eta = ecoule / k * (len(taches) - k)
+            print(f"[{k}/{len(taches)}] {modele_type} / pays {pays_id} — écoulé {ecoule:.0f}s, ETA {eta:.0f}s")
+
+    df_results = pd.DataFrame(results, columns=COLONNES_RESULTATS + ["pays_id"])
+    df_results["nom_pays"] = df_results["pays_id"].map(noms_des_pays()).fillna("<inconnu>")
+    return df_results.sort_values(["pays_id", "modele"], kind="stable", ignore_index=True)
+
+
 # ===================================================================
 # Bloc principal : exécution en ligne de commande
 # ===================================================================
@@ -319,7 +523,7 @@ if __name__ == "__main__":
         "sur données de pandémie (id_pandemie, pays_id)."
     )
     parser.add_argument("pandemie_id", type=int, help="ID de la pandémie (ex. 1, 2, ...)")
-    parser.add_argument("pays_id", type=int, help="ID du pays (ex. 33, 44, ...)")
+    parser.add_argument("pays_id", type=str, help="ID du pays (ex. 33, 44, ...) ou 'all' pour tous les pays")
     parser.add_argument(
         "--n_lags",
         "-l",
@@ -331,19 +535,7 @@ if __name__ == "__main__":
         "--modeles",
         "-m",
         nargs="+",
-        choices=[
-            "RandomForest",
-            "XGBoost",
-            "LinearRegression",
-            "DecisionTree",
-            "ExtraTrees",
-            "GradientBoost",
-            "AdaBoost",
-            "KNN",
-            "Ridge",
-            "Lasso",
-            "SVR",
-        ],
+        choices=MODELES,
         default=["RandomForest", "XGBoost", "LinearRegression"],
         help="Liste des modèles sklearn à comparer.",
     )
@@ -354,6 +546,18 @@ if __name__ == "__main__":
         default="benchmark_results.csv",
         help="Chemin du fichier CSV dans lequel append les résultats.",
     )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=None,
+        help="Processus du balayage --pays all (par défaut : nombre de cœurs).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recharge les données et recalcule les features sans le cache disque.",
+    )
 
     args = parser.parse_args()
     pid = args.pandemie_id
@@ -367,25 +571,35 @@ if __name__ == "__main__":
     print(f"    - nombre de lags   : {lags}")
     print(f"    - fichier output   : {output_csv}")
 
-    # 1) Exécuter le benchmark
-    df_bench = benchmark_models(pandemie_id=pid, pays_id=cid, n_lags=lags, modele_list=modeles)
-
-    # 2) Récupérer le nom du pays depuis la table `pays`
-    engine = get_engine()
-    query = f"SELECT nom FROM pays WHERE id = {cid}"
-    df_pays = pd.read_sql(query, con=engine)
-    if df_pays.empty:
-        nom_pays = "<inconnu>"
+    if cid == "all":
+        # 1-3) Balayage : un chargement, features par pays, pool de processus, noms inclus
+        df_bench = balayage(pid, n_lags=lags, modele_list=modeles, workers=args.workers,
+                            utiliser_cache=not args.no_cache)
     else:
-        nom_pays = df_pays["nom"].iloc[0]
+        # 1) Exécuter le benchmark
+        cid = int(cid)
+        df_bench = benchmark_models(
+            pandemie_id=pid, pays_id=cid, n_lags=lags, modele_list=modeles, utiliser_cache=not args.no_cache
+        )
+
+        # 2) Récupérer le nom du pays depuis la table `pays`
+        nom_pays = noms_des_pays().get(cid, "<inconnu>")
 
-    # 3) Ajouter les colonnes `pays_id` et `nom_pays` dans df_bench
-    df_bench["pays_id"] = cid
-    df_bench["nom_pays"] = nom_pays
+        # 3) Ajouter les colonnes `pays_id` et `nom_pays` dans df_bench
+        df_bench["pays_id"] = cid
+        df_bench["nom_pays"] = nom_pays
 
-    # 4) Enregistrer en mode append (si le fichier existe) ou write (sinon)
-    if os.path.isfile(output_csv):
-        df_bench.to_csv(output_csv, mode="a", header=False, index=False)
+    # 4) Balayage : un fichier consolidé réécrit ; sinon append (si le fichier existe) ou write
+    if cid == "all":
+        df_bench.to_csv(output_csv, mode="w", header=True, index=False)
+        print(f"Fichier consolidé écrit : {output_csv} ({len(df_bench)} lignes)")
+    elif os.path.isfile(output_csv):
+        anciens = pd.read_csv(output_csv)
+        if list(anciens.columns) == list(df_bench.columns):
+            df_bench.to_csv(output_csv, mode="a", header=False, index=False)
+        else:
+            # fichier d'une version antérieure (sans les colonnes de coût) : réécrit avec les nouvelles colonnes
+            pd.concat([anciens, df_bench], ignore_index=True).to_csv(output_csv, mode="w", header=True, index=False)
         print(f"Résultats ajoutés à la fin de {output_csv}")
     else:
         df_bench.to_csv(output_csv, mode="w", header=True, index=False)
@@ -394,3 +608,7 @@ if __name__ == "__main__":
     # 5) Afficher les résultats à l’écran
     print("\n=== Résultats du benchmark (affichage) ===")
     print(df_bench)
+
+    # 6) Classement précision / latence (phase test)
+    print("\n=== Front de Pareto MAE / latence p50 (phase test) ===")
+    print(resume_pareto(df_bench).to_string(index=False, float_format=lambda v: f"{v:.4g}"))
@@ -5,17 +5,158 @@ train/analyse_performance.py
 
 Script d'analyse de performance pour le modèle RandomForest.
 Mesure les métriques MAE, RMSE, R2 et trace les résidus ainsi que les valeurs prédites vs réelles.
+Les prédictions (log1p, comme à l'entraînement) sont ramenées à l'échelle réelle ; la cible
+évaluée est celle de l'artefact (<modele>_meta.json, nouveau_cas à défaut).
+
+Mode rapport (--rapport DOSSIER), sans affichage (backend Agg, utilisable en CI / cron) :
+- un seul model.predict sur la matrice de features de tous les pays
+- métriques par pays par agrégations groupées (MAE, RMSE, MAPE, R2)
+- metriques_pays.csv, rapport.html et figures PNG écrits dans DOSSIER
 """
+import os
 import argparse
 import joblib
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from pathlib import Path
+from sqlalchemy import text
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
-# Importer fonctions depuis training.py (adapter le chemin si nécessaire)
-from pandemie_api.training import charger_donnees, creer_features
+# Importer fonctions depuis training.py (à lancer depuis pandemie_api/)
+from training import features_pandemie, get_engine, matrices, lire_meta
+
+TOP_PAYS_FIGURE = 6
+TOP_PAYS_MAE = 20
+
+# ----------------------------------------------------------------------
+def chemin_modele(model_path: str) -> Path:
+    model_file = Path(model_path)
+    if not model_file.exists():
+        project_root = Path(__file__).parent.parent
+        candidate = project_root / model_path
+        if candidate.exists():
+            model_file = candidate
+    if not model_file.exists():
+        raise FileNotFoundError(f"Modèle non trouvé : {model_file}")
+    return model_file
+
+def charger_modele(model_path: str):
+    model_file = chemin_modele(model_path)
+    print(f"Chargement du modèle depuis : {model_file}")
+    return joblib.load(model_file)
+
+def cible_modele(model_path: str) -> str:
+    """Cible apprise par l'artefact, lue dans son _meta.json (nouveau_cas pour un artefact sans meta)."""
+    try:
+        return lire_meta(str(chemin_modele(model_path)))["cible"]
+    except FileNotFoundError:
+        return "nouveau_cas"
+
+def predire(model, df_feats: pd.DataFrame, cible: str = "nouveau_cas") -> np.ndarray:
+    """Un seul appel predict sur toutes les lignes, prédictions à l'échelle réelle."""
+    X = matrices(df_feats, cible)[0]
+    return np.clip(np.expm1(model.predict(X)), 0, None)
+
+def noms_pays() -> dict:
+    with get_engine().connect() as conn:
+        return {pid: nom for pid, nom in conn.execute(text("SELECT id, nom FROM pays"))}
+
+# ----------------------------------------------------------------------
+def metriques_par_pays(df_feats: pd.DataFrame, y_pred: np.ndarray, cible: str = "nouveau_cas") -> pd.DataFrame:
+    """MAE, RMSE, MAPE (dénominateur 1 quand le réel est nul) et R2 de chaque pays, sans boucle."""
+    reel = df_feats[cible].to_numpy(dtype=float)
+    e = pd.DataFrame({
+        "pays_id": df_feats["pays_id"].to_numpy(),
+        "reel": reel,
+        "abs_err": np.abs(y_pred - reel),
+        "sq_err": (y_pred - reel) ** 2,
+        "ape": np.abs(y_pred - reel) / np.where(reel == 0, 1, np.abs(reel)),
+    })
+    groupes = e.groupby("pays_id", observed=True)
+    e["sq_tot"] = (e["reel"] - groupes["reel"].transform("mean")) ** 2
+    res = e.groupby("pays_id", observed=True).agg(
+        n=("reel", "size"),
+        moyenne_reel=("reel", "mean"),
+        mae=("abs_err", "mean"),
+        rmse=("sq_err", "mean"),
+        mape=("ape", "mean"),
+        ss_res=("sq_err", "sum"),
+        ss_tot=("sq_tot", "sum"),
+    )
+    res["rmse"] = np.sqrt(res["rmse"])
+    res["mape"] *= 100
+    # R2 indéfini (NaN) pour un pays dont la série réelle est constante
+    res["r2"] = 1 - res["ss_res"] / res["ss_tot"].where(res["ss_tot"] > 0)
+    return res.drop(columns=["ss_res", "ss_tot"]).reset_index()
+
+# ----------------------------------------------------------------------
+def _figures(df_feats: pd.DataFrame, y_pred: np.ndarray, par_pays: pd.DataFrame, dossier: str,
+             cible: str = "nouveau_cas") -> list:
+    reel = df_feats[cible].to_numpy(dtype=float)
+    fichiers = []
+
+    fig, ax = plt.subplots(figsize=(12, 5))
+    ax.scatter(df_feats.index, y_pred - reel, s=2, alpha=0.4)
+    ax.axhline(0, color='black', linewidth=1)
+    ax.set(title='Résidus (prédiction – réel), tous pays', xlabel='Date', ylabel='Résidu')
+    fichiers.append("residus.png")
+    fig.savefig(os.path.join(dossier, fichiers[-1]), dpi=100, bbox_inches="tight")
+    plt.close(fig)
+
+    pires = par_pays.nlargest(TOP_PAYS_MAE, "mae").iloc[::-1]
+    fig, ax = plt.subplots(figsize=(8, max(3, 0.3 * len(pires))))
+    ax.barh(pires["nom"], pires["mae"])
+    ax.set(title=f'MAE par pays ({len(pires)} plus élevées)', xlabel=f'MAE ({cible})')
+    fichiers.append("mae_par_pays.png")
+    fig.savefig(os.path.join(dossier, fichiers[-1]), dpi=100, bbox_inches="tight")
+    plt.close(fig)
+
+    principaux = par_pays.nlargest(TOP_PAYS_FIGURE, "moyenne_reel")
+    fig, axes = plt.subplots(len(principaux), 1, figsize=(12, 2.5 * len(principaux)), squeeze=False)
+    for ax, ligne in zip(axes[:, 0], principaux.itertuples()):
+        masque = (df_feats["pays_id"] == ligne.pays_id).to_numpy()
+        ax.plot(df_feats.index[masque], reel[masque], label='Réel')
+        ax.plot(df_feats.index[masque], y_pred[masque], label='Prédit', alpha=0.7)
+        ax.set_title(f'{ligne.nom} — MAE {ligne.mae:.1f}')
+        ax.legend(loc='upper left')
+    fichiers.append("predit_vs_reel.png")
+    fig.tight_layout()
+    fig.savefig(os.path.join(dossier, fichiers[-1]), dpi=100)
+    plt.close(fig)
+    return fichiers
+
+def rapport_batch(model, df_feats: pd.DataFrame, dossier: str, noms: dict = None,
+                  cible: str = "nouveau_cas") -> pd.DataFrame:
+    """Évalue tous les pays d'un coup et écrit CSV, figures et rapport HTML dans `dossier`."""
+    plt.switch_backend("Agg")
+    os.makedirs(dossier, exist_ok=True)
+    y_pred = predire(model, df_feats, cible)
+    reel = df_feats[cible].to_numpy(dtype=float)
+
+    par_pays = metriques_par_pays(df_feats, y_pred, cible)
+    noms = noms or {}
+    par_pays.insert(1, "nom", par_pays["pays_id"].map(lambda p: noms.get(int(p), str(p))))
+    par_pays = par_pays.sort_values("mae", ascending=False, ignore_index=True)
+    par_pays.to_csv(os.path.join(dossier, "metriques_pays.csv"), index=False)
+
+    global_ = pd.DataFrame([{
+        "lignes": len(reel), "pays": len(par_pays),
+        "mae": mean_absolute_error(reel, y_pred),
+        "rmse": np.sqrt(mean_squared_error(reel, y_pred)),
+        "r2": r2_score(reel, y_pred),
+    }])
+    figures = _figures(df_feats, y_pred, par_pays, dossier, cible)
+
+    fmt = lambda v: f"{v:.3f}"
+    html = ["<html><head><meta charset='utf-8'><title>Analyse de performance</title></head><body>",
+            "<h1>Analyse de performance</h1>", "<h2>Global</h2>",
+            global_.to_html(index=False, float_format=fmt),
+            *[f"<p><img src='{f}'></p>" for f in figures],
+            "<h2>Par pays</h2>", par_pays.to_html(index=False, float_format=fmt), "</body></html>"]
+    with open(os.path.join(dossier, "rapport.html"), "w", encoding="utf-8") as f:
+        f.write("\n".join(html))
+    return par_pays
 
 # ----------------------------------------------------------------------
 def main():
@@ -35,6 +176,8 @@ def main():
     parser.add_argument(
         "pays_id",
         type=int,
+        nargs="?",
+        default=0,
         help="ID du pays à tester (ex. 60), ou 0 pour global"
     )
     parser.add_argument(
@@ -43,40 +186,43 @@ def main():
         default=7,
         help="Nombre de lags à utiliser (défaut : 7)"
     )
+    parser.add_argument(
+        "--rapport",
+        type=str,
+        default=None,
+        help="Dossier du rapport tous pays (CSV, HTML, PNG), sans affichage"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Recalcule les features sans passer par le cache disque"
+    )
     args = parser.parse_args()
 
-    # 1) Charger toutes les données et générer les features globales
-    df_global = charger_donnees(args.pandemie_id)
-    X_full, y_full, df_feats_full = creer_features(df_global, n_lags=args.n_lags)
+    # 1) Features globales (tous pays, colonne pays_id), depuis le cache si possible
+    df_feats_full = features_pandemie(args.pandemie_id, args.n_lags, utiliser_cache=not args.no_cache)
+    model = charger_modele(args.model_path)
+    cible = cible_modele(args.model_path)
+
+    if args.rapport:
+        par_pays = rapport_batch(model, df_feats_full, args.rapport, noms_pays(), cible)
+        print(par_pays.head(10).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+        print(f"Rapport écrit dans {os.path.join(args.rapport, 'rapport.html')}")
+        return
 
     # 2) Filtrer si nécessaire pour un pays spécifique
     if args.pays_id == 0:
-        X, y, df_feats = X_full, y_full, df_feats_full
+        df_feats = df_feats_full
     else:
-        col_pays = f"pays_{args.pays_id}"
-        if col_pays not in df_feats_full.columns:
-            raise ValueError(f"La feature '{col_pays}' n'existe pas dans les données générées.")
-        mask = df_feats_full[col_pays] == 1
-        X = X_full[mask]
-        y = y_full[mask]
-        df_feats = df_feats_full.loc[mask]
-
-    # 3) Charger le modèle
-    model_file = Path(args.model_path)
-    if not model_file.exists():
-        project_root = Path(__file__).parent.parent
-        candidate = project_root / args.model_path
-        if candidate.exists():
-            model_file = candidate
-    if not model_file.exists():
-        raise FileNotFoundError(f"Modèle non trouvé : {model_file}")
-    print(f"Chargement du modèle depuis : {model_file}")
-    model = joblib.load(model_file)
+        df_feats = df_feats_full[df_feats_full["pays_id"] == args.pays_id]
+        if df_feats.empty:
+            raise ValueError(f"Aucune donnée pour le pays {args.pays_id}.")
+    y = df_feats[cible].values
 
-    # 4) Prédictions
-    y_pred = model.predict(X)
+    # 3) Prédictions
+    y_pred = predire(model, df_feats, cible)
 
-    # 5) Calcul des métriques
+    # 4) Calcul des métriques
     mae = mean_absolute_error(y, y_pred)
     rmse = np.sqrt(mean_squared_error(y, y_pred))
     r2 = r2_score(y, y_pred)
@@ -84,10 +230,10 @@ def main():
     print(f"RMSE: {rmse:.2f}")
     print(f"R2  : {r2:.3f}")
 
-    # 6) Tracé
+    # 5) Tracé
     plt.figure(figsize=(12, 5))
 
-    # Résidus\    
+    # Résidus
     plt.subplot(1, 2, 1)
     plt.scatter(df_feats.index, y_pred - y, s=10)
     plt.axhline(0, color='black', linewidth=1)
@@ -101,7 +247,7 @@ def main():
     plt.plot(df_feats.index, y_pred, label='Prédit', alpha=0.7)
     plt.title('Prédictions vs Réelles')
     plt.xlabel('Date')
-    plt.ylabel('Nombre nouveaux cas')
+    plt.ylabel(cible)
     plt.legend()
 
     plt.tight_layout()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pandemie_api/backtest.py
+
+Backtest à origines glissantes de la prévision récursive des nouveaux cas.
+- Features de toute la pandémie construites une seule fois (cache disque, avec pays_id)
+- Pour chaque origine : modèle entraîné sur les dates <= origine, puis prévision récursive
+  (prevision.prevoir) de tous les pays sur `horizon` jours à partir de ces mêmes features
+- Origines entraînées en parallèle (joblib, --n-jobs)
+- MAE / RMSE / MAPE par pays et par horizon, calculés par agrégations groupées
+- Une table longue (modele, pays_id, horizon, n_origines, mae, rmse, mape) écrite en CSV
+
+Usage : python backtest.py 1 --origines 8 --pas 14 --horizon 14 --artefact model/RandomForest_covid-19.pkl
+"""
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from training import features_pandemie, matrices, creer_estimateur, lire_meta, MODELES
+from prevision import prevoir
+
+HORIZON = 14
+N_ORIGINES = 8
+PAS_ORIGINES = 14
+
+
+# ----------------------------------------------------------------------
+def origines_backtest(dates: pd.DatetimeIndex, n_origines: int = N_ORIGINES, pas: int = PAS_ORIGINES,
+                      horizon: int = HORIZON) -> list:
+    """Origines espacées de `pas` jours, la dernière laissant `horizon` jours observés après elle."""
+    derniere = dates.max() - pd.Timedelta(days=horizon)
+    origines = [derniere - pd.Timedelta(days=pas * i) for i in range(n_origines)]
+    return sorted(o for o in origines if o > dates.min())
+
+def backtester_origine(estimateur, df_feats: pd.DataFrame, origine: pd.Timestamp,
+                       horizon: int = HORIZON) -> pd.DataFrame:
+    """
+    Entraîne une copie de `estimateur` sur les features des dates <= origine et prévoit
+    les `horizon` jours suivants pour tous les pays. Renvoie pays_id, date_jour, horizon, predit, reel.
+    """
+    passe = df_feats[df_feats.index <= origine]
+    X, y, _ = matrices(passe)
+    modele = clone(estimateur).fit(X, y)
+
+    # les colonnes brutes des features (nouveau_cas, nouveau_mort, total_cas, pays_id)
+    # suffisent à reconstituer la fenêtre de chaque pays
+    previsions = prevoir(passe, modele, horizon)
+    futur = df_feats.loc[(df_feats.index > origine) & (df_feats.index <= origine + pd.Timedelta(days=horizon)),
+                         ['pays_id', 'nouveau_cas']]
+    reel = futur.rename_axis('date_jour').reset_index().rename(columns={'nouveau_cas': 'reel'})
+    resultat = previsions.merge(reel, on=['pays_id', 'date_jour'], how='inner')
+    resultat['horizon'] = (resultat['date_jour'] - origine).dt.days
+    resultat['origine'] = origine
+    return resultat
+
+# ----------------------------------------------------------------------
+def metriques_groupees(erreurs: pd.DataFrame, par=('pays_id', 'horizon')) -> pd.DataFrame:
+    """MAE, RMSE et MAPE (dénominateur 1 quand le réel est nul, comme training.evaluer) par groupe."""
+    e = erreurs.assign(
+        abs_err=(erreurs['predit'] - erreurs['reel']).abs(),
+        sq_err=(erreurs['predit'] - erreurs['reel']) ** 2,
+    )
+    e['ape'] = e['abs_err'] / e['reel'].where(e['reel'] != 0, 1).abs()
+    res = e.groupby(list(par), observed=True).agg(
+        n_origines=('origine', 'nunique'),
+        mae=('abs_err', 'mean'),
+        rmse=('sq_err', 'mean'),
+        mape=('ape', 'mean'),
+    ).reset_index()
+    res['rmse'] = np.sqrt(res['rmse'])
+    res['mape'] *= 100
+    return res
+
+def backtester(df_feats: pd.DataFrame, estimateur, origines: list, horizon: int = HORIZON,
+               n_jobs: int = 1) -> pd.DataFrame:
+    """Erreurs détaillées de toutes les origines (une ligne par pays, origine et horizon)."""
+    blocs = Parallel(n_jobs=n_jobs)(
+        delayed(backtester_origine)(estimateur, df_feats, origine, horizon) for origine in origines)
+    return pd.concat(blocs, ignore_index=True)
+
+# ----------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Backtest à origines glissantes par pays et horizon")
+    parser.add_argument('pandemie_id', type=int)
+    parser.add_argument('-l','--n_lags', type=int, default=7)
+    parser.add_argument('--model', choices=list(MODELES), default='rf')
+    parser.add_argument('--artefact', type=str, default=None,
+                        help="Reprend backend, n_lags et hyperparamètres de <artefact>_meta.json")
+    parser.add_argument('--origines', type=int, default=N_ORIGINES)
+    parser.add_argument('--pas', type=int, default=PAS_ORIGINES, help="Jours entre deux origines")
+    parser.add_argument('--horizon', type=int, default=HORIZON)
+    parser.add_argument('--n-jobs', type=int, default=1, help="Origines entraînées en parallèle")
+    parser.add_argument('-o','--output', type=str, default='backtest.csv')
+    parser.add_argument('--detail', type=str, default=None, help="Écrit aussi les erreurs ligne à ligne")
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    modele, n_lags = args.model, args.n_lags
+    estimateur = creer_estimateur(modele)
+    if args.artefact:
+        meta = lire_meta(args.artefact)
+        modele, n_lags = meta['modele'], meta['n_lags']
+        estimateur = creer_estimateur(modele).set_params(**meta['params'])
+
+    debut = time.perf_counter()
+    df_feats = features_pandemie(args.pandemie_id, n_lags, utiliser_cache=not args.no_cache)
+    origines = origines_backtest(df_feats.index, args.origines, args.pas, args.horizon)
+    print(f"{len(origines)} origines ({origines[0].date()} -> {origines[-1].date()}), "
+          f"horizon {args.horizon} j, {df_feats['pays_id'].nunique()} pays")
+
+    erreurs = backtester(df_feats, estimateur, origines, args.horizon, args.n_jobs)
+    table = metriques_groupees(erreurs)
+    table.insert(0, 'modele', MODELES[modele][0])
+    table.to_csv(args.output, index=False)
+    if args.detail:
+        erreurs.to_csv(args.detail, index=False)
+
+    print("\n=== Toutes origines et tous pays, par horizon ===")
+    par_horizon = metriques_groupees(erreurs, par=('horizon',))
+    print(par_horizon.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print(f"\nTable écrite dans {args.output} ({len(table)} lignes) en {time.perf_counter() - debut:.1f}s")
+
+if __name__ == '__main__':
+    main()
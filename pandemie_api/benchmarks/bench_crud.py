@@ -0,0 +1,26 @@
+import pytest
+import crud
+
+
+@pytest.mark.benchmark(group="crud")
+def test_get_suivis(benchmark, session_db):
+    resultat = benchmark(crud.get_suivis, session_db)
+    assert resultat
+
+
+@pytest.mark.benchmark(group="crud")
+def test_get_last_suivi_by_pays(benchmark, session_db):
+    resultat = benchmark(crud.get_last_suivi_by_pays, session_db)
+    assert resultat
+
+
+@pytest.mark.benchmark(group="crud")
+def test_get_last_suivi_by_continent(benchmark, session_db):
+    resultat = benchmark(crud.get_last_suivi_by_continent, session_db)
+    assert resultat
+
+
+@pytest.mark.benchmark(group="crud")
+def test_get_suivis_by_pays_code(benchmark, session_db):
+    resultat = benchmark(crud.get_suivis_by_pays_code, session_db, "AAA", "COVID-19")
+    assert resultat
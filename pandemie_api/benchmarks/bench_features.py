@@ -0,0 +1,15 @@
+import pytest
+from training import charger_donnees, creer_features
+
+
+@pytest.mark.benchmark(group="features")
+def test_charger_donnees(benchmark, base):
+    df = benchmark(charger_donnees, 1)
+    assert not df.empty
+
+
+@pytest.mark.benchmark(group="features")
+def test_creer_features(benchmark, base):
+    df = charger_donnees(1)
+    df_feats = benchmark(creer_features, df, avec_pays=True)
+    assert len(df_feats) > 0
@@ -0,0 +1,21 @@
+import pytest
+import predict
+
+
+@pytest.fixture
+def predict_synthetique(monkeypatch, modele_synthetique):
+    monkeypatch.setattr(predict, "model", modele_synthetique)
+    return predict
+
+
+@pytest.mark.benchmark(group="predict")
+@pytest.mark.parametrize("horizon", [0, 14])
+def test_predict_by_name(benchmark, predict_synthetique, horizon):
+    resultat = benchmark(predict_synthetique.predict_by_name, "COVID-19", "AAA", horizon)
+    assert len(resultat) > horizon
+
+
+@pytest.mark.benchmark(group="predict")
+def test_forecast_by_name(benchmark, predict_synthetique):
+    resultat = benchmark(predict_synthetique.forecast_by_name, "COVID-19", 14, None)
+    assert resultat
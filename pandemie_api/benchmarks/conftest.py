@@ -0,0 +1,62 @@
+"""
+Microbenchmarks des fonctions chaudes (crud, features, prédiction) à plusieurs échelles.
+
+Chaque échelle est une base SQLite remplie par generateur.py (graine fixe), générée une fois
+par session. Échelles actives : BENCH_ECHELLES (défaut "petit,moyen", "grand" en plus avant
+une release).
+
+Depuis pandemie_api/ :
+- mesurer, sans comparaison :
+    python -m pytest benchmarks
+- enregistrer une baseline locale (benchmarks/baselines/, non versionnée : les temps ne valent
+  que pour la machine qui les a mesurés) :
+    python -m pytest benchmarks --benchmark-save=reference
+- comparer à la dernière baseline de la machine (échec si un temps minimal régresse de plus de 25 %) :
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=min:25%
+"""
+import os
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sklearn.ensemble import RandomForestRegressor
+import training
+from generateur import generer
+
+# n_pays, n_jours, n_pandemies
+ECHELLES = {
+    'petit': (20, 120, 1),
+    'moyen': (60, 365, 2),
+    'grand': (200, 730, 3),
+}
+ECHELLES_ACTIVES = os.getenv("BENCH_ECHELLES", "petit,moyen").split(",")
+
+
+@pytest.fixture(scope="session", params=ECHELLES_ACTIVES)
+def base(request, tmp_path_factory):
+    """URL d'une base synthétique ; training.get_engine pointe dessus le temps de l'échelle."""
+    n_pays, n_jours, n_pandemies = ECHELLES[request.param]
+    url = f"sqlite:///{tmp_path_factory.mktemp(request.param) / 'synthetique.db'}"
+    generer(url, n_pays, n_jours, n_pandemies, graine=0)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("DATABASE_URL", url)
+        mp.delenv("DB_NAME", raising=False)
+        training.get_engine.cache_clear()
+        yield url
+    training.get_engine.cache_clear()
+
+
+@pytest.fixture(scope="session")
+def session_db(base):
+    engine = create_engine(base)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def modele_synthetique(base):
+    """Petite forêt entraînée sur la pandémie 1 de l'échelle courante."""
+    df_feats = training.creer_features(training.charger_donnees(1), avec_pays=True)
+    X, y, _ = training.matrices(df_feats)
+    return RandomForestRegressor(n_estimators=20, max_depth=12, random_state=0, n_jobs=1).fit(X, y)
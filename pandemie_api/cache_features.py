@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pandemie_api/cache_features.py
+
+Cache disque des matrices de features (training.py, analyse.py, IA/test_model.py).
+- Un fichier .npz par clé (pandémie, n_lags, version du code des features, version des données...)
+- Écriture atomique (fichier temporaire puis os.replace)
+- Éviction des fichiers les moins récemment utilisés au-delà de FEATURE_CACHE_MAX_MO
+- FEATURE_CACHE_DIR pour changer l'emplacement ; --no-cache côté scripts pour l'ignorer
+"""
+import os
+import glob
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache_features"))
+CACHE_MAX_MO = float(os.getenv("FEATURE_CACHE_MAX_MO", "2048"))
+
+
+# ----------------------------------------------------------------------
+def chemin_cache(parties: tuple) -> str:
+    cle = hashlib.sha1(repr(parties).encode()).hexdigest()[:20]
+    return os.path.join(CACHE_DIR, f"{cle}.npz")
+
+def _vers_tableaux(df: pd.DataFrame) -> dict:
+    tableaux = {f"c{i}": np.asarray(df[col]) for i, col in enumerate(df.columns)}
+    tableaux["__colonnes__"] = np.array([str(c) for c in df.columns])
+    tableaux["__index__"] = df.index.to_numpy()
+    return tableaux
+
+def _depuis_tableaux(npz) -> pd.DataFrame:
+    colonnes = npz["__colonnes__"].tolist()
+    donnees = {col: npz[f"c{i}"] for i, col in enumerate(colonnes)}
+    return pd.DataFrame(donnees, index=pd.DatetimeIndex(npz["__index__"]), columns=colonnes)
+
+# ----------------------------------------------------------------------
+def lire(parties: tuple):
+    """DataFrame en cache pour `parties`, ou None. Un accès rafraîchit la date d'utilisation."""
+    chemin = chemin_cache(parties)
+    if not os.path.exists(chemin):
+        return None
+    try:
+        with np.load(chemin, allow_pickle=False) as npz:
+            df = _depuis_tableaux(npz)
+    except (OSError, ValueError, KeyError):
+        # fichier tronqué ou d'un ancien format : on le recalculera
+        os.remove(chemin)
+        return None
+    os.utime(chemin)
+    return df
+
+def ecrire(parties: tuple, df: pd.DataFrame, max_mo: float = CACHE_MAX_MO):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.savez(f, **_vers_tableaux(df))
+    os.replace(tmp, chemin_cache(parties))
+    evincer(max_mo)
+
+def evincer(max_mo: float = CACHE_MAX_MO):
+    """Supprime les entrées les moins récemment utilisées tant que le cache dépasse max_mo."""
+    fichiers = sorted(glob.glob(os.path.join(CACHE_DIR, "*.npz")), key=os.path.getmtime)
+    total = sum(os.path.getsize(f) for f in fichiers)
+    while fichiers and total > max_mo * 1e6:
+        plus_ancien = fichiers.pop(0)
+        total -= os.path.getsize(plus_ancien)
+        os.remove(plus_ancien)
+
+# ----------------------------------------------------------------------
+def charger_ou_calculer(parties: tuple, calculer, utiliser_cache: bool = True) -> pd.DataFrame:
+    """
+    Renvoie le DataFrame (index de dates, colonnes numériques) mis en cache sous `parties`.
+    `calculer()` n'est appelé qu'en cas d'absence ou si utiliser_cache est False.
+    """
+    if utiliser_cache:
+        df = lire(parties)
+        if df is not None:
+            print(f"Features lues depuis le cache ({chemin_cache(parties)})")
+            return df
+    df = calculer()
+    if utiliser_cache:
+        ecrire(parties, df)
+    return df
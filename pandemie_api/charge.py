@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pandemie_api/charge.py
+
+Test de charge HTTP de l'API (main.py) avec un trafic de tableau de bord réaliste.
+- Mélange pondéré de /suivis/*, /predict/* et /login (MIX), pays et pandémies lus via l'API
+- --concurrence clients simultanés (httpx asynchrone) pendant --duree secondes,
+  après --echauffement secondes non comptées
+- --demarrer : lance lui-même uvicorn sur une base SQLite synthétique (generateur.py)
+  avec un utilisateur de test ; sinon --url et éventuellement --pid du serveur
+- Par endpoint : débit, latences p50/p95/p99, taux d'erreur et RSS max du serveur
+  (lu dans /proc/<pid>/status à la fin de chaque requête), écrits en JSON avec le commit courant
+- --comparer ancien.json : écarts de débit et de p95 par rapport à une exécution précédente
+
+Usage : python charge.py --demarrer --concurrence 16 --duree 30 -o charge.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+import tempfile
+import numpy as np
+import pandas as pd
+import httpx
+
+CONCURRENCE = 16
+DUREE_S = 30
+ECHAUFFEMENT_S = 3
+UTILISATEUR = ("charge", "charge-mdp")
+
+# (poids, endpoint, méthode, gabarit du chemin) ; {pays} et {maladie} tirés à chaque requête
+MIX = [
+    (25, "suivis_last_per_continent", "GET", "/suivis/last-per-continent"),
+    (15, "suivis_last_per_country", "GET", "/suivis/last-per-country"),
+    (20, "suivis_pays", "GET", "/suivis/pays/{pays}?pandemie={maladie}"),
+    (20, "predict_pays", "GET", "/predict/{maladie}/{pays}"),
+    (10, "predict_pays_horizon", "GET", "/predict/{maladie}/{pays}?horizon=14"),
+    (5, "predict_tous_pays", "GET", "/predict/{maladie}?horizon=14"),
+    (5, "login", "POST", "/login"),
+]
+
+
+# ----------------------------------------------------------------------
+def rss_mo(pid: int):
+    """RSS courante du processus pid en Mo (None si illisible)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for ligne in f:
+                if ligne.startswith("VmRSS:"):
+                    return int(ligne.split()[1]) / 1024
+    except OSError:
+        return None
+
+def resumer(mesures: pd.DataFrame, duree_s: float) -> dict:
+    """Débit, percentiles de latence, erreurs et RSS max par endpoint ; la clé '_global' agrège tout."""
+    def _stats(m: pd.DataFrame) -> dict:
+        lat = m["latence_ms"].to_numpy()
+        return {
+            "requetes": len(m),
+            "debit_rps": len(m) / duree_s,
+            "p50_ms": float(np.percentile(lat, 50)),
+            "p95_ms": float(np.percentile(lat, 95)),
+            "p99_ms": float(np.percentile(lat, 99)),
+            "erreurs": int((~m["ok"]).sum()),
+            "taux_erreur": float((~m["ok"]).mean()),
+            "rss_max_mo": float(m["rss_mo"].max()) if m["rss_mo"].notna().any() else None,
+        }
+    resume = {nom: _stats(m) for nom, m in mesures.groupby("endpoint")}
+    resume["_global"] = _stats(mesures)
+    return resume
+
+def comparer(ancien: dict, nouveau: dict) -> pd.DataFrame:
+    """Écarts relatifs (%) de débit et de p95 par endpoint entre deux rapports JSON."""
+    lignes = []
+    for nom, stats in nouveau["endpoints"].items():
+        avant = ancien["endpoints"].get(nom)
+        if avant is None:
+            continue
+        lignes.append({
+            "endpoint": nom,
+            "debit_rps": stats["debit_rps"], "debit_ecart_pct": 100 * (stats["debit_rps"] / avant["debit_rps"] - 1),
+            "p95_ms": stats["p95_ms"], "p95_ecart_pct": 100 * (stats["p95_ms"] / avant["p95_ms"] - 1),
+        })
+    return pd.DataFrame(lignes)
+
+def commit_courant() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+# ----------------------------------------------------------------------
+async def _client(client: httpx.AsyncClient, rng: random.Random, contexte: dict, debut_mesure: float,
+                  fin: float, pid, mesures: list):
+    poids = [m[0] for m in MIX]
+    while time.perf_counter() < fin:
+        _, nom, methode, gabarit = rng.choices(MIX, weights=poids)[0]
+        chemin = gabarit.format(pays=rng.choice(contexte["pays"]), maladie=rng.choice(contexte["maladies"]))
+        json_corps = {"username": contexte["utilisateur"][0], "password": contexte["utilisateur"][1]} \
+            if methode == "POST" else None
+        debut = time.perf_counter()
+        try:
+            reponse = await client.request(methode, chemin, json=json_corps)
+            ok = reponse.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        fin_requete = time.perf_counter()
+        if debut >= debut_mesure:
+            mesures.append((nom, (fin_requete - debut) * 1000, ok, rss_mo(pid) if pid else None))
+
+async def executer(url: str, concurrence: int, duree_s: float, echauffement_s: float = 0,
+                   pid: int = None, utilisateur=UTILISATEUR, graine: int = 0) -> pd.DataFrame:
+    """Lance `concurrence` clients ; renvoie une ligne par requête mesurée (endpoint, latence_ms, ok, rss_mo)."""
+    limites = httpx.Limits(max_connections=concurrence, max_keepalive_connections=concurrence)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=60) as client:
+        pays = [p["code_lettre"] for p in (await client.get("/pays/")).json()]
+        maladies = [p["nom_maladie"] for p in (await client.get("/pandemies/")).json()]
+        if not pays or not maladies:
+            raise RuntimeError(f"Aucun pays ou aucune pandémie sur {url}")
+        contexte = {"pays": pays, "maladies": maladies, "utilisateur": utilisateur}
+        debut_mesure = time.perf_counter() + echauffement_s
+        fin = debut_mesure + duree_s
+        mesures = []
+        await asyncio.gather(*[
+            _client(client, random.Random(graine + i), contexte, debut_mesure, fin, pid, mesures)
+            for i in range(concurrence)
+        ])
+    return pd.DataFrame(mesures, columns=["endpoint", "latence_ms", "ok", "rss_mo"])
+
+# ----------------------------------------------------------------------
+def demarrer_serveur(port: int, n_pays: int, n_jours: int, dossier: str) -> subprocess.Popen:
+    """
+    uvicorn main:app sur une base SQLite synthétique contenant l'utilisateur de test,
+    servant une petite forêt entraînée sur cette base (PREDICT_MODEL_PATH).
+    """
+    from sqlalchemy import create_engine
+    from passlib.hash import bcrypt
+    from sklearn.ensemble import RandomForestRegressor
+    from generateur import generer
+    import models
+    import training
+
+    url_db = f"sqlite:///{os.path.join(dossier, 'charge.db')}"
+    engine = create_engine(url_db)
+    generer(engine, n_pays, n_jours, n_pandemies=2, graine=0)
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [{"username": UTILISATEUR[0], "is_admin": False,
+                                                       "password_hash": bcrypt.hash(UTILISATEUR[1])}])
+    # ce processus (entraînement) et le serveur lisent la base synthétique, pas MySQL
+    for cle in [k for k in os.environ if k.startswith("DB_")]:
+        del os.environ[cle]
+    os.environ["DATABASE_URL"] = url_db
+    training.get_engine.cache_clear()
+    df_feats = training.creer_features(training.charger_donnees(1), avec_pays=True)
+    X, y, cols = training.matrices(df_feats)
+    foret = RandomForestRegressor(n_estimators=50, max_depth=12, random_state=0, n_jobs=-1).fit(X, y)
+    chemin_modele = training.sauvegarder_artefact(foret, cols, dossier, "RandomForest_charge")
+    env = {**os.environ, "PREDICT_MODEL_PATH": chemin_modele}
+    serveur = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    for _ in range(600):
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return serveur
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    serveur.terminate()
+    raise RuntimeError("Le serveur uvicorn n'a pas démarré")
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge HTTP de l'API avec un trafic mixte")
+    parser.add_argument('--url', type=str, default="http://127.0.0.1:8000")
+    parser.add_argument('--pid', type=int, default=None, help="PID du serveur, pour suivre sa RSS")
+    parser.add_argument('--demarrer', action='store_true',
+                        help="Lance uvicorn sur une base SQLite synthétique (ignore --url et --pid)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--pays', type=int, default=50, help="Pays de la base synthétique (--demarrer)")
+    parser.add_argument('--jours', type=int, default=365, help="Jours de la base synthétique (--demarrer)")
+    parser.add_argument('-c','--concurrence', type=int, default=CONCURRENCE)
+    parser.add_argument('-d','--duree', type=float, default=DUREE_S)
+    parser.add_argument('--echauffement', type=float, default=ECHAUFFEMENT_S)
+    parser.add_argument('--graine', type=int, default=0)
+    parser.add_argument('-o','--output', type=str, default='charge.json')
+    parser.add_argument('--comparer', type=str, default=None, help="Rapport JSON d'une exécution précédente")
+    args = parser.parse_args()
+
+    serveur = None
+    with tempfile.TemporaryDirectory() as dossier:
+        url, pid = args.url, args.pid
+        if args.demarrer:
+            serveur = demarrer_serveur(args.port, args.pays, args.jours, dossier)
+            url, pid = f"http://127.0.0.1:{args.port}", serveur.pid
+        try:
+            mesures = asyncio.run(executer(url, args.concurrence, args.duree, args.echauffement, pid,
+                                           graine=args.graine))
+        finally:
+            if serveur is not None:
+                serveur.terminate()
+                serveur.wait()
+
+    rapport = {
+        "commit": commit_courant(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parametres": {"url": url, "concurrence": args.concurrence, "duree_s": args.duree,
+                       "echauffement_s": args.echauffement, "graine": args.graine,
+                       "base_synthetique": {"pays": args.pays, "jours": args.jours} if args.demarrer else None},
+        "endpoints": resumer(mesures, args.duree),
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(rapport, f, indent=2)
+
+    table = pd.DataFrame(rapport["endpoints"]).T
+    print(table.to_string(float_format=lambda v: f"{v:.2f}"))
+    print(f"Rapport écrit dans {args.output}")
+    if args.comparer:
+        with open(args.comparer, encoding="utf-8") as f:
+            ancien = json.load(f)
+        print(f"\n=== Écarts par rapport à {args.comparer} (commit {ancien.get('commit', '?')}) ===")
+        print(comparer(ancien, rapport).to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pandemie_api/comparer_modeles.py
+
+Rapport comparatif des backends d'entraînement (RandomForest / HistGradientBoosting).
+- Mêmes features (cache disque), même split chronologique 90/10, même recherche d'hyperparamètres
+- Par backend : temps d'entraînement, taille des artefacts servis, latence d'une requête
+  unitaire (chargement comme predict.py : forêt compacte .npz si présente, sinon pickle), MAE/RMSE
+- --reference : modèle actuellement en production évalué sur le même hold-out
+
+Usage : python comparer_modeles.py 1 --search random --budget-fits 50 --reference model/RandomForest_covid-19.pkl
+"""
+import os
+import time
+import joblib
+import argparse
+import numpy as np
+import pandas as pd
+from training import (features_pandemie, entrainer, evaluer, matrices, sauvegarder_artefact,
+                      nom_pandemie, nom_artefact, MODELES, PART_TRAIN)
+from foret_compacte import ForetCompacte, chemin_compact
+
+
+# ----------------------------------------------------------------------
+def charger_servi(path_pkl: str):
+    """Modèle tel que predict.py le charge (mode auto) et fichiers correspondants."""
+    compact = chemin_compact(path_pkl)
+    if os.path.exists(compact):
+        return ForetCompacte.charger(compact), [path_pkl, compact]
+    return joblib.load(path_pkl), [path_pkl]
+
+def latences_unitaires(modele, X: np.ndarray, repetitions: int = 200) -> np.ndarray:
+    """Latences (ms) de predict sur une seule ligne, comme une requête /predict isolée."""
+    durees = []
+    for i in range(repetitions):
+        ligne = X[i % len(X)][None, :]
+        debut = time.perf_counter()
+        modele.predict(ligne)
+        durees.append(time.perf_counter() - debut)
+    return np.array(durees) * 1000
+
+def _mesures(nom: str, path_pkl: str, metriques: dict, duree_fit: float, X_test: np.ndarray,
+             repetitions: int) -> dict:
+    modele, fichiers = charger_servi(path_pkl)
+    lat = latences_unitaires(modele, X_test, repetitions)
+    return {
+        'modele': nom,
+        'entrainement_s': duree_fit,
+        'taille_mo': sum(os.path.getsize(f) for f in fichiers) / 1e6,
+        'latence_p50_ms': np.percentile(lat, 50),
+        'latence_p99_ms': np.percentile(lat, 99),
+        'mae': metriques['mae'],
+        'rmse': metriques['rmse'],
+    }
+
+# ----------------------------------------------------------------------
+def comparer(df_feats: pd.DataFrame, out: str, nom_maladie: str, cible: str = 'nouveau_cas',
+             backends=('rf', 'hgb'), reference: str = None, repetitions: int = 200, n_lags: int = 7,
+             **options) -> pd.DataFrame:
+    """
+    Entraîne chaque backend sur df_feats (options transmises à entrainer), sauvegarde ses
+    artefacts dans `out` et renvoie une ligne de mesures par backend (+ la référence éventuelle).
+    """
+    X, y, _ = matrices(df_feats, cible)
+    split_idx = int(PART_TRAIN*len(X))
+    X_test, y_test = X[split_idx:], y[split_idx:]
+
+    lignes = []
+    if reference:
+        modele_ref, _ = charger_servi(reference)
+        if modele_ref.n_features_in_ != X.shape[1]:
+            raise ValueError(f"{reference} attend {modele_ref.n_features_in_} features, "
+                             f"les données en ont {X.shape[1]} (n_lags différent ?)")
+        lignes.append(_mesures(f"référence ({os.path.basename(reference)})", reference,
+                               evaluer(modele_ref, X_test, y_test), np.nan, X_test, repetitions))
+
+    for backend in backends:
+        debut = time.perf_counter()
+        best, feature_cols, metriques = entrainer(df_feats, cible, modele=backend, **options)
+        duree_fit = time.perf_counter() - debut
+        chemin = sauvegarder_artefact(best, feature_cols, out, nom_artefact(nom_maladie, cible, backend, n_lags))
+        lignes.append(_mesures(MODELES[backend][0], chemin, metriques, duree_fit, X_test, repetitions))
+    return pd.DataFrame(lignes)
+
+# ----------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Compare les backends RandomForest et HistGradientBoosting")
+    parser.add_argument('pandemie_id', type=int)
+    parser.add_argument('-l','--n_lags', type=int, default=7)
+    parser.add_argument('-o','--out', type=str, default='model/comparaison/')
+    parser.add_argument('-c','--cible', choices=['nouveau_cas','nouveau_mort'], default='nouveau_cas')
+    parser.add_argument('--backends', nargs='+', choices=list(MODELES), default=list(MODELES))
+    parser.add_argument('--search', choices=['grid','halving','random'], default='grid')
+    parser.add_argument('--budget-fits', type=int, default=None)
+    parser.add_argument('--budget-temps', type=float, default=None)
+    parser.add_argument('--reference', type=str, default=None,
+                        help="Artefact .pkl actuellement servi, évalué sur le même hold-out")
+    parser.add_argument('--repetitions', type=int, default=200, help="Requêtes unitaires chronométrées")
+    parser.add_argument('--csv', type=str, default=None, help="Écrit aussi le rapport en CSV")
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    df_feats = features_pandemie(args.pandemie_id, args.n_lags, utiliser_cache=not args.no_cache)
+    rapport = comparer(df_feats, args.out, nom_pandemie(args.pandemie_id), args.cible, args.backends,
+                       args.reference, args.repetitions, args.n_lags, search=args.search,
+                       budget_fits=args.budget_fits, budget_s=args.budget_temps)
+    print("\n=== Comparaison des backends ===")
+    print(rapport.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    if args.csv:
+        rapport.to_csv(args.csv, index=False)
+        print(f"Rapport écrit dans {args.csv}")
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,7 @@ from fastapi import HTTPException
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 import models, schemas
+from tracing import tracer
 
 # ----- Continent -----
 def get_continents(db: Session):
@@ -80,6 +81,7 @@ def create_suivi(db: Session, suivi: schemas.SuiviPandemieCreate):
     db.refresh(db_suivi)
     return db_suivi
 
+@tracer()
 def get_last_suivi_by_pays(db: Session):
     
     pays_isos = {p.id: p.code_lettre for p in db.query(models.Pays).all()}  # <-- correction ici
@@ -108,6 +110,7 @@ def get_last_suivi_by_pays(db: Session):
         result.append(suivi_dict)
     return result
 
+@tracer()
 def get_last_suivi_by_continent(db: Session, pandemie_nom: str = None):
     # Préparer les correspondances
     pays_continents = {p.id: p.continent_id for p in db.query(models.Pays).all()}
@@ -174,6 +177,7 @@ def get_last_suivi_by_continent(db: Session, pandemie_nom: str = None):
         response.append(item)
     return response
 
+@tracer()
 def get_suivis(db: Session):
     pays_isos = {p.id: p.code_lettre for p in db.query(models.Pays).all()}
     pandemie_noms = {p.id_pandemie: p.nom_maladie for p in db.query(models.Pandemie).all()}
@@ -193,6 +197,7 @@ def get_suivis(db: Session):
     return result
 
 
+@tracer()
 def get_last_suivi_by_virus(db: Session):
     # Préparer les correspondances
     pandemie_virus = {p.id_pandemie: p.virus_id for p in db.query(models.Pandemie).all()}
@@ -242,6 +247,7 @@ def get_last_suivi_by_virus(db: Session):
         response.append(item)
     return response
 
+@tracer()
 def get_suivis_by_pays_code(db: Session, code_lettre: str, pandemie_nom: str = None):
     pays = db.query(models.Pays).filter(models.Pays.code_lettre == code_lettre).first()
     if not pays:
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pandemie_api/foret_compacte.py
+
+Représentation compacte d'une forêt sklearn (RandomForest / ExtraTrees) pour l'inférence.
+- Tous les arbres sont aplatis dans quelques tableaux NumPy (enfants, feature, seuil, valeur)
+- Sauvegarde en .npz : chargement sans unpickling de centaines d'objets Tree
+- Parcours vectorisé de tous les arbres et de toutes les lignes à la fois (un pas par niveau,
+  les couples (ligne, arbre) arrivés en feuille sortent du calcul)
+- Prédictions identiques à sklearn : X en float32, comparaison X <= seuil, moyenne des arbres
+
+Usage :
+  python foret_compacte.py exporter model/RandomForest_covid.pkl
+  python foret_compacte.py bench model/RandomForest_covid.pkl [--lignes 300]
+"""
+import os
+import time
+import joblib
+import argparse
+import tracemalloc
+import numpy as np
+
+
+# ----------------------------------------------------------------------
+def aplatir_foret(foret) -> dict:
+    """Concatène les arbres de la forêt ; les feuilles bouclent sur elles-mêmes."""
+    gauche, droite, feature, seuil, valeur, racines = [], [], [], [], [], []
+    decalage = 0
+    for arbre in foret.estimators_:
+        t = arbre.tree_
+        idx = np.arange(t.node_count)
+        feuille = t.children_left == -1
+        gauche.append(np.where(feuille, idx, t.children_left) + decalage)
+        droite.append(np.where(feuille, idx, t.children_right) + decalage)
+        feature.append(np.where(feuille, 0, t.feature))
+        seuil.append(t.threshold)
+        valeur.append(t.value[:, 0, 0])
+        racines.append(decalage)
+        decalage += t.node_count
+    return {
+        "gauche": np.concatenate(gauche).astype(np.int32),
+        "droite": np.concatenate(droite).astype(np.int32),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "seuil": np.concatenate(seuil).astype(np.float64),
+        "valeur": np.concatenate(valeur).astype(np.float64),
+        "racines": np.array(racines, dtype=np.int32),
+        "profondeur": np.int32(max(a.tree_.max_depth for a in foret.estimators_)),
+        "n_features_in": np.int32(foret.n_features_in_),
+    }
+
+# ----------------------------------------------------------------------
+def exporter_foret(foret, path: str) -> str:
+    """Écrit la forêt aplatie dans `path` (.npz) et renvoie le chemin."""
+    np.savez(path, **aplatir_foret(foret))
+    return path
+
+# ----------------------------------------------------------------------
+class ForetCompacte:
+    """Scoreur compatible model.predict / n_features_in_ à partir des tableaux aplatis."""
+
+    def __init__(self, tableaux: dict):
+        self.gauche = tableaux["gauche"]
+        self.droite = tableaux["droite"]
+        self.feature = tableaux["feature"]
+        self.seuil = tableaux["seuil"]
+        self.valeur = tableaux["valeur"]
+        self.racines = tableaux["racines"]
+        self.profondeur = int(tableaux["profondeur"])
+        self.n_features_in_ = int(tableaux["n_features_in"])
+
+    @classmethod
+    def charger(cls, path: str) -> "ForetCompacte":
+        with np.load(path) as npz:
+            return cls({k: npz[k] for k in npz.files})
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        n_lignes, n_arbres = len(X), len(self.racines)
+        valeurs_x = X.ravel()
+        # une case par (ligne, arbre) ; seules les cases pas encore en feuille avancent
+        noeuds = np.tile(self.racines, n_lignes)
+        debut_ligne = np.repeat(np.arange(n_lignes, dtype=np.int64) * X.shape[1], n_arbres)
+        actifs = np.arange(noeuds.size)
+        for _ in range(self.profondeur):
+            courant = noeuds[actifs]
+            gauche = self.gauche[courant]
+            internes = gauche != courant
+            if not internes.all():
+                actifs, courant, gauche = actifs[internes], courant[internes], gauche[internes]
+                if actifs.size == 0:
+                    break
+            va_gauche = valeurs_x[debut_ligne[actifs] + self.feature[courant]] <= self.seuil[courant]
+            noeuds[actifs] = np.where(va_gauche, gauche, self.droite[courant])
+        return self.valeur[noeuds].reshape(n_lignes, n_arbres).mean(axis=1)
+
+# ----------------------------------------------------------------------
+def chemin_compact(path_pkl: str) -> str:
+    return os.path.splitext(path_pkl)[0] + ".npz"
+
+# ----------------------------------------------------------------------
+def _mesurer_chargement(charger, path: str):
+    tracemalloc.start()
+    debut = time.perf_counter()
+    modele = charger(path)
+    duree = time.perf_counter() - debut
+    _, pic = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return modele, duree, pic
+
+def _latences(modele, X: np.ndarray, repetitions: int) -> np.ndarray:
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        modele.predict(X)
+        durees.append(time.perf_counter() - debut)
+    return np.array(durees) * 1000
+
+def benchmark(path_pkl: str, n_lignes: int = 300, repetitions: int = 20):
+    """Compare sklearn et la forêt compacte : taille, chargement, mémoire, latence, écart max."""
+    path_npz = chemin_compact(path_pkl)
+    if not os.path.exists(path_npz):
+        exporter_foret(joblib.load(path_pkl), path_npz)
+
+    sk, t_sk, mem_sk = _mesurer_chargement(joblib.load, path_pkl)
+    fc, t_fc, mem_fc = _mesurer_chargement(ForetCompacte.charger, path_npz)
+    X = np.random.default_rng(0).random((n_lignes, sk.n_features_in_)) * 100
+
+    lat_sk = _latences(sk, X, repetitions)
+    lat_fc = _latences(fc, X, repetitions)
+    ecart = np.max(np.abs(sk.predict(X) - fc.predict(X)))
+
+    print(f"{'':12}{'taille Mo':>10}{'charg. s':>10}{'pic Mo':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for nom, path, t, mem, lat in [("sklearn", path_pkl, t_sk, mem_sk, lat_sk),
+                                   ("compacte", path_npz, t_fc, mem_fc, lat_fc)]:
+        print(f"{nom:12}{os.path.getsize(path)/1e6:10.1f}{t:10.2f}{mem/1e6:10.1f}"
+              f"{np.percentile(lat, 50):10.2f}{np.percentile(lat, 99):10.2f}")
+    print(f"Écart max des prédictions sur {n_lignes} lignes : {ecart:.3e}")
+
+# ----------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Export et benchmark de la forêt compacte")
+    parser.add_argument('action', choices=['exporter', 'bench'])
+    parser.add_argument('model_path', type=str, help="Chemin du modèle sklearn (.pkl)")
+    parser.add_argument('--lignes', type=int, default=300, help="Lignes par requête pour le benchmark")
+    parser.add_argument('--repetitions', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.action == 'exporter':
+        print('Forêt compacte écrite dans', exporter_foret(joblib.load(args.model_path), chemin_compact(args.model_path)))
+    else:
+        benchmark(args.model_path, args.lignes, args.repetitions)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pandemie_api/generateur.py
+
+Jeu de données synthétique reproductible pour le schéma de models.py (SQLite ou MySQL).
+- N pays répartis sur 6 continents, K pandémies (virus, famille), M jours de suivi par pays
+- Courbes épidémiques en vagues (somme de gaussiennes), comptages tirés en Poisson,
+  morts et guérisons binomiales, totaux cumulés ; tout est déterminé par --graine
+- Insertion par lots (executemany) dans une seule transaction
+- Utilisé par les microbenchmarks (benchmarks/) et les tests de charge
+
+Usage : python generateur.py sqlite:///synthetique.db --pays 50 --jours 365 --pandemies 2 --graine 0
+"""
+import time
+import argparse
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from database import Base
+import models
+
+CONTINENTS = ["Afrique", "Amérique du Nord", "Amérique du Sud", "Asie", "Europe", "Océanie"]
+MALADIES = [
+    ("COVID-19", "SARS-CoV-2", "Coronaviridae"),
+    ("Monkeypox", "Monkeypox virus", "Poxviridae"),
+    ("Grippe A", "Influenza A", "Orthomyxoviridae"),
+]
+DEBUT = date(2020, 1, 22)
+TAILLE_LOT = 10_000
+
+
+# ----------------------------------------------------------------------
+def code_pays(i: int) -> str:
+    """Code à trois lettres unique pour i < 26**3 : 0 -> AAA, 1 -> AAB..."""
+    lettres = []
+    for _ in range(3):
+        i, r = divmod(i, 26)
+        lettres.append(chr(ord('A') + r))
+    return "".join(reversed(lettres))
+
+def vagues(rng: np.random.Generator, n_pays: int, n_jours: int, max_vagues: int = 3) -> np.ndarray:
+    """Intensité journalière (n_pays, n_jours) : 1 à max_vagues vagues gaussiennes par pays."""
+    t = np.arange(n_jours)
+    centres = rng.uniform(0, n_jours, (n_pays, max_vagues, 1))
+    largeurs = rng.uniform(0.03, 0.12, (n_pays, max_vagues, 1)) * n_jours + 3
+    amplitudes = rng.lognormal(5, 1.5, (n_pays, max_vagues, 1))
+    amplitudes *= np.arange(max_vagues)[None, :, None] < rng.integers(1, max_vagues + 1, (n_pays, 1, 1))
+    return (amplitudes * np.exp(-0.5 * ((t - centres) / largeurs) ** 2)).sum(axis=1)
+
+def suivis_synthetiques(rng: np.random.Generator, id_pandemie: int, id_logging: int, pays_ids: list,
+                        debut: date, n_jours: int) -> pd.DataFrame:
+    """Lignes de suivi_pandemie d'une pandémie, une par pays et par jour."""
+    n_pays = len(pays_ids)
+    nouveau_cas = rng.poisson(vagues(rng, n_pays, n_jours))
+    letalite = rng.uniform(0.005, 0.03, (n_pays, 1))
+    nouveau_mort = rng.binomial(nouveau_cas, letalite)
+    # guérisons : cas de la semaine précédente, hors décès
+    nouvelle_guerison = np.zeros_like(nouveau_cas)
+    nouvelle_guerison[:, 7:] = rng.binomial(nouveau_cas[:, :-7] - nouveau_mort[:, :-7], 0.95)
+    dates = [debut + timedelta(days=j) for j in range(n_jours)]
+    return pd.DataFrame({
+        'id_logging': id_logging,
+        'id_pandemie': id_pandemie,
+        'pays_id': np.repeat(pays_ids, n_jours),
+        'date_jour': dates * n_pays,
+        'total_cas': nouveau_cas.cumsum(axis=1).ravel(),
+        'total_mort': nouveau_mort.cumsum(axis=1).ravel(),
+        'guerison': nouvelle_guerison.cumsum(axis=1).ravel(),
+        'nouveau_cas': nouveau_cas.ravel(),
+        'nouveau_mort': nouveau_mort.ravel(),
+        'nouvelle_guerison': nouvelle_guerison.ravel(),
+    })
+
+def _inserer(conn, table, lignes: list, taille_lot: int = TAILLE_LOT):
+    for i in range(0, len(lignes), taille_lot):
+        conn.execute(table.insert(), lignes[i:i + taille_lot])
+
+# ----------------------------------------------------------------------
+def generer(engine, n_pays: int = 50, n_jours: int = 365, n_pandemies: int = 1, graine: int = 0,
+            recreer: bool = True) -> dict:
+    """
+    Remplit la base (URL ou Engine) ; recreer=True supprime puis recrée toutes les tables.
+    Renvoie le nombre de lignes insérées par table.
+    """
+    if not isinstance(engine, Engine):
+        engine = create_engine(engine)
+    if not 1 <= n_pandemies <= len(MALADIES):
+        raise ValueError(f"n_pandemies doit être entre 1 et {len(MALADIES)}")
+    if recreer:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    rng = np.random.default_rng(graine)
+    with engine.begin() as conn:
+        _inserer(conn, models.Continent.__table__,
+                 [{'id': i + 1, 'nom_continent': nom} for i, nom in enumerate(CONTINENTS)])
+        continents = rng.integers(1, len(CONTINENTS) + 1, n_pays)
+        pays = [{'id': i + 1, 'continent_id': int(continents[i]), 'nom': f"Pays {code_pays(i)}",
+                 'code_lettre': code_pays(i), 'code_chiffre': str(i + 1), 'code_iso3166': code_pays(i)}
+                for i in range(n_pays)]
+        _inserer(conn, models.Pays.__table__, pays)
+
+        maladies = MALADIES[:n_pandemies]
+        _inserer(conn, models.Famille.__table__,
+                 [{'id_famille': k + 1, 'nom_famille': famille} for k, (_, _, famille) in enumerate(maladies)])
+        _inserer(conn, models.Virus.__table__,
+                 [{'id': k + 1, 'id_famille': k + 1, 'nom_virus': virus, 'nom_scientifique': virus}
+                  for k, (_, virus, _) in enumerate(maladies)])
+        debuts = [DEBUT + timedelta(days=30 * k) for k in range(n_pandemies)]
+        _inserer(conn, models.Pandemie.__table__,
+                 [{'id_pandemie': k + 1, 'virus_id': k + 1, 'date_apparition': debuts[k],
+                   'nom_maladie': nom, 'description': f"Pandémie synthétique (graine {graine})"}
+                  for k, (nom, _, _) in enumerate(maladies)])
+        _inserer(conn, models.LoggingInsert.__table__,
+                 [{'id_logging': k + 1, 'date_insertion': datetime(2025, 1, 1),
+                   'description': f"generateur.py {nom}"} for k, (nom, _, _) in enumerate(maladies)])
+
+        nb_suivis = 0
+        for k in range(n_pandemies):
+            suivis = suivis_synthetiques(rng, k + 1, k + 1, [p['id'] for p in pays], debuts[k], n_jours)
+            _inserer(conn, models.SuiviPandemie.__table__, suivis.to_dict('records'))
+            nb_suivis += len(suivis)
+
+    return {'continent': len(CONTINENTS), 'pays': n_pays, 'pandemie': n_pandemies, 'suivi_pandemie': nb_suivis}
+
+# ----------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Remplit une base avec des données de suivi synthétiques")
+    parser.add_argument('url', type=str, help="URL SQLAlchemy (ex. sqlite:///synthetique.db)")
+    parser.add_argument('--pays', type=int, default=50)
+    parser.add_argument('--jours', type=int, default=365)
+    parser.add_argument('--pandemies', type=int, default=1)
+    parser.add_argument('--graine', type=int, default=0)
+    parser.add_argument('--conserver', action='store_true', help="Ne supprime pas les tables existantes")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    comptes = generer(args.url, args.pays, args.jours, args.pandemies, args.graine, recreer=not args.conserver)
+    duree = time.perf_counter() - debut
+    print(", ".join(f"{table} : {n}" for table, n in comptes.items()))
+    print(f"{comptes['suivi_pandemie']} suivis en {duree:.1f}s ({comptes['suivi_pandemie'] / duree:.0f} lignes/s)")
+
+if __name__ == '__main__':
+    main()
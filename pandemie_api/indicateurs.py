@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pandemie_api/indicateurs.py
+
+Moteur d'indicateurs épidémiologiques calculés en une passe pour tous les pays.
+- taux_transmission / taux_mortalite : mêmes définitions que les anciens endpoints
+- croissance_jour : variation jour sur jour des nouveaux cas
+- croissance_7j   : variation jour sur jour de la moyenne glissante 7 jours
+- cfr             : létalité cumulée (total_mort / total_cas, en %)
+- temps_doublement: ln(2) / ln(1 + r), r = croissance journalière moyenne de total_cas sur 7 jours
+- rt              : proxy de Rt, somme 7 jours de nouveaux cas rapportée à celle d'il y a
+                    INTERVALLE_SERIEL jours
+
+Les lignes sont d'abord ramenées à un calendrier journalier par pays (doublons (pays, date)
+agrégés, jours manquants complétés) pour que les fenêtres et décalages comptent des jours et non
+des lignes ; seuls les jours observés sont renvoyés.
+Toutes les opérations sont groupées par pays (cumsum / shift), sans boucle Python.
+Les résultats sont mis en cache par pandémie et version des données.
+"""
+import threading
+import numpy as np
+import pandas as pd
+from training import charger_donnees, version_donnees
+
+FENETRE = 7
+INTERVALLE_SERIEL = 5
+
+# pandemie_id -> (version des données, DataFrame d'indicateurs)
+_cache = {}
+_verrou_cache = threading.Lock()
+
+
+# ----------------------------------------------------------------------
+def _ratio(num: pd.Series, den: pd.Series) -> pd.Series:
+    return (num / den).replace([np.inf, -np.inf], np.nan)
+
+def calendrier_journalier(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Une ligne par pays et par jour, du premier au dernier jour observé du pays, triée par
+    (pays_id, date_jour) : nouveaux cas/morts sommés par jour (0 les jours manquants), totaux
+    au maximum du jour puis reportés ; la colonne `observe` marque les jours présents dans df.
+    """
+    d = df.reset_index()
+    d["pays_id"] = d["pays_id"].astype(np.int64)
+    g = d.groupby(["pays_id", "date_jour"], sort=True)
+    jour = pd.concat([g[["nouveau_cas", "nouveau_mort"]].sum(min_count=1),
+                      g[["total_cas", "total_mort"]].max()], axis=1).astype(float)
+
+    # toutes les dates entre la première et la dernière de chaque pays
+    bornes = jour.index.to_frame(index=False).groupby("pays_id")["date_jour"].agg(["min", "max"])
+    n_jours = ((bornes["max"] - bornes["min"]).dt.days + 1).to_numpy()
+    debuts = np.cumsum(n_jours) - n_jours
+    decalage = np.arange(n_jours.sum()) - np.repeat(debuts, n_jours)
+    dates = np.repeat(bornes["min"].to_numpy(), n_jours) + decalage * np.timedelta64(1, "D")
+    index = pd.MultiIndex.from_arrays([np.repeat(bornes.index.to_numpy(), n_jours), dates],
+                                      names=["pays_id", "date_jour"])
+
+    cal = jour.reindex(index)
+    cal["observe"] = index.isin(jour.index)
+    manquants = ~cal["observe"]
+    cal.loc[manquants, ["nouveau_cas", "nouveau_mort"]] = 0
+    cal[["total_cas", "total_mort"]] = cal[["total_cas", "total_mort"]].groupby(level="pays_id").ffill()
+    return cal.reset_index()
+
+# ----------------------------------------------------------------------
+def calculer_indicateurs(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcule les indicateurs pour tous les pays à partir du DataFrame brut de charger_donnees.
+    Renvoie un DataFrame indexé par date_jour, trié par (pays_id, date_jour), une ligne par
+    pays et par jour observé.
+    """
+    d = calendrier_journalier(df)
+    cas = d["nouveau_cas"].astype(float)
+    morts = d["nouveau_mort"].astype(float)
+    total_cas = d["total_cas"].astype(float)
+    total_mort = d["total_mort"].astype(float)
+    groupes = d["pays_id"]
+    position = d.groupby("pays_id", observed=True).cumcount()
+
+    cas_veille = cas.groupby(groupes, observed=True).shift(1)
+
+    # définitions historiques des endpoints /transmission et /mortalite
+    d["taux_transmission"] = _ratio(cas, cas_veille).fillna(0)
+    d["taux_mortalite"] = _ratio(morts, cas).fillna(0) * 100
+
+    # somme glissante 7 jours par différence de cumuls groupés
+    cumul = cas.groupby(groupes, observed=True).cumsum()
+    somme_7j = cumul - cumul.groupby(groupes, observed=True).shift(FENETRE).fillna(0)
+    somme_7j = somme_7j.where(position >= FENETRE - 1)
+    moyenne_7j = somme_7j / FENETRE
+
+    d["croissance_jour"] = _ratio(cas, cas_veille) - 1
+    d["croissance_7j"] = _ratio(moyenne_7j, moyenne_7j.groupby(groupes, observed=True).shift(1)) - 1
+    d["cfr"] = _ratio(total_mort, total_cas) * 100
+
+    r = _ratio(total_cas, total_cas.groupby(groupes, observed=True).shift(FENETRE)) ** (1 / FENETRE) - 1
+    d["temps_doublement"] = (np.log(2) / np.log1p(r)).where(r > 0)
+    d["rt"] = _ratio(somme_7j, somme_7j.groupby(groupes, observed=True).shift(INTERVALLE_SERIEL))
+
+    colonnes = ["date_jour", "pays_id", "nouveau_cas", "taux_transmission", "taux_mortalite",
+                "croissance_jour", "croissance_7j", "cfr", "temps_doublement", "rt"]
+    return d.loc[d["observe"], colonnes].set_index("date_jour")
+
+# ----------------------------------------------------------------------
+def indicateurs_pandemie(pandemie_id: int) -> pd.DataFrame:
+    """
+    Indicateurs de tous les pays d'une pandémie, recalculés seulement si les données ont changé.
+    Appelé depuis le pool de threads de FastAPI : le cache est protégé par un verrou (calcul hors
+    verrou) et chaque appelant reçoit une copie.
+    """
+    version = version_donnees(pandemie_id)
+    with _verrou_cache:
+        en_cache = _cache.get(pandemie_id)
+    if en_cache is None or en_cache[0] != version:
+        en_cache = (version, calculer_indicateurs(charger_donnees(pandemie_id)))
+        with _verrou_cache:
+            _cache[pandemie_id] = en_cache
+    return en_cache[1].copy()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pandemie_api/magasin_recherche.py
+
+Recherche d'hyperparamètres reprenable (training.py --reprise).
+- Chaque score (configuration, fold) est ajouté à un fichier JSONL dès la fin du fit
+- Les lignes portent une clé (version des données et des features, cible, backend...) :
+  seules celles de la clé courante sont relues
+- Une relance ne refait que les couples (configuration, fold) absents du fichier,
+  y compris quand la grille a été élargie entre deux exécutions
+"""
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+
+
+def _json_defaut(v):
+    return v.item() if hasattr(v, 'item') else str(v)
+
+def cle_config(params: dict) -> str:
+    return json.dumps(params, sort_keys=True, default=_json_defaut)
+
+# ----------------------------------------------------------------------
+class MagasinResultats:
+    """Scores (configuration, fold) d'une clé ; en mémoire seulement si chemin est None."""
+
+    def __init__(self, chemin: str = None, cle: str = ""):
+        self.chemin = chemin
+        self.cle = cle
+        self.scores = {}
+        self._fin_tronquee = False
+        if chemin and os.path.exists(chemin):
+            with open(chemin, encoding='utf-8') as f:
+                for ligne in f:
+                    self._fin_tronquee = not ligne.endswith('\n')
+                    try:
+                        r = json.loads(ligne)
+                    except json.JSONDecodeError:
+                        # dernière ligne tronquée par une interruption
+                        continue
+                    if r.get('cle') == cle:
+                        self.scores[(r['config'], r['fold'])] = (r['score'], r['duree_s'])
+        self.nb_repris = len(self.scores)
+
+    def score(self, params: dict, fold: int):
+        return self.scores.get((cle_config(params), fold))
+
+    def ajouter(self, params: dict, fold: int, score: float, duree_s: float):
+        config = cle_config(params)
+        self.scores[(config, fold)] = (score, duree_s)
+        if self.chemin:
+            os.makedirs(os.path.dirname(self.chemin) or '.', exist_ok=True)
+            with open(self.chemin, 'a', encoding='utf-8') as f:
+                if self._fin_tronquee:
+                    f.write('\n')
+                    self._fin_tronquee = False
+                f.write(json.dumps({'cle': self.cle, 'config': config, 'fold': fold,
+                                    'score': float(score), 'duree_s': duree_s}) + '\n')
+                f.flush()
+
+# ----------------------------------------------------------------------
+def _score_fold(estimateur, params: dict, k: int, X, y, train, test, scorer):
+    debut = time.perf_counter()
+    modele = clone(estimateur).set_params(**params).fit(X[train], y[train])
+    return params, k, scorer(modele, X[test], y[test]), time.perf_counter() - debut
+
+def evaluer_configs(estimateur, configs: list, X, y, cv, scoring: str, magasin: MagasinResultats = None,
+                    n_jobs: int = -1):
+    """
+    Score moyen de chaque configuration sur les folds de `cv`, en ne fittant que les couples
+    (configuration, fold) absents de `magasin`. Renvoie (DataFrame params/score/duree_s, nb de fits faits).
+    """
+    magasin = magasin if magasin is not None else MagasinResultats()
+    folds = list(cv.split(X))
+    scorer = get_scorer(scoring)
+    a_faire = [(params, k) for params in configs for k in range(len(folds))
+               if magasin.score(params, k) is None]
+    # dans l'ordre de fin : un fit terminé est persisté aussitôt, même si un fit soumis avant lui tourne encore
+    sortie = Parallel(n_jobs=n_jobs, return_as='generator_unordered')(
+        delayed(_score_fold)(estimateur, params, k, X, y, *folds[k], scorer) for params, k in a_faire)
+    for params, k, score, duree in sortie:
+        magasin.ajouter(params, k, score, duree)
+
+    lignes = []
+    for params in configs:
+        resultats = [magasin.score(params, k) for k in range(len(folds))]
+        lignes.append({'params': params, 'score': np.mean([r[0] for r in resultats]),
+                       'duree_s': sum(r[1] for r in resultats)})
+    return pd.DataFrame(lignes), len(a_faire)
@@ -2,8 +2,10 @@ from fastapi import FastAPI
 from database import Base, engine
 from routers import continent, pays, famille, virus, logging, pandemie, suivi, auth, user
 from fastapi.middleware.cors import CORSMiddleware
-from predict import router as predict_router
+from predict import router as predict_router, indicators_router
 from predict import model
+from profilage import middleware_profilage
+from tracing import middleware_tracing, instrumenter_sqlalchemy
 # Création des tables dans la base si elles n'existent pas
 Base.metadata.create_all(bind=engine)
 
@@ -23,6 +25,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profilage CPU d'une requête à la demande (admin) ou d'une requête sur N (voir profilage.py)
+app.middleware("http")(middleware_profilage)
+
+# Traces par requête (TRACING_ACTIF=1) : spans crud / SQL / features / modèle exportés en JSONL (voir tracing.py)
+instrumenter_sqlalchemy()
+app.middleware("http")(middleware_tracing)
+
 
 # Inclusion des routers
 app.include_router(continent.router)
@@ -33,6 +42,7 @@ app.include_router(logging.router)
 app.include_router(pandemie.router)
 app.include_router(suivi.router)
 app.include_router(predict_router)
+app.include_router(indicators_router)
 app.include_router(auth.router)
 app.include_router(user.router)
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, Text, ForeignKey, UniqueConstraint, Index, Boolean
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, ForeignKey, UniqueConstraint, Index, Boolean, Float
 from sqlalchemy.orm import relationship
 from database import Base  # ton Base SQLAlchemy
 
@@ -87,8 +87,34 @@ class SuiviPandemie(Base):
         Index('IDX_D9D63CE71408CB8A', 'id_logging'),
         Index('IDX_D9D63CE72F3440E1', 'id_pandemie'),
         Index('IDX_D9D63CE7A6E44244', 'pays_id'),
+        UniqueConstraint('id_pandemie', 'pays_id', 'date_jour', name='UQ_suivi_pandemie_jour'),
     )
 
+class PredictionPrecalculee(Base):
+    __tablename__ = 'prediction'
+    id_prediction = Column(Integer, primary_key=True, autoincrement=True)
+    id_pandemie = Column(Integer, ForeignKey('pandemie.id_pandemie'), nullable=False)
+    pays_id = Column(Integer, ForeignKey('pays.id'), nullable=False)
+    date_jour = Column(Date, nullable=False)
+    predit = Column(Float, nullable=False)
+    est_prevision = Column(Boolean, nullable=False, default=False)
+    version_modele = Column(String(255), nullable=False)
+    version_donnees = Column(String(64), nullable=False)
+
+    __table_args__ = (
+        Index('IDX_prediction_recherche', 'id_pandemie', 'pays_id', 'version_modele', 'version_donnees'),
+    )
+
+class PrecalculRun(Base):
+    __tablename__ = 'prediction_run'
+    id_run = Column(Integer, primary_key=True, autoincrement=True)
+    date_run = Column(DateTime, nullable=False)
+    id_pandemie = Column(Integer, ForeignKey('pandemie.id_pandemie'), nullable=False)
+    version_modele = Column(String(255), nullable=False)
+    version_donnees = Column(String(64), nullable=False)
+    nb_lignes = Column(Integer, nullable=False)
+    duree_s = Column(Float, nullable=False)
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, autoincrement=True)
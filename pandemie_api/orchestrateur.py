@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+orchestrateur.py
+
+Orchestrateur d'entraînements multi-pandémies / multi-cibles.
+- Jobs décrits par "pandemie_id:cible:n_lags" (ex. 1:nouveau_cas:7 1:nouveau_mort:7 2:nouveau_cas:14)
+- Features de chaque (pandémie, n_lags) calculées une seule fois (ou lues depuis le cache disque),
+  puis transmises une fois à chaque worker
+- Jobs exécutés sur un pool de processus ; les cœurs sont partagés entre les jobs
+  (workers) et le n_jobs de chaque recherche d'hyperparamètres, sans sur-souscription
+- Un artefact nommé par job (training.nom_artefact, n_lags compris) et un récapitulatif des temps ;
+  deux jobs qui écriraient le même artefact sont refusés
+
+Usage : python orchestrateur.py 1:nouveau_cas:7 1:nouveau_mort:7 --workers 2 --search halving
+"""
+import os
+import time
+import argparse
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from threadpoolctl import threadpool_limits
+from training import (features_pandemie, entrainer, nom_pandemie, nom_artefact, sauvegarder_artefact,
+                      meta_artefact)
+
+# données partagées par les jobs d'un même worker (initialisées une fois par processus)
+_donnees = {}
+
+
+# ----------------------------------------------------------------------
+def parser_job(texte: str) -> tuple:
+    """'1:nouveau_mort:14' -> (1, 'nouveau_mort', 14) ; cible et n_lags optionnels."""
+    morceaux = texte.split(':')
+    pandemie_id = int(morceaux[0])
+    cible = morceaux[1] if len(morceaux) > 1 and morceaux[1] else 'nouveau_cas'
+    n_lags = int(morceaux[2]) if len(morceaux) > 2 else 7
+    if cible not in ('nouveau_cas', 'nouveau_mort'):
+        raise argparse.ArgumentTypeError(f"Cible inconnue : {cible}")
+    return pandemie_id, cible, n_lags
+
+def repartir_coeurs(n_jobs: int, workers: int = None, coeurs: int = None) -> tuple:
+    """Renvoie (workers, n_jobs par estimateur) avec workers × n_jobs <= coeurs."""
+    coeurs = coeurs or os.cpu_count() or 1
+    workers = max(1, min(workers or coeurs, n_jobs, coeurs))
+    return workers, max(1, coeurs // workers)
+
+# ----------------------------------------------------------------------
+def _init_worker(donnees: dict, n_jobs_interne: int):
+    _donnees.update(donnees)
+    # borne aussi les threads BLAS/OpenMP du processus
+    threadpool_limits(n_jobs_interne)
+
+def executer_job(job: tuple, nom_maladie: str, out: str, n_jobs_interne: int, options: dict) -> dict:
+    pandemie_id, cible, n_lags = job
+    debut = time.perf_counter()
+    best, feature_cols, metriques = entrainer(_donnees[(pandemie_id, n_lags)], cible,
+                                              n_jobs=n_jobs_interne, **options)
+    duree_fit = time.perf_counter() - debut
+    modele = options.get('modele', 'rf')
+    meta = meta_artefact(best, pandemie_id, cible, n_lags, modele, metriques)
+    chemin = sauvegarder_artefact(best, feature_cols, out, nom_artefact(nom_maladie, cible, modele, n_lags), meta)
+    return {'pandemie_id': pandemie_id, 'cible': cible, 'n_lags': n_lags,
+            'duree_s': duree_fit, 'mae': metriques['mae'], 'artefact': chemin}
+
+# ----------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Entraîne plusieurs (pandémie, cible, n_lags) en parallèle")
+    parser.add_argument('jobs', nargs='+', type=parser_job, help="pandemie_id[:cible[:n_lags]]")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Jobs simultanés (défaut : autant que possible)")
+    parser.add_argument('-o', '--out', type=str, default='model/')
+    parser.add_argument('--search', choices=['grid','halving','random'], default='grid')
+    parser.add_argument('--model', choices=['rf','hgb'], default='rf')
+    parser.add_argument('--budget-fits', type=int, default=None)
+    parser.add_argument('--budget-temps', type=float, default=None)
+    parser.add_argument('--no-cache', action='store_true', help="Ignore le cache disque des features")
+    args = parser.parse_args()
+
+    debut_total = time.perf_counter()
+    cles = sorted({(job[0], job[2]) for job in args.jobs})
+    noms = {pandemie_id: nom_pandemie(pandemie_id) for pandemie_id, _ in cles}
+    artefacts = [nom_artefact(noms[p], cible, args.model, n_lags) for p, cible, n_lags in args.jobs]
+    en_double = sorted({a for a in artefacts if artefacts.count(a) > 1})
+    if en_double:
+        parser.error(f"Plusieurs jobs écriraient le même artefact : {', '.join(en_double)}")
+    donnees = {cle: features_pandemie(*cle, utiliser_cache=not args.no_cache) for cle in cles}
+    duree_chargement = time.perf_counter() - debut_total
+
+    workers, n_jobs_interne = repartir_coeurs(len(args.jobs), args.workers)
+    print(f"{len(args.jobs)} jobs, {len(cles)} jeu(x) de features prêt(s) en {duree_chargement:.1f}s, "
+          f"{workers} worker(s) × n_jobs={n_jobs_interne}")
+
+    options = {'search': args.search, 'budget_fits': args.budget_fits, 'budget_s': args.budget_temps,
+               'modele': args.model}
+    resultats = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(donnees, n_jobs_interne)) as pool:
+        futures = [pool.submit(executer_job, job, noms[job[0]], args.out, n_jobs_interne, options)
+                   for job in args.jobs]
+        for future in as_completed(futures):
+            res = future.result()
+            print(f"Terminé : {res['artefact']} en {res['duree_s']:.1f}s (MAE {res['mae']:.2f})")
+            resultats.append(res)
+
+    duree_totale = time.perf_counter() - debut_total
+    recap = pd.DataFrame(resultats).sort_values(['pandemie_id', 'cible'])
+    print("\n=== Récapitulatif ===")
+    print(recap.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print(f"Chargement : {duree_chargement:.1f}s | somme des jobs : {recap['duree_s'].sum():.1f}s | "
+          f"temps total : {duree_totale:.1f}s")
+
+if __name__ == '__main__':
+    main()
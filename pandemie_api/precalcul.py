@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+precalcul.py
+
+Job batch (ex. nocturne) de précalcul des prédictions servies par /predict.
+- Pour chaque pandémie : prédictions in-sample de tous les pays en un seul model.predict
+- Prévision récursive sur un horizon fixe (prevision.prevoir)
+- Écriture dans la table `prediction`, étiquetée version du modèle / version des données
+- Trace de chaque exécution (durée, lignes/s) dans la table `prediction_run`
+
+Usage : python precalcul.py [pandemie_id ...] [--horizon 30] [--model model/RandomForest_covid-19.pkl]
+"""
+import os
+import time
+import joblib
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from sqlalchemy import text
+from database import Base
+import models
+from training import charger_donnees, creer_features, get_engine, version_donnees, COLONNES_CIBLES, artefact_defaut
+from prevision import prevoir
+
+HORIZON_PRECALCUL = 30
+
+
+# ----------------------------------------------------------------------
+def version_modele(path: str) -> str:
+    """Identifiant du modèle servi : nom du fichier, date de modification et taille."""
+    st = os.stat(path)
+    return f"{os.path.basename(path)}:{int(st.st_mtime)}:{st.st_size}"
+
+# ----------------------------------------------------------------------
+def predictions_pandemie(df: pd.DataFrame, model, horizon: int = HORIZON_PRECALCUL) -> pd.DataFrame:
+    """
+    Prédictions journalières (nouveaux cas) de tous les pays d'une pandémie :
+    in-sample sur les dates connues puis `horizon` jours de prévision récursive.
+    Renvoie pays_id, date_jour, predit, est_prevision.
+    """
+    feats = creer_features(df, avec_pays=True)
+    X = feats.drop(columns=COLONNES_CIBLES + ['pays_id']).values
+    in_sample = pd.DataFrame({
+        'pays_id': feats['pays_id'].to_numpy(),
+        'date_jour': feats.index,
+        'predit': np.clip(np.expm1(model.predict(X)), 0, None),
+        'est_prevision': False,
+    })
+    futur = prevoir(df, model, horizon)
+    futur['est_prevision'] = True
+    return pd.concat([in_sample, futur], ignore_index=True)
+
+# ----------------------------------------------------------------------
+def ecrire_predictions(engine, pandemie_id: int, predictions: pd.DataFrame,
+                       v_modele: str, v_donnees: str, debut: float) -> float:
+    """
+    Remplace les prédictions de la pandémie et trace l'exécution, dans une seule transaction.
+    Renvoie la durée totale (calcul + écriture) depuis `debut` (time.perf_counter).
+    """
+    lignes = predictions.assign(
+        id_pandemie=pandemie_id,
+        date_jour=predictions['date_jour'].dt.date,
+        version_modele=v_modele,
+        version_donnees=v_donnees,
+    )
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM prediction WHERE id_pandemie = :id"), {"id": pandemie_id})
+        lignes.to_sql('prediction', con=conn, if_exists='append', index=False, chunksize=10000)
+        duree_s = time.perf_counter() - debut
+        conn.execute(
+            models.PrecalculRun.__table__.insert().values(
+                date_run=datetime.now(), id_pandemie=pandemie_id,
+                version_modele=v_modele, version_donnees=v_donnees,
+                nb_lignes=len(lignes), duree_s=duree_s,
+            )
+        )
+    return duree_s
+
+# ----------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Précalcul des prédictions servies par /predict")
+    parser.add_argument('pandemie_ids', type=int, nargs='*', help="IDs des pandémies (défaut : toutes)")
+    parser.add_argument('--horizon', type=int, default=HORIZON_PRECALCUL)
+    parser.add_argument('--model', type=str,
+                        default=artefact_defaut(os.path.join(os.path.dirname(__file__), 'model')))
+    args = parser.parse_args()
+
+    engine = get_engine()
+    Base.metadata.create_all(bind=engine, tables=[models.PredictionPrecalculee.__table__,
+                                                  models.PrecalculRun.__table__])
+    model = joblib.load(args.model)
+    v_modele = version_modele(args.model)
+
+    pandemie_ids = args.pandemie_ids or pd.read_sql(
+        "SELECT id_pandemie FROM pandemie", con=engine)["id_pandemie"].tolist()
+
+    for pandemie_id in pandemie_ids:
+        debut = time.perf_counter()
+        v_donnees = version_donnees(pandemie_id, engine)
+        try:
+            df = charger_donnees(pandemie_id)
+        except ValueError as e:
+            print(e)
+            continue
+        predictions = predictions_pandemie(df, model, args.horizon)
+        duree = ecrire_predictions(engine, pandemie_id, predictions, v_modele, v_donnees, debut)
+        print(f"Pandémie {pandemie_id} : {len(predictions)} lignes en {duree:.1f}s "
+              f"({len(predictions)/duree:.0f} lignes/s)")
+
+if __name__ == '__main__':
+    main()
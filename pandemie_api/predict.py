@@ -3,26 +3,63 @@
 """
 pandemie_api/predict.py
 
-Module FastAPI pour l'inférence du modèle RandomForest par pays.
+Module FastAPI pour l'inférence du modèle (RandomForest ou HistGradientBoosting) par pays.
+Le modèle servi est PREDICT_MODEL_PATH (défaut : model/RandomForest_covid-19.pkl, le nom écrit par
+training.py, ou l'ancien model/RandomForest_covid.pkl s'il est seul présent) ; il est rechargé
+à chaud quand le fichier est remplacé (training.py --refresh), vérifié au plus toutes les
+PREDICT_RECHARGEMENT_S secondes.
 Expose l'endpoint "/predict/{maladie}/{pays}" qui retourne, pour chaque date,
 la prédiction des nouveaux cas (après délog1p).  
+Avec ?horizon=N, la série est prolongée de N jours par prévision récursive.
+L'endpoint "/predict/{maladie}" prévoit N jours pour plusieurs pays à la fois.
+Les routes lisent d'abord la table `prediction` remplie par precalcul.py et ne font
+l'inférence live qu'en l'absence de prédictions pour la version courante du modèle et des données.
+Le scoreur est choisi par PREDICT_BACKEND : "compact" (forêt aplatie .npz),
+"sklearn" (pickle) ou "auto" (compact si le .npz existe à côté du .pkl, pickle sinon,
+par exemple pour un HistGradientBoosting).
+Les appels model.predict concurrents sont regroupés par DispatcheurInference (micro-batching).
+Avec PREDICT_SHARDS_DIR (dossier produit par shards.py), les pays ayant un shard pour la pandémie
+demandée sont servis par leur modèle, gardé dans un LRU borné à PREDICT_SHARDS_MAX_MO ; les autres
+pays et les autres pandémies par le modèle global.
+L'endpoint "/indicators/{maladie}" expose les indicateurs épidémiologiques (voir indicateurs.py).
 Schema de sortie : date (YYYY-MM-DD) et predit (float)
 """
 import os
+import time
 import joblib
+import threading
 import numpy as np
 import pandas as pd
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from typing import List
-from training import charger_donnees, creer_features, get_engine
+from typing import List, Optional
+from datetime import date
+from collections import deque
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from training import charger_donnees, creer_features, get_engine, version_donnees, artefact_defaut
+from prevision import prevoir, n_lags_du_modele
+from precalcul import version_modele
+from indicateurs import indicateurs_pandemie
+from foret_compacte import ForetCompacte, chemin_compact
+from shards import CacheShards
+from tracing import span, tracer
 
 # Router FastAPI
 router = APIRouter(prefix="/predict", tags=["predict"])
+indicators_router = APIRouter(prefix="/indicators", tags=["indicators"])
 
 # Paths
 BASE_DIR = os.path.dirname(__file__)
-MODEL_PATH = os.path.join(BASE_DIR, "model", "RandomForest_covid.pkl")
+MODEL_PATH = os.getenv("PREDICT_MODEL_PATH") or artefact_defaut(os.path.join(BASE_DIR, "model"))
+HORIZON_MAX = 90
+# Micro-batching : fenêtre de regroupement (0 = désactivé) et taille max d'un lot
+BATCH_FENETRE_MS = float(os.getenv("PREDICT_BATCH_FENETRE_MS", "5"))
+BATCH_MAX_LIGNES = int(os.getenv("PREDICT_BATCH_MAX_LIGNES", "50000"))
+BACKEND = os.getenv("PREDICT_BACKEND", "auto")
+RECHARGEMENT_S = float(os.getenv("PREDICT_RECHARGEMENT_S", "5"))
+SHARDS_DIR = os.getenv("PREDICT_SHARDS_DIR", "")
+SHARDS_MAX_MO = float(os.getenv("PREDICT_SHARDS_MAX_MO", "256"))
 
 
 # Vérification
@@ -31,12 +68,167 @@ if not os.path.exists(MODEL_PATH):
 
 
 # Chargement du modèle et des noms de features
+def charger_modele(path: str):
+    """Forêt compacte si disponible (ou imposée par PREDICT_BACKEND), sinon pickle sklearn."""
+    compact = chemin_compact(path)
+    if BACKEND == "compact" or (BACKEND == "auto" and os.path.exists(compact)):
+        return ForetCompacte.charger(compact)
+    return joblib.load(path)
+
 model = None
 if os.path.exists(MODEL_PATH):
     try:
-        model = joblib.load(MODEL_PATH)
+        model = charger_modele(MODEL_PATH)
     except Exception as e:
         print(f"[WARNING] Erreur lors du chargement du modèle : {e}")
+MODEL_VERSION = version_modele(MODEL_PATH)
+
+# Rechargement à chaud : mtime de l'artefact chargé et date de la dernière vérification
+_rechargement = {"mtime": os.stat(MODEL_PATH).st_mtime, "verifie": time.monotonic()}
+_verrou_rechargement = threading.Lock()
+
+def recharger_si_modifie():
+    """Recharge le modèle si MODEL_PATH a été substitué depuis le dernier chargement."""
+    global model, MODEL_VERSION
+    if time.monotonic() - _rechargement["verifie"] < RECHARGEMENT_S:
+        return
+    with _verrou_rechargement:
+        _rechargement["verifie"] = time.monotonic()
+        try:
+            mtime = os.stat(MODEL_PATH).st_mtime
+        except OSError:
+            return
+        if mtime == _rechargement["mtime"]:
+            return
+        try:
+            nouveau = charger_modele(MODEL_PATH)
+        except Exception as e:
+            # on garde le modèle courant, nouvel essai à la prochaine vérification
+            print(f"[WARNING] Rechargement du modèle impossible : {e}")
+            return
+        model, MODEL_VERSION = nouveau, version_modele(MODEL_PATH)
+        _rechargement["mtime"] = mtime
+
+
+# Regroupement des inférences concurrentes
+class _Demande:
+    def __init__(self, X: np.ndarray):
+        self.X = X
+        self.arrivee = time.perf_counter()
+        self.evenement = threading.Event()
+        self.resultat = None
+        self.erreur = None
+
+class DispatcheurInference:
+    """
+    Collecte les demandes d'inférence arrivées dans une fenêtre de `fenetre_ms`
+    (ou jusqu'à `max_lignes` lignes), concatène leurs matrices de features,
+    fait un seul appel `predire` et redistribue les résultats aux appelants en attente.
+    S'utilise comme un modèle : dispatcheur.predict(X).
+    """
+    def __init__(self, predire, fenetre_ms: float = BATCH_FENETRE_MS, max_lignes: int = BATCH_MAX_LIGNES):
+        self._predire = predire
+        self.fenetre = fenetre_ms / 1000
+        self.max_lignes = max_lignes
+        self._cond = threading.Condition()
+        self._file = []
+        self._lignes_en_file = 0
+        self._thread = None
+        self._tailles = deque(maxlen=1000)
+        self._attentes = deque(maxlen=1000)
+        self.nb_lots = 0
+        self.nb_demandes = 0
+
+    @property
+    def n_features_in_(self):
+        return getattr(model, "n_features_in_", None)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.fenetre <= 0:
+            return self._predire(X)
+        demande = _Demande(X)
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._boucle, name="dispatcheur-inference", daemon=True)
+                self._thread.start()
+            self._file.append(demande)
+            self._lignes_en_file += len(X)
+            self._cond.notify()
+        demande.evenement.wait()
+        if demande.erreur is not None:
+            raise demande.erreur
+        return demande.resultat
+
+    def _boucle(self):
+        while True:
+            with self._cond:
+                while not self._file:
+                    self._cond.wait()
+                echeance = self._file[0].arrivee + self.fenetre
+                while self._lignes_en_file < self.max_lignes:
+                    reste = echeance - time.perf_counter()
+                    if reste <= 0:
+                        break
+                    self._cond.wait(reste)
+                lot, self._file, self._lignes_en_file = self._file, [], 0
+            self._traiter(lot)
+
+    def _traiter(self, lot: list):
+        debut = time.perf_counter()
+        try:
+            y = self._predire(np.vstack([d.X for d in lot]))
+            bornes = np.cumsum([len(d.X) for d in lot])[:-1]
+            for d, morceau in zip(lot, np.split(y, bornes)):
+                d.resultat = morceau
+        except Exception as e:
+            for d in lot:
+                d.erreur = e
+        taille = (len(lot), sum(len(d.X) for d in lot))
+        with self._cond:
+            self.nb_lots += 1
+            self.nb_demandes += len(lot)
+            self._tailles.append(taille)
+            self._attentes.extend(debut - d.arrivee for d in lot)
+        for d in lot:
+            d.evenement.set()
+
+    def metriques(self) -> dict:
+        # copies sous le verrou (le thread du dispatcheur ajoute aux deques), percentiles hors verrou
+        with self._cond:
+            tailles, attentes = list(self._tailles), list(self._attentes)
+            nb_lots, nb_demandes = self.nb_lots, self.nb_demandes
+        tailles = np.array(tailles or [(0, 0)], dtype=float)
+        attentes = np.array(attentes or [0.0]) * 1000
+        return {
+            "fenetre_ms": self.fenetre * 1000,
+            "max_lignes": self.max_lignes,
+            "nb_lots": nb_lots,
+            "nb_demandes": nb_demandes,
+            "demandes_par_lot_moy": float(tailles[:, 0].mean()),
+            "demandes_par_lot_max": int(tailles[:, 0].max()),
+            "lignes_par_lot_moy": float(tailles[:, 1].mean()),
+            "attente_file_ms_p50": float(np.percentile(attentes, 50)),
+            "attente_file_ms_p99": float(np.percentile(attentes, 99)),
+        }
+
+# le modèle est lu à chaque lot : un rechargement est pris en compte sans recréer le dispatcheur
+dispatcheur = DispatcheurInference(lambda X: model.predict(X))
+
+# Modèles par pays / continent (shards.py), chargés à la demande
+shards = CacheShards(SHARDS_DIR, charger_modele, SHARDS_MAX_MO)
+
+@tracer()
+def prevoir_par_modele(df_raw: pd.DataFrame, horizon: int, pandemie_id: int) -> pd.DataFrame:
+    """prevoir() avec le shard de chaque pays ; les pays sans shard avancent ensemble via le dispatcheur."""
+    pays = df_raw["pays_id"].astype(int)
+    fichiers = pays.map(shards.fichiers(pandemie_id))
+    blocs = []
+    if fichiers.isna().any():
+        blocs.append(prevoir(df_raw[fichiers.isna().to_numpy()], dispatcheur, horizon))
+    for _, ids in pays[fichiers.notna()].groupby(fichiers[fichiers.notna()]):
+        modele_shard = shards.modele_pour(pandemie_id, ids.iloc[0])
+        blocs.append(prevoir(df_raw[pays.isin(ids.unique()).to_numpy()], modele_shard, horizon))
+    return pd.concat(blocs, ignore_index=True).sort_values(["pays_id", "date_jour"], ignore_index=True)
 
 
 # Schéma de sortie
@@ -44,11 +236,25 @@ class Prediction(BaseModel):
     date: str
     predit: float
 
+class PrevisionPays(BaseModel):
+    pays: str
+    date: str
+    predit: float
+
+class PrecalculStatut(BaseModel):
+    id_pandemie: int
+    date_run: str
+    version_modele: str
+    version_donnees: str
+    nb_lignes: int
+    duree_s: float
+    lignes_par_s: float
+
 # Helpers pour récupérer les IDs
 def get_pandemie_id(nom_maladie: str) -> int:
     df = pd.read_sql(
-        "SELECT id_pandemie FROM pandemie WHERE nom_maladie = %s",
-        con=get_engine(), params=(nom_maladie,)
+        text("SELECT id_pandemie FROM pandemie WHERE nom_maladie = :nom"),
+        con=get_engine(), params={"nom": nom_maladie}
     )
     if df.empty:
         raise HTTPException(status_code=404, detail=f"Pandémie '{nom_maladie}' inconnue")
@@ -56,20 +262,128 @@ def get_pandemie_id(nom_maladie: str) -> int:
 
 def get_pays_id(code_lettre: str) -> int:
     df = pd.read_sql(
-        "SELECT id FROM pays WHERE code_lettre = %s",
-        con=get_engine(), params=(code_lettre.upper(),)
+        text("SELECT id FROM pays WHERE code_lettre = :code"),
+        con=get_engine(), params={"code": code_lettre.upper()}
     )
     if df.empty:
         raise HTTPException(status_code=404, detail=f"Pays '{code_lettre}' inconnu")
     return int(df.iloc[0]["id"])
 
+def get_codes_pays() -> dict:
+    df = pd.read_sql("SELECT id, code_lettre FROM pays", con=get_engine())
+    return dict(zip(df["id"], df["code_lettre"]))
+
+# Lecture des prédictions précalculées (precalcul.py)
+@tracer()
+def lire_precalcul(pandemi_id: int, pays_ids: Optional[List[int]] = None) -> pd.DataFrame:
+    """Prédictions précalculées pour la version courante du modèle et des données (vide si absentes)."""
+    requete = ("SELECT pays_id, date_jour, predit, est_prevision FROM prediction "
+               "WHERE id_pandemie = :pandemie AND version_modele = :vm AND version_donnees = :vd")
+    params = {"pandemie": pandemi_id, "vm": MODEL_VERSION, "vd": version_donnees(pandemi_id)}
+    if pays_ids:
+        requete += " AND pays_id IN (" + ", ".join(f":p{i}" for i in range(len(pays_ids))) + ")"
+        params.update({f"p{i}": pid for i, pid in enumerate(pays_ids)})
+    try:
+        df = pd.read_sql(text(requete + " ORDER BY pays_id, date_jour"), con=get_engine(), params=params)
+    except SQLAlchemyError:
+        # table absente : le précalcul n'a jamais tourné
+        return pd.DataFrame(columns=["pays_id", "date_jour", "predit", "est_prevision"])
+    df["date_jour"] = pd.to_datetime(df["date_jour"])
+    df["est_prevision"] = df["est_prevision"].astype(bool)
+    return df
+
+def cumuler(dates: List[str], predictions) -> List[Prediction]:
+    """Cumule les prédictions journalières de nouveaux cas."""
+    results = []
+    running_total = 0.0
+    for d, pred in zip(dates, predictions):
+        running_total += pred
+        results.append(Prediction(date=d, predit=float(running_total)))
+    return results
+
+@router.get("/precalcul", response_model=List[PrecalculStatut])
+def statut_precalcul():
+    """Dernière exécution du précalcul par pandémie : durée et débit en lignes/s."""
+    try:
+        runs = pd.read_sql("SELECT * FROM prediction_run ORDER BY date_run DESC", con=get_engine())
+    except SQLAlchemyError:
+        return []
+    runs = runs.drop_duplicates("id_pandemie")
+    return [
+        PrecalculStatut(
+            id_pandemie=int(r.id_pandemie), date_run=str(r.date_run),
+            version_modele=r.version_modele, version_donnees=r.version_donnees,
+            nb_lignes=int(r.nb_lignes), duree_s=float(r.duree_s),
+            lignes_par_s=float(r.nb_lignes / r.duree_s) if r.duree_s else 0.0,
+        )
+        for r in runs.itertuples()
+    ]
+
+@router.get("/metrics", summary="Métriques du micro-batching d'inférence et du cache de shards")
+def metriques_inference():
+    return {**dispatcheur.metriques(), "shards": shards.metriques()}
+
+@router.get("/{maladie}", response_model=List[PrevisionPays])
+def forecast_by_name(
+    maladie: str,
+    horizon: int = Query(14, ge=1, le=HORIZON_MAX),
+    pays: Optional[str] = Query(None, description="Codes pays séparés par des virgules (défaut : tous)")
+):
+    """Prévision récursive des nouveaux cas sur `horizon` jours, tous les pays avancés ensemble."""
+    recharger_si_modifie()
+    pandemi_id = get_pandemie_id(maladie)
+    pays_ids = [get_pays_id(code) for code in pays.split(",") if code.strip()] if pays else None
+
+    # Prévisions précalculées (modèle global) si elles couvrent l'horizon demandé pour tous les pays
+    # et qu'aucun d'eux n'est servi par un shard
+    avec_shard = bool(shards.fichiers(pandemi_id)) and (
+        pays_ids is None or any(shards.a_shard(pandemi_id, p) for p in pays_ids))
+    pre = lire_precalcul(pandemi_id, pays_ids) if not avec_shard else pd.DataFrame(
+        columns=["pays_id", "date_jour", "predit", "est_prevision"])
+    futur = pre[pre["est_prevision"]]
+    nb_par_pays = futur.groupby("pays_id").size()
+    couvert = not futur.empty and (nb_par_pays >= horizon).all() and (
+        pays_ids is None or set(pays_ids) <= set(nb_par_pays.index))
+
+    if couvert:
+        previsions = futur.groupby("pays_id").head(horizon)
+    else:
+        try:
+            df_raw = charger_donnees(pandemi_id)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        if pays_ids:
+            df_raw = df_raw[df_raw["pays_id"].isin(pays_ids)]
+            if df_raw.empty:
+                raise HTTPException(status_code=404, detail=f"Aucun enregistrement pour pays '{pays}'")
+        previsions = prevoir_par_modele(df_raw, horizon, pandemi_id)
+
+    codes = get_codes_pays()
+    with span("reponse.construction", lignes=len(previsions)):
+        return [
+            PrevisionPays(pays=codes.get(pid, "UNK"), date=d.strftime('%Y-%m-%d'), predit=float(p))
+            for pid, d, p in zip(previsions["pays_id"], previsions["date_jour"], previsions["predit"])
+        ]
+
 @router.get("/{maladie}/{pays}", response_model=List[Prediction])
-def predict_by_name(maladie: str, pays: str):
+def predict_by_name(maladie: str, pays: str, horizon: int = Query(0, ge=0, le=HORIZON_MAX)):
+    recharger_si_modifie()
     # 1. Traduction des noms en IDs
     pandemi_id = get_pandemie_id(maladie)
     pays_id    = get_pays_id(pays)
 
-    # 2. Chargement des données brutes
+    # Shard du pays s'il existe, sinon modèle global (micro-batché)
+    modele_shard = shards.modele_pour(pandemi_id, pays_id)
+    scoreur = dispatcheur if modele_shard is None else modele_shard
+
+    # 2. Prédictions précalculées (modèle global) si elles couvrent l'horizon demandé
+    pre = lire_precalcul(pandemi_id, [pays_id]) if modele_shard is None else pd.DataFrame()
+    futur = pre[pre["est_prevision"]] if not pre.empty else pre
+    if not pre.empty and len(futur) >= horizon:
+        journalier = pd.concat([pre[~pre["est_prevision"]], futur.iloc[:horizon]])
+        return cumuler(journalier["date_jour"].dt.strftime('%Y-%m-%d').tolist(), journalier["predit"])
+
+    # 2bis. Sinon, chargement des données brutes pour l'inférence live
     try:
         df_raw = charger_donnees(pandemi_id)
     except ValueError as e:
@@ -84,8 +398,9 @@ def predict_by_name(maladie: str, pays: str):
     if df.empty:
         raise HTTPException(status_code=404, detail=f"Aucun enregistrement pour pays '{pays}'")
 
-    # 4. Génération des features
-    df_feats = creer_features(df)
+    # 4. Génération des features (autant de lags que le modèle servi en attend)
+    n_lags = n_lags_du_modele(scoreur)
+    df_feats = creer_features(df, n_lags=n_lags)
 
     # 5. Préparation de X uniquement avec les features du pays
     feature_cols = [c for c in df_feats.columns if c not in ('nouveau_cas','nouveau_mort','total_cas')]
@@ -93,77 +408,98 @@ def predict_by_name(maladie: str, pays: str):
     X = X_df.values
 
     # 6. Prédiction (sur échelle log1p)
-    y_pred_log = model.predict(X)
+    with span("model.predict", lignes=len(X), shard=modele_shard is not None):
+        y_pred_log = scoreur.predict(X)
     # inversion log1p + clamp
     y_pred = np.clip(np.expm1(y_pred_log), 0, None)
 
-    # 7. Construction de la réponse en cumulant les prédictions de nouveaux cas
+    # 7. Prolongation par prévision récursive depuis la dernière fenêtre observée
     dates = X_df.index.strftime('%Y-%m-%d').tolist()
-    results = []
-    running_total = 0.0
-    for i, pred in enumerate(y_pred):
-        if i == 0:
-            running_total = pred
-        else:
-            running_total += pred
-        results.append(Prediction(date=dates[i], predit=float(running_total)))
+    if horizon > 0:
+        with span("prevision.prevoir", horizon=horizon):
+            previsions = prevoir(df, scoreur, horizon, n_lags)
+        dates += previsions["date_jour"].dt.strftime('%Y-%m-%d').tolist()
+        y_pred = np.concatenate([y_pred, previsions["predit"].to_numpy()])
 
-    return results
+    # 8. Construction de la réponse en cumulant les prédictions de nouveaux cas
+    with span("reponse.construction", lignes=len(dates)):
+        return cumuler(dates, y_pred)
 
 class TauxResult(BaseModel):
     date: str
     taux: float
 
-@router.get("/transmission/{maladie}/{pays}", response_model=List[TauxResult])
-def taux_transmission(maladie: str, pays: str):
+class IndicateurResult(BaseModel):
+    pays: str
+    date: str
+    nouveau_cas: Optional[float] = None
+    taux_transmission: float
+    taux_mortalite: float
+    croissance_jour: Optional[float] = None
+    croissance_7j: Optional[float] = None
+    cfr: Optional[float] = None
+    temps_doublement: Optional[float] = None
+    rt: Optional[float] = None
+
+def indicateurs_par_nom(maladie: str) -> pd.DataFrame:
     pandemi_id = get_pandemie_id(maladie)
-    pays_id    = get_pays_id(pays)
     try:
-        df_raw = charger_donnees(pandemi_id)
+        return indicateurs_pandemie(pandemi_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
-    df = (
-        df_raw.reset_index()
-              .query("pays_id == @pays_id")
-              .set_index("date_jour")
-    )
+def indicateurs_pays(maladie: str, pays: str) -> pd.DataFrame:
+    df_ind = indicateurs_par_nom(maladie)
+    pays_id = get_pays_id(pays)
+    df = df_ind[df_ind["pays_id"] == pays_id]
     if df.empty:
         raise HTTPException(status_code=404, detail=f"Aucun enregistrement pour pays '{pays}'")
+    return df
 
-    # Calcul du taux de transmission : nouveaux cas / nouveaux cas de la veille
-    taux_transmission = (df['nouveau_cas'] / df['nouveau_cas'].shift(1)).replace([np.inf, -np.inf], np.nan).fillna(0)
-
-    dates = taux_transmission.index.strftime('%Y-%m-%d').tolist()
-    results = [
+@router.get("/transmission/{maladie}/{pays}", response_model=List[TauxResult])
+def taux_transmission(maladie: str, pays: str):
+    # Taux de transmission : nouveaux cas / nouveaux cas de la veille
+    df = indicateurs_pays(maladie, pays)
+    dates = df.index.strftime('%Y-%m-%d').tolist()
+    return [
         TauxResult(date=date, taux=float(tx))
-        for date, tx in zip(dates, taux_transmission.values)
+        for date, tx in zip(dates, df["taux_transmission"].values)
     ]
-    return results
 
 @router.get("/mortalite/{maladie}/{pays}", response_model=List[TauxResult])
 def taux_mortalite(maladie: str, pays: str):
-    pandemi_id = get_pandemie_id(maladie)
-    pays_id    = get_pays_id(pays)
-    try:
-        df_raw = charger_donnees(pandemi_id)
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-
-    df = (
-        df_raw.reset_index()
-              .query("pays_id == @pays_id")
-              .set_index("date_jour")
-    )
-    if df.empty:
-        raise HTTPException(status_code=404, detail=f"Aucun enregistrement pour pays '{pays}'")
+    # Taux de mortalité : nouveaux morts / nouveaux cas (en %)
+    df = indicateurs_pays(maladie, pays)
+    dates = df.index.strftime('%Y-%m-%d').tolist()
+    return [
+        TauxResult(date=date, taux=float(tx))
+        for date, tx in zip(dates, df["taux_mortalite"].values)
+    ]
 
-    # Calcul du taux de mortalité : nouveaux morts / nouveaux cas (en %)
-    taux_mortalite = (df['nouveau_mort'] / df['nouveau_cas']).replace([np.inf, -np.inf], np.nan).fillna(0) * 100
+@indicators_router.get("/{maladie}", response_model=List[IndicateurResult])
+def indicateurs(
+    maladie: str,
+    pays: Optional[str] = None,
+    date_debut: Optional[date] = None,
+    date_fin: Optional[date] = None
+):
+    """
+    Indicateurs épidémiologiques (croissance, létalité, temps de doublement, Rt)
+    de tous les pays, optionnellement filtrés par pays et par période.
+    """
+    df = indicateurs_pays(maladie, pays) if pays else indicateurs_par_nom(maladie)
+    if date_debut:
+        df = df[df.index >= pd.Timestamp(date_debut)]
+    if date_fin:
+        df = df[df.index <= pd.Timestamp(date_fin)]
 
-    dates = taux_mortalite.index.strftime('%Y-%m-%d').tolist()
-    results = [
-        TauxResult(date=date, taux=float(tx))
-        for date, tx in zip(dates, taux_mortalite.values)
+    codes = get_codes_pays()
+    champs = ["nouveau_cas", "taux_transmission", "taux_mortalite", "croissance_jour",
+              "croissance_7j", "cfr", "temps_doublement", "rt"]
+    valeurs = df[champs].astype(float).replace([np.inf, -np.inf], np.nan)
+    valeurs = valeurs.astype(object).where(valeurs.notna(), None)
+    dates = df.index.strftime('%Y-%m-%d').tolist()
+    return [
+        IndicateurResult(pays=codes.get(pid, "UNK"), date=d, **dict(zip(champs, ligne)))
+        for pid, d, ligne in zip(df["pays_id"], dates, valeurs.itertuples(index=False, name=None))
     ]
-    return results
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pandemie_api/prevision.py
+
+Moteur de prévision récursive multi-pas, vectorisé sur l'ensemble des pays.
+- Reconstitue la dernière fenêtre observée de chaque pays (même agrégation que creer_features)
+- Fait avancer tous les pays ensemble : un seul appel model.predict par pas d'horizon
+- Recalcule à chaque pas les lags, rolling stats, taux et variables cycliques
+
+Les features « du jour » (roll_mean_7, taux_croissance, taux_mortalite) sont inconnues
+dans le futur : elles sont calculées sur la fenêtre qui se termine la veille.
+Le modèle ne prédit que les nouveaux cas ; les nouveaux morts sont projetés avec
+le taux de mortalité des 7 derniers jours de la fenêtre.
+"""
+import numpy as np
+import pandas as pd
+from training import serie_journaliere
+
+FENETRE_ROLL = 7
+
+
+# ----------------------------------------------------------------------
+def n_lags_du_modele(model, defaut: int = 7) -> int:
+    """Déduit le nombre de lags du nombre de features attendu par le modèle."""
+    n_features = getattr(model, "n_features_in_", None)
+    if n_features is None:
+        return defaut
+    return (int(n_features) - 6) // 2
+
+# ----------------------------------------------------------------------
+def fenetres_initiales(df: pd.DataFrame, n_lags: int = 7):
+    """
+    Extrait la dernière fenêtre observée de chaque pays.
+    Renvoie (pays_ids, dernieres_dates, cas, morts, total) où cas/morts/total
+    sont des matrices (n_pays × taille_fenetre), la dernière colonne étant le dernier jour connu.
+    """
+    taille = max(n_lags, FENETRE_ROLL) + 1
+    pays_ids, dates = [], []
+    cas = []
+    morts = []
+    total = []
+    for pays_id, group in df.groupby("pays_id", observed=True):
+        g = serie_journaliere(group).iloc[-taille:]
+        manque = taille - len(g)
+        pays_ids.append(pays_id)
+        dates.append(g.index[-1])
+        cas.append(np.pad(g['nouveau_cas'].to_numpy(dtype=float), (manque, 0)))
+        morts.append(np.pad(g['nouveau_mort'].to_numpy(dtype=float), (manque, 0)))
+        total.append(np.pad(g['total_cas'].to_numpy(dtype=float), (manque, 0)))
+    return (np.array(pays_ids), pd.DatetimeIndex(dates),
+            np.vstack(cas), np.vstack(morts), np.vstack(total))
+
+# ----------------------------------------------------------------------
+def features_pas(cas: np.ndarray, morts: np.ndarray, total: np.ndarray,
+                 dates: pd.DatetimeIndex, n_lags: int) -> np.ndarray:
+    """Construit la matrice X (n_pays × n_features) pour le jour qui suit chaque fenêtre."""
+    colonnes = []
+    for lag in range(1, n_lags+1):
+        colonnes += [cas[:, -lag], morts[:, -lag]]
+    recents = cas[:, -FENETRE_ROLL:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        taux_croissance = total[:, -1] / total[:, -2] - 1
+        taux_mortalite = np.where(cas[:, -1] > 0, morts[:, -1] / cas[:, -1], 0)
+    jours = dates.dayofweek.to_numpy()
+    colonnes += [
+        recents.mean(axis=1),
+        recents.std(axis=1, ddof=1),
+        taux_croissance,
+        taux_mortalite,
+        np.sin(2*np.pi*jours/7),
+        np.cos(2*np.pi*jours/7),
+    ]
+    X = np.column_stack(colonnes)
+    # même nettoyage que creer_features : inf/NaN neutralisés, négatifs ramenés à 0
+    X[~np.isfinite(X)] = 0
+    return np.clip(X, 0, None)
+
+# ----------------------------------------------------------------------
+def prevoir(df: pd.DataFrame, model, horizon: int, n_lags: int = None) -> pd.DataFrame:
+    """
+    Prévision récursive sur `horizon` jours pour tous les pays présents dans df
+    (DataFrame brut de charger_donnees, indexé par date_jour).
+    Renvoie un DataFrame long : pays_id, date_jour, predit (nouveaux cas, échelle réelle).
+    """
+    if n_lags is None:
+        n_lags = n_lags_du_modele(model)
+    pays_ids, dates, cas, morts, total = fenetres_initiales(df, n_lags)
+
+    blocs = []
+    for pas in range(1, horizon+1):
+        dates_pas = dates + pd.Timedelta(days=pas)
+        X = features_pas(cas, morts, total, dates_pas, n_lags)
+        y_pred = np.clip(np.expm1(model.predict(X)), 0, None)
+
+        # projection des morts avec le taux de mortalité récent de la fenêtre
+        somme_cas = cas[:, -FENETRE_ROLL:].sum(axis=1)
+        cfr = np.divide(morts[:, -FENETRE_ROLL:].sum(axis=1), somme_cas,
+                        out=np.zeros_like(somme_cas), where=somme_cas > 0)
+        cas = np.column_stack([cas[:, 1:], y_pred])
+        morts = np.column_stack([morts[:, 1:], y_pred * cfr])
+        total = np.column_stack([total[:, 1:], total[:, -1] + y_pred])
+
+        blocs.append(pd.DataFrame({'pays_id': pays_ids, 'date_jour': dates_pas, 'predit': y_pred}))
+
+    if not blocs:
+        return pd.DataFrame(columns=['pays_id', 'date_jour', 'predit'])
+    return pd.concat(blocs, ignore_index=True).sort_values(['pays_id', 'date_jour'], ignore_index=True)
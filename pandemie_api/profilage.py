@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pandemie_api/profilage.py
+
+Profilage CPU à la demande d'une requête HTTP (middleware enregistré dans main.py).
+- Déclenché par l'en-tête X-Profil ou le paramètre ?profil=, réservé aux administrateurs
+  (jeton Bearer vérifié par routers/security.admin_required)
+- Profileur par échantillonnage : un thread relève toutes les PROFILAGE_INTERVALLE_MS ms les piles
+  des seuls threads qui servent la requête : la boucle d'évènements et les workers du pool de
+  FastAPI (routes et dépendances synchrones) dont le contexte, copié par anyio à l'envoi du job,
+  porte l'échantillonneur de la requête (contextvar) ; les requêtes concurrentes servies par
+  d'autres workers et les threads au repos (attente de verrou, de file, de socket) sont ignorés
+- Sortie en piles repliées ("a;b;c N"), lisibles par flamegraph.pl ou speedscope :
+  valeur "retour" -> renvoyées comme corps de la réponse, sinon écrites dans PROFILAGE_DIR
+  depuis le pool de threads, hors de la boucle d'évènements (nom du fichier dans l'en-tête
+  X-Profil-Fichier)
+- PROFILAGE_1_SUR_N > 0 : une requête sur N est profilée et stockée sans en-tête
+- Les fichiers les plus anciens sont supprimés au-delà de PROFILAGE_MAX_MO
+"""
+import os
+import re
+import sys
+import glob
+import time
+import itertools
+import threading
+from collections import Counter
+from contextvars import Context, ContextVar
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from routers.security import admin_required, get_current_user
+
+PROFIL_DIR = os.getenv("PROFILAGE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".profils"))
+PROFIL_MAX_MO = float(os.getenv("PROFILAGE_MAX_MO", "100"))
+UN_SUR_N = int(os.getenv("PROFILAGE_1_SUR_N", "0"))
+INTERVALLE_MS = float(os.getenv("PROFILAGE_INTERVALLE_MS", "5"))
+
+# fichiers dont la fonction en sommet de pile signifie un thread en attente
+_FICHIERS_REPOS = ("threading.py", "queue.py", "selectors.py", "base_events.py")
+_compteur = itertools.count(1)
+_requetes = itertools.count(1)
+# échantillonneur de la requête en cours, hérité par les jobs qu'elle envoie au pool de threads
+_echantillonneur = ContextVar("echantillonneur", default=None)
+
+
+# ----------------------------------------------------------------------
+def _contexte_du_job(frame) -> Context:
+    """Contexte du job exécuté par un worker anyio (variable locale `context` de WorkerThread.run)."""
+    while frame is not None:
+        if frame.f_code.co_name == "run" and "anyio" in frame.f_code.co_filename:
+            contexte = frame.f_locals.get("context")
+            return contexte if isinstance(contexte, Context) else None
+        frame = frame.f_back
+    return None
+
+class EchantillonneurPiles:
+    """
+    Compte les piles (racine -> sommet) observées pendant le bloc with dans les threads `threads`
+    et dans les workers du pool dont le job porte cet échantillonneur (cf. _echantillonneur).
+    """
+
+    def __init__(self, intervalle_ms: float = INTERVALLE_MS, threads: set = ()):
+        self.intervalle_s = intervalle_ms / 1000
+        self.threads = set(threads)
+        self.piles = Counter()
+        self.echantillons = 0
+        self._arret = threading.Event()
+        self._thread = threading.Thread(target=self._boucle, daemon=True)
+
+    def _sert_la_requete(self, ident: int, frame) -> bool:
+        if ident in self.threads:
+            return True
+        contexte = _contexte_du_job(frame)
+        return contexte is not None and contexte.get(_echantillonneur) is self
+
+    def _boucle(self):
+        noms = {t.ident: t.name for t in threading.enumerate()}
+        while not self._arret.wait(self.intervalle_s):
+            self.echantillons += 1
+            for ident, frame in sys._current_frames().items():
+                if os.path.basename(frame.f_code.co_filename) in _FICHIERS_REPOS \
+                        or not self._sert_la_requete(ident, frame):
+                    continue
+                pile = []
+                while frame is not None:
+                    code = frame.f_code
+                    pile.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                if ident not in noms:
+                    noms = {t.ident: t.name for t in threading.enumerate()}
+                pile.append(noms.get(ident, str(ident)))
+                self.piles[";".join(reversed(pile))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._arret.set()
+        self._thread.join()
+
+    def replie(self) -> str:
+        """Piles repliées, une par ligne, les plus fréquentes d'abord."""
+        return "\n".join(f"{pile} {n}" for pile, n in self.piles.most_common()) + "\n"
+
+# ----------------------------------------------------------------------
+def evincer(dossier: str, max_mo: float):
+    """Supprime les profils les plus anciens tant que le dossier dépasse max_mo."""
+    fichiers = sorted(glob.glob(os.path.join(dossier, "*.folded")), key=os.path.getmtime)
+    total = sum(os.path.getsize(f) for f in fichiers)
+    while fichiers and total > max_mo * 1e6:
+        plus_ancien = fichiers.pop(0)
+        total -= os.path.getsize(plus_ancien)
+        os.remove(plus_ancien)
+
+def ecrire_profil(contenu: str, methode: str, chemin: str, duree_ms: float) -> str:
+    """Écrit le profil dans PROFIL_DIR (budget PROFIL_MAX_MO) et renvoie le nom du fichier."""
+    dossier = PROFIL_DIR
+    os.makedirs(dossier, exist_ok=True)
+    route = re.sub(r"[^A-Za-z0-9_-]+", "_", chemin).strip("_") or "racine"
+    nom = f"{time.strftime('%Y%m%d-%H%M%S')}_{next(_compteur)}_{methode}_{route[:80]}_{duree_ms:.0f}ms.folded"
+    tmp = os.path.join(dossier, nom + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(contenu)
+    os.replace(tmp, os.path.join(dossier, nom))
+    evincer(dossier, PROFIL_MAX_MO)
+    return nom
+
+def _verifier_admin(request: Request):
+    autorisation = request.headers.get("Authorization", "")
+    if not autorisation.lower().startswith("bearer "):
+        raise HTTPException(status_code=401, detail="Non authentifié", headers={"WWW-Authenticate": "Bearer"})
+    admin_required(get_current_user(autorisation[7:]))
+
+# ----------------------------------------------------------------------
+async def middleware_profilage(request: Request, call_next):
+    demande = request.headers.get("X-Profil") or request.query_params.get("profil")
+    if demande:
+        try:
+            _verifier_admin(request)
+        except HTTPException as e:
+            return JSONResponse({"detail": e.detail}, status_code=e.status_code, headers=e.headers)
+    elif not (UN_SUR_N > 0 and next(_requetes) % UN_SUR_N == 0):
+        return await call_next(request)
+
+    debut = time.perf_counter()
+    # la boucle d'évènements courante, plus les workers qui héritent du contexte
+    echantillonneur = EchantillonneurPiles(threads={threading.get_ident()})
+    jeton = _echantillonneur.set(echantillonneur)
+    try:
+        with echantillonneur:
+            reponse = await call_next(request)
+    finally:
+        _echantillonneur.reset(jeton)
+    duree_ms = (time.perf_counter() - debut) * 1000
+
+    if demande == "retour":
+        return PlainTextResponse(echantillonneur.replie(), headers={
+            "X-Profil-Echantillons": str(echantillonneur.echantillons),
+            "X-Profil-Statut-Origine": str(reponse.status_code),
+        })
+    nom = await run_in_threadpool(ecrire_profil, echantillonneur.replie(), request.method, request.url.path,
+                                  duree_ms)
+    if demande:
+        reponse.headers["X-Profil-Fichier"] = nom
+        reponse.headers["X-Profil-Echantillons"] = str(echantillonneur.echantillons)
+    return reponse
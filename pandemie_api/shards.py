@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pandemie_api/shards.py
+
+Modèles partitionnés par pays (ou par continent) en complément du modèle global.
+- Entraînement : features de la pandémie chargées une seule fois (cache disque), un job par
+  shard sur un pool de processus ; les pays avec moins de --min-lignes lignes n'ont pas de shard
+- Artefacts dans <out>/<base>_shards/ : <shard>.pkl (+ .npz, _meta.json) et shards.json,
+  l'index pays_id -> fichier avec la pandémie et la cible des shards, écrit en dernier
+- Service : CacheShards garde les shards chargés dans un LRU borné en mémoire ; un shard n'est
+  servi que pour sa pandémie et sa cible, les autres requêtes et les pays sans shard (petits,
+  ou non entraînés) sont servis par le modèle global
+
+Usage : python shards.py 1 --niveau continent --workers 2 --search random --budget-fits 25
+"""
+import os
+import json
+import time
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from threadpoolctl import threadpool_limits
+from sqlalchemy import text
+from training import (features_pandemie, entrainer, nom_pandemie, nom_artefact, sauvegarder_artefact,
+                      meta_artefact, get_engine)
+from foret_compacte import ForetCompacte
+from orchestrateur import repartir_coeurs
+
+MIN_LIGNES_SHARD = 180
+INDEX = "shards.json"
+
+# features partagées par les jobs d'un même worker
+_feats = {}
+
+
+# ----------------------------------------------------------------------
+def continents_des_pays(engine=None) -> dict:
+    with (engine or get_engine()).connect() as conn:
+        return dict(conn.execute(text("SELECT id, continent_id FROM pays")).all())
+
+def definir_shards(df_feats: pd.DataFrame, niveau: str = 'pays', continents: dict = None,
+                   min_lignes: int = MIN_LIGNES_SHARD) -> dict:
+    """{nom du shard: [pays_id...]} ; les groupes de moins de min_lignes lignes sont écartés."""
+    pays = df_feats['pays_id'].astype(int)
+    if niveau == 'continent':
+        groupes = pays.map(continents).fillna(-1).astype(int).map(lambda c: f"continent_{c}")
+    else:
+        groupes = pays.map(lambda p: f"pays_{p}")
+    tailles = groupes.value_counts()
+    return {nom: sorted(pays[groupes == nom].unique().tolist())
+            for nom in sorted(tailles[tailles >= min_lignes].index)}
+
+# ----------------------------------------------------------------------
+def _init_worker(df_feats: pd.DataFrame, n_jobs_interne: int):
+    _feats['df'] = df_feats
+    threadpool_limits(n_jobs_interne)
+
+def entrainer_shard(nom: str, pays_ids: list, dossier: str, meta_base: dict, n_jobs_interne: int,
+                    options: dict) -> dict:
+    df = _feats['df']
+    debut = time.perf_counter()
+    best, feature_cols, metriques = entrainer(df[df['pays_id'].isin(pays_ids)], meta_base['cible'],
+                                              n_jobs=n_jobs_interne, modele=meta_base['modele'], **options)
+    meta = meta_artefact(best, meta_base['pandemie_id'], meta_base['cible'], meta_base['n_lags'],
+                         meta_base['modele'], metriques)
+    meta['pays_ids'] = pays_ids
+    sauvegarder_artefact(best, feature_cols, dossier, nom, meta)
+    return {'shard': nom, 'nb_pays': len(pays_ids), 'duree_s': time.perf_counter() - debut,
+            'mae': metriques['mae']}
+
+def ecrire_index(dossier: str, shards: dict, niveau: str, pandemie_id: int, cible: str):
+    index = {'niveau': niveau, 'pandemie_id': pandemie_id, 'cible': cible,
+             'pays': {str(p): f"{nom}.pkl" for nom, pays_ids in shards.items() for p in pays_ids}}
+    tmp = os.path.join(dossier, INDEX + ".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp, os.path.join(dossier, INDEX))
+
+# ----------------------------------------------------------------------
+def taille_modele(modele, chemin: str) -> int:
+    """Octets occupés : tableaux NumPy d'une forêt compacte, sinon taille du fichier sur disque."""
+    if isinstance(modele, ForetCompacte):
+        return sum(v.nbytes for v in vars(modele).values() if isinstance(v, np.ndarray))
+    return os.path.getsize(chemin)
+
+class CacheShards:
+    """
+    LRU des shards chargés, borné à max_mo ; `charger(chemin)` lit un artefact
+    (predict.charger_modele). modele_pour(pandemie_id, pays_id) renvoie None si le pays n'a pas
+    de shard pour cette pandémie ; seuls les shards de la cible servie (`cible`) sont utilisés.
+    """
+    def __init__(self, dossier: str, charger, max_mo: float = 256, cible: str = 'nouveau_cas'):
+        self.dossier = dossier
+        self.charger = charger
+        self.max_octets = max_mo * 1e6
+        self.pandemie_id = None
+        self.pays = {}
+        if dossier and os.path.exists(os.path.join(dossier, INDEX)):
+            with open(os.path.join(dossier, INDEX), encoding='utf-8') as f:
+                index = json.load(f)
+            # un index sans pandémie (antérieur) ou d'une autre cible n'est pas servi
+            if index.get('pandemie_id') is not None and index.get('cible') == cible:
+                self.pandemie_id = int(index['pandemie_id'])
+                self.pays = {int(p): fichier for p, fichier in index['pays'].items()}
+        self._lru = OrderedDict()  # fichier -> (modèle, octets)
+        self._verrou = threading.Lock()
+        self.octets = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def fichiers(self, pandemie_id: int) -> dict:
+        """pays_id -> fichier du shard pour cette pandémie ({} si les shards sont d'une autre pandémie)."""
+        return self.pays if pandemie_id == self.pandemie_id else {}
+
+    def a_shard(self, pandemie_id: int, pays_id) -> bool:
+        return int(pays_id) in self.fichiers(pandemie_id)
+
+    def modele_pour(self, pandemie_id: int, pays_id):
+        fichier = self.fichiers(pandemie_id).get(int(pays_id))
+        if fichier is None:
+            return None
+        with self._verrou:
+            if fichier in self._lru:
+                self._lru.move_to_end(fichier)
+                self.hits += 1
+                return self._lru[fichier][0]
+            self.misses += 1
+        # chargement hors verrou : un shard froid ne bloque pas les hits des autres requêtes
+        chemin = os.path.join(self.dossier, fichier)
+        modele = self.charger(chemin)
+        octets = taille_modele(modele, chemin)
+        with self._verrou:
+            if fichier in self._lru:
+                # chargé entre-temps par une requête concurrente
+                self._lru.move_to_end(fichier)
+                return self._lru[fichier][0]
+            self._lru[fichier] = (modele, octets)
+            self.octets += octets
+            # le shard demandé reste chargé même s'il dépasse seul le budget
+            while self.octets > self.max_octets and len(self._lru) > 1:
+                _, (_, liberes) = self._lru.popitem(last=False)
+                self.octets -= liberes
+                self.evictions += 1
+            return modele
+
+    def metriques(self) -> dict:
+        return {'pays_avec_shard': len(self.pays), 'shards_charges': len(self._lru),
+                'memoire_mo': self.octets / 1e6, 'max_mo': self.max_octets / 1e6,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+# ----------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Entraîne un modèle par pays ou par continent")
+    parser.add_argument('pandemie_id', type=int)
+    parser.add_argument('--niveau', choices=['pays', 'continent'], default='pays')
+    parser.add_argument('--min-lignes', type=int, default=MIN_LIGNES_SHARD,
+                        help="Lignes minimales pour qu'un groupe ait son shard (sinon modèle global)")
+    parser.add_argument('-l','--n_lags', type=int, default=7)
+    parser.add_argument('-c','--cible', choices=['nouveau_cas','nouveau_mort'], default='nouveau_cas')
+    parser.add_argument('--model', choices=['rf','hgb'], default='rf')
+    parser.add_argument('-o','--out', type=str, default='model/')
+    parser.add_argument('-w','--workers', type=int, default=None)
+    parser.add_argument('--search', choices=['grid','halving','random'], default='random')
+    parser.add_argument('--budget-fits', type=int, default=None)
+    parser.add_argument('--budget-temps', type=float, default=None)
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    debut_total = time.perf_counter()
+    df_feats = features_pandemie(args.pandemie_id, args.n_lags, utiliser_cache=not args.no_cache)
+    continents = continents_des_pays() if args.niveau == 'continent' else None
+    shards = definir_shards(df_feats, args.niveau, continents, args.min_lignes)
+    nb_pays = df_feats['pays_id'].nunique()
+    print(f"{len(shards)} shards ({args.niveau}) couvrant {sum(map(len, shards.values()))}/{nb_pays} pays")
+
+    base = nom_artefact(nom_pandemie(args.pandemie_id), args.cible, args.model, args.n_lags)
+    dossier = os.path.join(args.out, f"{base}_shards")
+    meta_base = {'pandemie_id': args.pandemie_id, 'cible': args.cible, 'n_lags': args.n_lags,
+                 'modele': args.model}
+    options = {'search': args.search, 'budget_fits': args.budget_fits, 'budget_s': args.budget_temps}
+
+    workers, n_jobs_interne = repartir_coeurs(len(shards), args.workers)
+    resultats = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(df_feats, n_jobs_interne)) as pool:
+        futures = [pool.submit(entrainer_shard, nom, pays_ids, dossier, meta_base, n_jobs_interne, options)
+                   for nom, pays_ids in shards.items()]
+        for future in as_completed(futures):
+            res = future.result()
+            print(f"Terminé : {res['shard']} ({res['nb_pays']} pays) en {res['duree_s']:.1f}s (MAE {res['mae']:.2f})")
+            resultats.append(res)
+    ecrire_index(dossier, shards, args.niveau, args.pandemie_id, args.cible)
+
+    recap = pd.DataFrame(resultats).sort_values('shard')
+    print(recap.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+    print(f"Index écrit dans {os.path.join(dossier, INDEX)} ; temps total {time.perf_counter() - debut_total:.1f}s")
+
+if __name__ == '__main__':
+    main()
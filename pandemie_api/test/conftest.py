@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+class ModelePersistance:
+    """Modèle factice : prédit log1p(lag_cas_1) et compte les appels."""
+    n_features_in_ = 2 * 7 + 6
+
+    def __init__(self):
+        self.appels = []
+
+    def predict(self, X):
+        self.appels.append(X.shape)
+        return np.log1p(X[:, 0])
+
+
+def _donnees_synthetiques(n_pays=3, n_jours=40):
+    rng = np.random.default_rng(0)
+    lignes = []
+    for pays_id in range(1, n_pays + 1):
+        cas = rng.integers(0, 100, n_jours)
+        morts = cas // 10
+        for i, date in enumerate(pd.date_range("2021-01-01", periods=n_jours, freq="D")):
+            lignes.append({"date_jour": date, "pays_id": pays_id, "nouveau_cas": cas[i],
+                           "nouveau_mort": morts[i], "total_cas": cas[:i + 1].sum(),
+                           "total_mort": morts[:i + 1].sum()})
+    return pd.DataFrame(lignes).set_index("date_jour").sort_index()
+
+
+@pytest.fixture
+def donnees_synthetiques():
+    """Fabrique de suivis synthétiques : donnees_synthetiques(n_pays, n_jours), indexés par date_jour."""
+    return _donnees_synthetiques
+
+
+@pytest.fixture
+def modele_persistance():
+    return ModelePersistance()
@@ -0,0 +1,50 @@
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from training import creer_features, matrices, sauvegarder_artefact
+from analyse import metriques_par_pays, predire, rapport_batch, cible_modele
+
+
+def test_metriques_par_pays_egales_au_calcul_par_pays(donnees_synthetiques):
+    df_feats = creer_features(donnees_synthetiques(3, 60), avec_pays=True)
+    y_pred = df_feats["nouveau_cas"].to_numpy(dtype=float) + np.arange(len(df_feats)) % 5
+    table = metriques_par_pays(df_feats, y_pred).set_index("pays_id")
+    assert len(table) == 3
+
+    masque = (df_feats["pays_id"] == 2).to_numpy()
+    reel, pred = df_feats["nouveau_cas"].to_numpy(dtype=float)[masque], y_pred[masque]
+    assert table.loc[2, "n"] == masque.sum()
+    assert np.isclose(table.loc[2, "mae"], np.abs(pred - reel).mean())
+    assert np.isclose(table.loc[2, "rmse"], np.sqrt(((pred - reel) ** 2).mean()))
+    r2 = 1 - ((pred - reel) ** 2).sum() / ((reel - reel.mean()) ** 2).sum()
+    assert np.isclose(table.loc[2, "r2"], r2)
+
+
+def test_rapport_batch_ecrit_csv_html_et_figures(tmp_path, donnees_synthetiques):
+    df_feats = creer_features(donnees_synthetiques(3, 60), avec_pays=True)
+    X, y, _ = matrices(df_feats)
+    modele = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+    par_pays = rapport_batch(modele, df_feats, str(tmp_path), {1: "Alpha"})
+
+    assert len(par_pays) == 3
+    assert "Alpha" in set(par_pays["nom"])
+    # prédictions ramenées à l'échelle réelle (le modèle apprend log1p)
+    assert predire(modele, df_feats).max() > np.log1p(df_feats["nouveau_cas"].max())
+    for fichier in ("metriques_pays.csv", "rapport.html", "residus.png", "mae_par_pays.png",
+                    "predit_vs_reel.png"):
+        assert (tmp_path / fichier).exists()
+    assert "residus.png" in (tmp_path / "rapport.html").read_text(encoding="utf-8")
+
+
+def test_cible_lue_dans_la_meta_de_l_artefact(tmp_path, donnees_synthetiques):
+    df_feats = creer_features(donnees_synthetiques(2, 60), avec_pays=True)
+    X, y, cols = matrices(df_feats, "nouveau_mort")
+    modele = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+    chemin = sauvegarder_artefact(modele, cols, str(tmp_path), "mort", {"cible": "nouveau_mort"})
+    assert cible_modele(chemin) == "nouveau_mort"
+    assert cible_modele(sauvegarder_artefact(modele, cols, str(tmp_path), "sans_meta")) == "nouveau_cas"
+
+    # mêmes colonnes que matrices : la prédiction reproduit celle de l'entraînement
+    assert np.allclose(predire(modele, df_feats, "nouveau_mort"), np.clip(np.expm1(modele.predict(X)), 0, None))
+    par_pays = rapport_batch(modele, df_feats, str(tmp_path / "rapport"), cible="nouveau_mort")
+    reel = df_feats.loc[df_feats["pays_id"] == 1, "nouveau_mort"]
+    assert par_pays.set_index("pays_id").loc[1, "moyenne_reel"] == reel.mean()
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from training import creer_features
+from backtest import origines_backtest, backtester, metriques_groupees
+
+
+def test_origines_laissent_l_horizon_observe():
+    dates = pd.date_range("2021-01-01", "2021-04-30")
+    origines = origines_backtest(dates, n_origines=3, pas=10, horizon=7)
+    assert origines == list(pd.to_datetime(["2021-04-03", "2021-04-13", "2021-04-23"]))
+
+
+def test_backtest_par_pays_et_horizon(donnees_synthetiques):
+    df_feats = creer_features(donnees_synthetiques(3, 120), avec_pays=True)
+    origines = origines_backtest(df_feats.index, n_origines=3, pas=10, horizon=5)
+    erreurs = backtester(df_feats, RandomForestRegressor(n_estimators=5, random_state=0), origines, 5)
+    assert len(erreurs) == 3 * 3 * 5
+    assert set(erreurs["horizon"]) == {1, 2, 3, 4, 5}
+
+    table = metriques_groupees(erreurs)
+    assert len(table) == 3 * 5
+    assert (table["n_origines"] == 3).all()
+    # MAE groupée = moyenne des erreurs absolues de la cellule
+    cellule = erreurs[(erreurs["pays_id"] == 2) & (erreurs["horizon"] == 4)]
+    attendu = (cellule["predit"] - cellule["reel"]).abs().mean()
+    assert np.isclose(table.set_index(["pays_id", "horizon"]).loc[(2, 4), "mae"], attendu)
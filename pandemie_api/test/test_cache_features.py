@@ -0,0 +1,35 @@
+import os
+import pandas as pd
+import cache_features
+from training import creer_features
+
+
+def test_aller_retour_et_reutilisation(tmp_path, monkeypatch, donnees_synthetiques):
+    monkeypatch.setattr(cache_features, "CACHE_DIR", str(tmp_path))
+    feats = creer_features(donnees_synthetiques(3, 60), avec_pays=True)
+    appels = []
+    def calculer():
+        appels.append(1)
+        return feats
+
+    cle = ("features", 1, 7, 1, "v1")
+    premier = cache_features.charger_ou_calculer(cle, calculer)
+    relu = cache_features.charger_ou_calculer(cle, calculer)
+    assert len(appels) == 1
+    pd.testing.assert_frame_equal(relu, premier, check_freq=False)
+
+    # nouvelle version des données ou --no-cache : recalcul
+    cache_features.charger_ou_calculer(("features", 1, 7, 1, "v2"), calculer)
+    cache_features.charger_ou_calculer(cle, calculer, utiliser_cache=False)
+    assert len(appels) == 3
+
+
+def test_eviction_par_taille(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_features, "CACHE_DIR", str(tmp_path))
+    df = pd.DataFrame({"x": range(50_000)}, index=pd.date_range("2020-01-01", periods=50_000, freq="min"))
+    for i in range(4):
+        cache_features.ecrire(("bloc", i), df, max_mo=2)
+        os.utime(cache_features.chemin_cache(("bloc", i)), (i, i))
+    # ~0.8 Mo par entrée : seules les plus récentes tiennent dans 2 Mo
+    assert cache_features.lire(("bloc", 0)) is None
+    assert cache_features.lire(("bloc", 3)) is not None
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from charge import resumer, comparer
+
+
+def _mesures():
+    return pd.DataFrame({
+        "endpoint": ["a"] * 100 + ["b"] * 10,
+        "latence_ms": np.r_[np.arange(1, 101), np.full(10, 50.0)],
+        "ok": [True] * 100 + [True] * 8 + [False] * 2,
+        "rss_mo": np.r_[np.full(100, 100.0), np.full(10, 120.0)],
+    })
+
+
+def test_resumer_par_endpoint():
+    resume = resumer(_mesures(), duree_s=10)
+    assert resume["a"]["requetes"] == 100
+    assert resume["a"]["debit_rps"] == 10
+    assert np.isclose(resume["a"]["p50_ms"], 50.5)
+    assert np.isclose(resume["a"]["p99_ms"], np.percentile(np.arange(1, 101), 99))
+    assert resume["b"]["erreurs"] == 2 and np.isclose(resume["b"]["taux_erreur"], 0.2)
+    assert resume["_global"]["requetes"] == 110
+    assert resume["_global"]["rss_max_mo"] == 120
+
+
+def test_comparer_deux_executions():
+    avant = {"endpoints": resumer(_mesures(), duree_s=10)}
+    lent = _mesures().assign(latence_ms=lambda m: m["latence_ms"] * 2)
+    apres = {"endpoints": resumer(lent, duree_s=10)}
+    ecarts = comparer(avant, apres).set_index("endpoint")
+    assert np.isclose(ecarts.loc["a", "p95_ecart_pct"], 100)
+    assert np.isclose(ecarts.loc["a", "debit_ecart_pct"], 0)
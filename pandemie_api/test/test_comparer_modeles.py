@@ -0,0 +1,24 @@
+import os
+from sklearn.ensemble import HistGradientBoostingRegressor
+from training import creer_features, rechercher_hyperparametres, matrices
+from comparer_modeles import comparer
+
+
+def test_recherche_hgb(donnees_synthetiques):
+    X, y, _ = matrices(creer_features(donnees_synthetiques(2, 120)))
+    best, params, df_res = rechercher_hyperparametres(X, y, 'random', budget_fits=5, n_jobs=1, modele='hgb')
+    assert isinstance(best, HistGradientBoostingRegressor)
+    assert not best.early_stopping
+    assert len(df_res) == 1 and 'max_iter' in params
+
+
+def test_rapport_comparatif(tmp_path, donnees_synthetiques):
+    df_feats = creer_features(donnees_synthetiques(2, 120), avec_pays=True)
+    rapport = comparer(df_feats, str(tmp_path), "Covid 19", repetitions=5,
+                       search='random', budget_fits=5, n_jobs=1)
+    assert rapport['modele'].tolist() == ['RandomForest', 'HistGradientBoosting']
+    assert (rapport[['entrainement_s', 'taille_mo', 'latence_p50_ms', 'mae']] >= 0).all().all()
+    # la forêt est servie en forêt compacte, le boosting en pickle
+    assert os.path.exists(tmp_path / "RandomForest_covid-19.npz")
+    assert os.path.exists(tmp_path / "HistGradientBoosting_covid-19.pkl")
+    assert not os.path.exists(tmp_path / "HistGradientBoosting_covid-19.npz")
@@ -21,3 +21,12 @@ def test_create_continent(db):
     continent = schemas.ContinentCreate(nom_continent="Europe")
     db_cont = crud.create_continent(db, continent)
     assert db_cont.nom_continent == "Europe"
+
+def test_suivi_unique_par_pandemie_pays_jour(db):
+    from datetime import date
+    from sqlalchemy.exc import IntegrityError
+    suivi = schemas.SuiviPandemieCreate(id_logging=1, id_pandemie=1, pays_id=1, date_jour=date(2020, 1, 22), total_cas=1)
+    crud.create_suivi(db, suivi)
+    crud.create_suivi(db, suivi.model_copy(update={"id_pandemie": 2}))
+    with pytest.raises(IntegrityError):
+        crud.create_suivi(db, suivi.model_copy(update={"total_cas": 2}))
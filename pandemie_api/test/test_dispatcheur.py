@@ -0,0 +1,65 @@
+import threading
+import numpy as np
+from predict import DispatcheurInference
+
+
+def test_demandes_concurrentes_regroupees():
+    appels = []
+
+    def predire(X):
+        appels.append(len(X))
+        return X[:, 0] * 2
+
+    dispatcheur = DispatcheurInference(predire, fenetre_ms=200, max_lignes=10_000)
+    demandes = [np.full((i + 1, 3), float(i)) for i in range(8)]
+    resultats = [None] * len(demandes)
+    depart = threading.Barrier(len(demandes))
+
+    def appeler(i):
+        depart.wait()
+        resultats[i] = dispatcheur.predict(demandes[i])
+
+    threads = [threading.Thread(target=appeler, args=(i,)) for i in range(len(demandes))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for i, res in enumerate(resultats):
+        np.testing.assert_array_equal(res, np.full(i + 1, 2.0 * i))
+    assert sum(appels) == sum(len(X) for X in demandes)
+    assert len(appels) < len(demandes)
+    assert dispatcheur.metriques()["nb_demandes"] == len(demandes)
+
+
+def test_fenetre_nulle_appel_direct():
+    dispatcheur = DispatcheurInference(lambda X: X.sum(axis=1), fenetre_ms=0)
+    np.testing.assert_array_equal(dispatcheur.predict(np.ones((2, 3))), [3.0, 3.0])
+    assert dispatcheur.metriques()["nb_lots"] == 0
+
+
+def test_metriques_pendant_les_lots():
+    dispatcheur = DispatcheurInference(lambda X: X[:, 0], fenetre_ms=1, max_lignes=4)
+    fini = threading.Event()
+    erreurs = []
+
+    def lire_metriques():
+        while not fini.is_set():
+            try:
+                dispatcheur.metriques()
+            except RuntimeError as e:
+                erreurs.append(e)
+
+    lecteur = threading.Thread(target=lire_metriques)
+    lecteur.start()
+    threads = [threading.Thread(target=lambda: [dispatcheur.predict(np.ones((2, 2))) for _ in range(50)])
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    fini.set()
+    lecteur.join()
+
+    assert not erreurs
+    assert dispatcheur.metriques()["nb_demandes"] == 200
@@ -0,0 +1,26 @@
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor
+from foret_compacte import ForetCompacte, aplatir_foret, exporter_foret
+
+
+def jeu_de_donnees(n=400, p=20):
+    rng = np.random.default_rng(42)
+    X = rng.random((n, p)) * 1000
+    y = np.log1p(X[:, 0] + 3 * X[:, 1] + rng.random(n) * 50)
+    return X, y
+
+
+def test_equivalence_random_forest():
+    X, y = jeu_de_donnees()
+    foret = RandomForestRegressor(n_estimators=25, min_samples_leaf=1, random_state=0).fit(X[:300], y[:300])
+    compacte = ForetCompacte(aplatir_foret(foret))
+    np.testing.assert_allclose(compacte.predict(X[300:]), foret.predict(X[300:]), rtol=1e-12)
+    assert compacte.n_features_in_ == foret.n_features_in_
+
+
+def test_equivalence_apres_sauvegarde(tmp_path):
+    X, y = jeu_de_donnees()
+    foret = ExtraTreesRegressor(n_estimators=10, max_depth=6, random_state=0).fit(X, y)
+    path = exporter_foret(foret, str(tmp_path / "foret.npz"))
+    compacte = ForetCompacte.charger(path)
+    np.testing.assert_allclose(compacte.predict(X), foret.predict(X), rtol=1e-12)
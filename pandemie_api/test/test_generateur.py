@@ -0,0 +1,24 @@
+import pandas as pd
+from sqlalchemy import create_engine
+from generateur import generer, code_pays
+
+
+def test_codes_pays_uniques():
+    codes = [code_pays(i) for i in range(26 ** 2 + 5)]
+    assert codes[:2] == ["AAA", "AAB"]
+    assert len(set(codes)) == len(codes)
+
+
+def test_generation_reproductible(tmp_path):
+    tables = []
+    for nom in ("a.db", "b.db"):
+        engine = create_engine(f"sqlite:///{tmp_path / nom}")
+        comptes = generer(engine, n_pays=4, n_jours=30, n_pandemies=2, graine=3)
+        assert comptes["suivi_pandemie"] == 4 * 30 * 2
+        tables.append(pd.read_sql("SELECT * FROM suivi_pandemie ORDER BY id_suivi", engine))
+    pd.testing.assert_frame_equal(*tables)
+
+    suivis = tables[0].sort_values(["id_pandemie", "pays_id", "date_jour"])
+    cumul = suivis.groupby(["id_pandemie", "pays_id"])["nouveau_cas"].cumsum()
+    assert (cumul == suivis["total_cas"]).all()
+    assert (suivis["nouveau_mort"] <= suivis["nouveau_cas"]).all()
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+from indicateurs import calculer_indicateurs
+
+
+def test_taux_identiques_aux_anciens_endpoints(donnees_synthetiques):
+    df = donnees_synthetiques(3, 30)
+    ind = calculer_indicateurs(df)
+    for pays_id in range(1, 4):
+        brut = df[df["pays_id"] == pays_id]
+        transmission = (brut['nouveau_cas'] / brut['nouveau_cas'].shift(1)).replace([np.inf, -np.inf], np.nan).fillna(0)
+        mortalite = (brut['nouveau_mort'] / brut['nouveau_cas']).replace([np.inf, -np.inf], np.nan).fillna(0) * 100
+        res = ind[ind["pays_id"] == pays_id]
+        np.testing.assert_allclose(res["taux_transmission"], transmission)
+        np.testing.assert_allclose(res["taux_mortalite"], mortalite)
+
+
+def test_moyenne_glissante_par_pays(donnees_synthetiques):
+    df = donnees_synthetiques(2, 30)
+    ind = calculer_indicateurs(df)
+    brut = df[df["pays_id"] == 2]["nouveau_cas"].astype(float)
+    moyenne = brut.rolling(7).mean()
+    attendu = (moyenne / moyenne.shift(1) - 1).replace([np.inf, -np.inf], np.nan)
+    np.testing.assert_allclose(ind[ind["pays_id"] == 2]["croissance_7j"], attendu)
+
+
+def test_fenetres_en_jours_malgre_trous_et_doublons(donnees_synthetiques):
+    df = donnees_synthetiques(1, 30)
+    # référence : aucun cas le 11e jour, totaux inchangés ce jour-là
+    df.iloc[10, df.columns.get_indexer(["nouveau_cas", "nouveau_mort"])] = 0
+    df["total_cas"] = df["nouveau_cas"].cumsum()
+    df["total_mort"] = df["nouveau_mort"].cumsum()
+    reference = calculer_indicateurs(df)
+
+    # même série sans le 11e jour et avec le 21e jour réparti sur deux lignes
+    troue = df.drop(df.index[10])
+    moitie = troue.iloc[[19]].copy()
+    moitie[["nouveau_cas", "nouveau_mort"]] //= 2
+    troue.iloc[19, troue.columns.get_indexer(["nouveau_cas", "nouveau_mort"])] -= moitie[["nouveau_cas", "nouveau_mort"]].to_numpy()[0]
+    ind = calculer_indicateurs(pd.concat([troue, moitie]).sort_index())
+
+    assert len(ind) == len(df) - 1 and not ind.index.duplicated().any()
+    attendu = reference.drop(reference.index[10])
+    for colonne in ["nouveau_cas", "croissance_7j", "rt", "temps_doublement", "cfr"]:
+        np.testing.assert_allclose(ind[colonne], attendu[colonne])
@@ -0,0 +1,58 @@
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import TimeSeriesSplit, cross_val_score
+from magasin_recherche import MagasinResultats, evaluer_configs
+
+CONFIGS = [{"max_depth": 3, "n_estimators": 5}, {"max_depth": None, "n_estimators": 5}]
+
+
+def jeu():
+    rng = np.random.default_rng(0)
+    X = rng.random((120, 4))
+    return X, X[:, 0] * 3 + rng.random(120)
+
+
+def test_scores_identiques_a_cross_val_score():
+    X, y = jeu()
+    cv = TimeSeriesSplit(3)
+    rf = RandomForestRegressor(random_state=0)
+    df_res, nouveaux = evaluer_configs(rf, CONFIGS, X, y, cv, "neg_mean_absolute_error", n_jobs=1)
+    assert nouveaux == 6
+    attendu = cross_val_score(rf.set_params(**CONFIGS[0]), X, y, cv=cv, scoring="neg_mean_absolute_error")
+    assert np.isclose(df_res.loc[0, "score"], attendu.mean())
+
+
+def test_reprise_apres_interruption(tmp_path):
+    X, y = jeu()
+    cv = TimeSeriesSplit(3)
+    chemin = str(tmp_path / "recherche.jsonl")
+    rf = RandomForestRegressor(random_state=0)
+    premier, _ = evaluer_configs(rf, CONFIGS, X, y, cv, "neg_mean_absolute_error",
+                                 MagasinResultats(chemin, "v1"), n_jobs=1)
+
+    # interruption simulée : les deux derniers fits sont perdus, la dernière ligne est tronquée
+    lignes = open(chemin).read().splitlines()
+    with open(chemin, "w") as f:
+        f.write("\n".join(lignes[:4]) + "\n" + lignes[4][:10])
+
+    grille_elargie = CONFIGS + [{"max_depth": 5, "n_estimators": 5}]
+    magasin = MagasinResultats(chemin, "v1")
+    assert magasin.nb_repris == 4
+    repris, nouveaux = evaluer_configs(rf, grille_elargie, X, y, cv, "neg_mean_absolute_error", magasin, n_jobs=1)
+    assert nouveaux == 2 + 3
+    np.testing.assert_allclose(repris["score"][:2], premier["score"])
+    assert MagasinResultats(chemin, "v1").nb_repris == 9
+
+    # autre version des données : rien n'est repris
+    assert MagasinResultats(chemin, "v2").nb_repris == 0
+
+
+def test_resultats_paralleles_rattaches_a_leur_fold(tmp_path):
+    X, y = jeu()
+    cv = TimeSeriesSplit(3)
+    rf = RandomForestRegressor(random_state=0)
+    sequentiel, _ = evaluer_configs(rf, CONFIGS, X, y, cv, "neg_mean_absolute_error", n_jobs=1)
+    magasin = MagasinResultats(str(tmp_path / "recherche.jsonl"), "v1")
+    parallele, _ = evaluer_configs(rf, CONFIGS, X, y, cv, "neg_mean_absolute_error", magasin, n_jobs=2)
+    np.testing.assert_allclose(parallele["score"], sequentiel["score"])
+    assert MagasinResultats(str(tmp_path / "recherche.jsonl"), "v1").nb_repris == 6
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+from training import creer_features
+from prevision import prevoir, fenetres_initiales, features_pas
+
+
+def test_un_appel_predict_par_pas(donnees_synthetiques, modele_persistance):
+    model = modele_persistance
+    prev = prevoir(donnees_synthetiques(n_pays=3), model, horizon=5)
+    assert model.appels == [(3, model.n_features_in_)] * 5
+    assert len(prev) == 15
+    assert prev["date_jour"].min() == pd.Timestamp("2021-02-10")
+
+
+def test_lags_coherents_avec_creer_features(donnees_synthetiques):
+    df = donnees_synthetiques(n_pays=2)
+    veille = df[df.index < df.index.max()]
+    pays_ids, dates, cas, morts, total = fenetres_initiales(veille)
+    X = features_pas(cas, morts, total, dates + pd.Timedelta(days=1), 7)
+    for i, pays_id in enumerate(pays_ids):
+        attendu = creer_features(df[df["pays_id"] == pays_id]).iloc[-1]
+        lags = [c for c in attendu.index if c.startswith("lag_")]
+        np.testing.assert_allclose(X[i, :len(lags)], attendu[lags].to_numpy())
@@ -0,0 +1,78 @@
+import time
+import threading
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import profilage
+from routers.auth import create_access_token
+
+app = FastAPI()
+app.middleware("http")(profilage.middleware_profilage)
+
+
+def calcul_lent():
+    fin = time.perf_counter() + 0.1
+    total = 0
+    while time.perf_counter() < fin:
+        total += 1
+    return total
+
+
+def calcul_concurrent():
+    return calcul_lent()
+
+
+@app.get("/lent")
+def route_lente():
+    return {"total": calcul_lent()}
+
+
+@app.get("/concurrente")
+def route_concurrente():
+    return {"total": calcul_concurrent()}
+
+
+client = TestClient(app)
+
+
+def _entetes(is_admin, profil="1"):
+    jeton = create_access_token({"sub": "test", "is_admin": is_admin})
+    return {"Authorization": f"Bearer {jeton}", "X-Profil": profil}
+
+
+def test_sans_profil_requete_inchangee():
+    reponse = client.get("/lent")
+    assert reponse.status_code == 200
+    assert "X-Profil-Fichier" not in reponse.headers
+
+
+def test_profil_reserve_aux_admins():
+    assert client.get("/lent", headers={"X-Profil": "1"}).status_code == 401
+    assert client.get("/lent", headers=_entetes(False)).status_code == 403
+
+
+def test_profil_retourne_les_piles_de_la_route_synchrone():
+    reponse = client.get("/lent", headers=_entetes(True, "retour"))
+    assert reponse.status_code == 200
+    assert "calcul_lent" in reponse.text
+    assert int(reponse.headers["X-Profil-Echantillons"]) > 0
+
+
+def test_profil_stocke_sous_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(profilage, "PROFIL_DIR", str(tmp_path))
+    reponse = client.get("/lent?profil=1", headers=_entetes(True, ""))
+    assert reponse.status_code == 200 and reponse.json()["total"] > 0
+    fichier = tmp_path / reponse.headers["X-Profil-Fichier"]
+    assert "calcul_lent" in fichier.read_text(encoding="utf-8")
+
+    monkeypatch.setattr(profilage, "PROFIL_MAX_MO", 0)
+    client.get("/lent", headers=_entetes(True))
+    assert list(tmp_path.glob("*.folded")) == []
+
+
+def test_profil_ignore_les_requetes_concurrentes():
+    autre = threading.Thread(target=lambda: TestClient(app).get("/concurrente"))
+    autre.start()
+    reponse = client.get("/lent", headers=_entetes(True, "retour"))
+    autre.join()
+    assert "calcul_lent" in reponse.text
+    assert "calcul_concurrent" not in reponse.text
@@ -0,0 +1,78 @@
+import os
+import joblib
+import pytest
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+import predict
+from training import (nom_artefact, creer_features, matrices, rafraichir_modele, sauvegarder_artefact,
+                      lire_meta, chemin_meta, artefact_defaut)
+
+COUPURE = "2021-03-31"
+
+
+def modele_initial(estimateur, df_feats):
+    X, y, _ = matrices(df_feats[df_feats.index <= COUPURE])
+    return estimateur.fit(X, y)
+
+
+@pytest.mark.parametrize("estimateur, modele, param", [
+    (RandomForestRegressor(n_estimators=20, random_state=0), "rf", "n_estimators"),
+    (HistGradientBoostingRegressor(max_iter=20, early_stopping=False, random_state=0), "hgb", "max_iter"),
+])
+def test_warm_start_ajoute_des_arbres(estimateur, modele, param, donnees_synthetiques):
+    df_feats = creer_features(donnees_synthetiques(2, 120), avec_pays=True)
+    best = modele_initial(estimateur, df_feats)
+    meta = {"pandemie_id": 1, "cible": "nouveau_cas", "n_lags": 7, "modele": modele, "date_coupure": COUPURE}
+
+    candidat, nouvelle_meta, rapport = rafraichir_modele(best, meta, df_feats, fenetre=7, ajout=10,
+                                                         tolerance=np.inf)
+    assert getattr(candidat, param) == 30 and getattr(best, param) == 20
+    assert not candidat.warm_start
+    # 30 nouvelles dates : 23 apprises (2 pays), 7 gardées pour la validation
+    assert rapport["nouvelles_dates"] == 30 and rapport["lignes_apprises"] == 46
+    assert nouvelle_meta["date_coupure"] == "2021-04-23"
+
+
+def test_pas_assez_de_nouvelles_dates(donnees_synthetiques):
+    df_feats = creer_features(donnees_synthetiques(2, 95), avec_pays=True)
+    best = modele_initial(RandomForestRegressor(n_estimators=5, random_state=0), df_feats)
+    meta = {"cible": "nouveau_cas", "modele": "rf", "date_coupure": COUPURE}
+    candidat, _, rapport = rafraichir_modele(best, meta, df_feats, fenetre=14)
+    assert candidat is None and "candidat" not in rapport
+
+
+def test_substitution_et_rechargement(tmp_path, monkeypatch, donnees_synthetiques):
+    df_feats = creer_features(donnees_synthetiques(2, 120), avec_pays=True)
+    X, y, cols = matrices(df_feats)
+    hgb = HistGradientBoostingRegressor(max_iter=5).fit(X, y)
+    chemin = sauvegarder_artefact(hgb, cols, str(tmp_path), "HistGradientBoosting_test",
+                                  {"date_coupure": COUPURE, "params": hgb.get_params()})
+    assert lire_meta(chemin)["params"]["max_iter"] == 5
+    assert os.path.exists(chemin_meta(chemin))
+    assert not [f for f in os.listdir(tmp_path) if ".tmp" in f]
+
+    monkeypatch.setattr(predict, "MODEL_PATH", chemin)
+    monkeypatch.setattr(predict, "RECHARGEMENT_S", 0)
+    monkeypatch.setattr(predict, "model", None)
+    monkeypatch.setattr(predict, "MODEL_VERSION", "ancien")
+    monkeypatch.setitem(predict._rechargement, "mtime", 0)
+    predict.recharger_si_modifie()
+    assert isinstance(predict.model, HistGradientBoostingRegressor)
+    assert predict.MODEL_VERSION.startswith("HistGradientBoosting_test.pkl:")
+    np.testing.assert_allclose(predict.dispatcheur.predict(X[:3]), hgb.predict(X[:3]))
+
+
+def test_artefact_defaut_suit_le_nom_d_entrainement(tmp_path):
+    ancien, nouveau = tmp_path / "RandomForest_covid.pkl", tmp_path / "RandomForest_covid-19.pkl"
+    assert artefact_defaut(str(tmp_path)) == str(nouveau)
+    ancien.write_bytes(b"")
+    assert artefact_defaut(str(tmp_path)) == str(ancien)
+    nouveau.write_bytes(b"")
+    assert artefact_defaut(str(tmp_path)) == str(nouveau)
+
+
+def test_nom_artefact_distingue_les_lags():
+    assert nom_artefact("COVID-19") == "RandomForest_covid-19"
+    assert nom_artefact("COVID-19", "nouveau_mort", "hgb", 14) == "HistGradientBoosting_covid-19_nouveau_mort_l14"
+    assert nom_artefact("COVID-19", n_lags=14) != nom_artefact("COVID-19")
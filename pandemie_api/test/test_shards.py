@@ -0,0 +1,110 @@
+import os
+import json
+import threading
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+import predict
+from training import creer_features, matrices, sauvegarder_artefact
+from shards import definir_shards, ecrire_index, CacheShards
+
+
+def creer_shards(dossier, df_feats, shards):
+    for nom, pays_ids in shards.items():
+        X, y, cols = matrices(df_feats[df_feats["pays_id"].isin(pays_ids)])
+        rf = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+        sauvegarder_artefact(rf, cols, dossier, nom)
+    ecrire_index(dossier, shards, "pays", 1, "nouveau_cas")
+
+
+def test_definir_shards(donnees_synthetiques):
+    df_feats = creer_features(donnees_synthetiques(3, 60), avec_pays=True)
+    df_feats = df_feats[(df_feats["pays_id"] != 3) | (df_feats.index >= "2021-02-20")]
+    assert definir_shards(df_feats, min_lignes=30) == {"pays_1": [1], "pays_2": [2]}
+    par_continent = definir_shards(df_feats, "continent", {1: 5, 2: 5, 3: 7}, min_lignes=30)
+    assert par_continent == {"continent_5": [1, 2]}
+
+
+def test_lru_borne_en_memoire(tmp_path, donnees_synthetiques):
+    df_feats = creer_features(donnees_synthetiques(3, 60), avec_pays=True)
+    creer_shards(str(tmp_path), df_feats, {f"pays_{p}": [p] for p in (1, 2, 3)})
+    taille = os.path.getsize(tmp_path / "pays_1.npz")
+    # budget pour deux shards environ
+    cache = CacheShards(str(tmp_path), predict.charger_modele, max_mo=2.5 * taille / 1e6)
+    assert cache.modele_pour(1, 4) is None
+    for pays_id in (1, 2, 1, 3):
+        cache.modele_pour(1, pays_id)
+    m = cache.metriques()
+    assert (m["hits"], m["misses"], m["evictions"]) == (1, 3, 1)
+    # pays_2 était le moins récemment utilisé
+    assert list(cache._lru) == ["pays_1.pkl", "pays_3.pkl"]
+    assert m["memoire_mo"] <= m["max_mo"]
+
+
+def test_prevision_shard_et_repli_global(tmp_path, monkeypatch, donnees_synthetiques, modele_persistance):
+    df = donnees_synthetiques(3, 60)
+    df_feats = creer_features(df, avec_pays=True)
+    creer_shards(str(tmp_path), df_feats, {"pays_1": [1]})
+    monkeypatch.setattr(predict, "shards", CacheShards(str(tmp_path), predict.charger_modele))
+    global_ = modele_persistance
+    monkeypatch.setattr(predict, "model", global_)
+
+    prev = predict.prevoir_par_modele(df, horizon=3, pandemie_id=1)
+    assert len(prev) == 9 and prev["pays_id"].tolist() == [1] * 3 + [2] * 3 + [3] * 3
+    # les pays 2 et 3 avancent ensemble avec le modèle global, le pays 1 avec son shard
+    assert global_.appels == [(2, global_.n_features_in_)] * 3
+    assert predict.shards.metriques()["shards_charges"] == 1
+
+
+def test_predict_by_name_lags_du_shard(tmp_path, monkeypatch, donnees_synthetiques):
+    df = donnees_synthetiques(1, 60)
+    X, y, cols = matrices(creer_features(df, n_lags=3, avec_pays=True))
+    rf = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    sauvegarder_artefact(rf, cols, str(tmp_path), "pays_1")
+    ecrire_index(str(tmp_path), {"pays_1": [1]}, "pays", 1, "nouveau_cas")
+    monkeypatch.setattr(predict, "shards", CacheShards(str(tmp_path), predict.charger_modele))
+    monkeypatch.setattr(predict, "recharger_si_modifie", lambda: None)
+    monkeypatch.setattr(predict, "get_pandemie_id", lambda nom: 1)
+    monkeypatch.setattr(predict, "get_pays_id", lambda code: 1)
+    monkeypatch.setattr(predict, "charger_donnees", lambda pandemie_id: df)
+
+    # shard entraîné avec 3 lags : les features in-sample suivent le modèle, pas le défaut de 7
+    resultats = predict.predict_by_name("covid", "FR", horizon=2)
+    assert len(resultats) == len(creer_features(df, n_lags=3)) + 2
+
+
+def test_shard_servi_pour_sa_pandemie_et_sa_cible_seulement(tmp_path, donnees_synthetiques):
+    df_feats = creer_features(donnees_synthetiques(1, 60), avec_pays=True)
+    creer_shards(str(tmp_path), df_feats, {"pays_1": [1]})
+    cache = CacheShards(str(tmp_path), predict.charger_modele)
+    assert cache.modele_pour(1, 1) is not None
+    assert cache.modele_pour(2, 1) is None and not cache.a_shard(2, 1)
+    assert CacheShards(str(tmp_path), predict.charger_modele, cible="nouveau_mort").modele_pour(1, 1) is None
+
+    # index antérieur, sans pandémie : aucun shard servi
+    index = json.loads((tmp_path / "shards.json").read_text())
+    del index["pandemie_id"]
+    (tmp_path / "shards.json").write_text(json.dumps(index))
+    assert CacheShards(str(tmp_path), predict.charger_modele).modele_pour(1, 1) is None
+
+
+def test_chargement_froid_hors_verrou(tmp_path, donnees_synthetiques):
+    df_feats = creer_features(donnees_synthetiques(2, 60), avec_pays=True)
+    creer_shards(str(tmp_path), df_feats, {"pays_1": [1], "pays_2": [2]})
+    demarre, libere = threading.Event(), threading.Event()
+
+    def charger_lent(chemin):
+        if chemin.endswith("pays_2.pkl"):
+            demarre.set()
+            libere.wait(5)
+        return predict.charger_modele(chemin)
+
+    cache = CacheShards(str(tmp_path), charger_lent)
+    cache.modele_pour(1, 1)
+    froid = threading.Thread(target=cache.modele_pour, args=(1, 2))
+    froid.start()
+    assert demarre.wait(5)
+    # pendant le chargement du shard 2, un hit sur le shard 1 n'attend pas
+    assert cache.modele_pour(1, 1) is not None and cache.metriques()["hits"] == 1
+    libere.set()
+    froid.join()
+    assert cache.metriques()["shards_charges"] == 2
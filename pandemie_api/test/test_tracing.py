@@ -0,0 +1,92 @@
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+import tracing
+
+engine = create_engine("sqlite:///:memory:")
+tracing.instrumenter_sqlalchemy()
+
+app = FastAPI()
+app.middleware("http")(tracing.middleware_tracing)
+
+
+@tracing.tracer()
+def lire_valeur(n):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT :n + 1"), {"n": n}).scalar()
+
+
+@app.get("/erreur")
+def route_erreur():
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("SELECT * FROM table_absente"))
+        except Exception:
+            pass
+        conn.execute(text("SELECT 1"))
+        return {"debuts_en_attente": len(conn.info.get("debuts_sql", []))}
+
+
+@app.get("/valeur/{n}")
+def route_valeur(n: int):
+    with tracing.span("calcul", n=n):
+        return {"valeur": lire_valeur(n)}
+
+
+client = TestClient(app)
+
+
+def _spans(fichier):
+    lignes = fichier.read_text(encoding="utf-8").splitlines()
+    return json.loads(lignes[-1])["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+
+def test_spans_imbriques_exportes(tmp_path, monkeypatch):
+    fichier = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "ACTIF", True)
+    monkeypatch.setattr(tracing, "FICHIER", str(fichier))
+
+    reponse = client.get("/valeur/41")
+    assert reponse.json() == {"valeur": 42}
+    spans = {s["name"]: s for s in _spans(fichier)}
+    assert set(spans) == {"GET /valeur/{n}", "calcul", "test.test_tracing.lire_valeur", "sql"}
+
+    racine = spans["GET /valeur/{n}"]
+    assert reponse.headers["X-Trace-Id"] == racine["traceId"]
+    assert racine["parentSpanId"] == ""
+    assert spans["calcul"]["parentSpanId"] == racine["spanId"]
+    assert spans["test.test_tracing.lire_valeur"]["parentSpanId"] == spans["calcul"]["spanId"]
+    assert spans["sql"]["parentSpanId"] == spans["test.test_tracing.lire_valeur"]["spanId"]
+    attributs = {a["key"]: a["value"] for a in spans["sql"]["attributes"]}
+    assert attributs["db.statement"]["stringValue"] == "SELECT ? + 1"
+
+
+def test_traceparent_entrant_repris(tmp_path, monkeypatch):
+    fichier = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "ACTIF", True)
+    monkeypatch.setattr(tracing, "FICHIER", str(fichier))
+    trace_id, parent = "ab" * 16, "cd" * 8
+
+    reponse = client.get("/valeur/1", headers={"traceparent": f"00-{trace_id}-{parent}-01"})
+    assert reponse.headers["X-Trace-Id"] == trace_id
+    racine = [s for s in _spans(fichier) if s["name"] == "GET /valeur/{n}"][0]
+    assert racine["parentSpanId"] == parent
+
+
+def test_inactif_sans_trace(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "FICHIER", str(tmp_path / "traces.jsonl"))
+    reponse = client.get("/valeur/1")
+    assert "X-Trace-Id" not in reponse.headers
+    assert not (tmp_path / "traces.jsonl").exists()
+
+
+def test_sql_en_erreur_ne_laisse_pas_de_debut(tmp_path, monkeypatch):
+    fichier = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "ACTIF", True)
+    monkeypatch.setattr(tracing, "FICHIER", str(fichier))
+
+    assert client.get("/erreur").json() == {"debuts_en_attente": 0}
+    sql = [s for s in _spans(fichier) if s["name"] == "sql"]
+    assert [s["status"]["code"] for s in sql] == [2, 1]
+    assert "table_absente" in sql[0]["status"]["message"]
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, event
+import training
+from generateur import generer
+
+
+def test_charger_donnees_types_et_depuis(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'suivis.db'}")
+    generer(engine, n_pays=5, n_jours=40, n_pandemies=2, graine=0)
+    monkeypatch.setattr(training, "get_engine", lambda: engine)
+    brut = pd.read_sql("SELECT * FROM suivi_pandemie WHERE id_pandemie = 1", engine, parse_dates=["date_jour"])
+
+    df = training.charger_donnees(1, taille_chunk=37)
+    assert len(df) == len(brut) == 5 * 40
+    assert df.index.name == "date_jour" and df.index.is_monotonic_increasing
+    assert df["pays_id"].dtype == "category" and df["pays_id"].cat.categories.dtype == "int32"
+    assert list(df["pays_id"].cat.categories) == sorted(brut["pays_id"].unique())
+    assert all(df[c].dtype == np.float32 for c in training.COLONNES_MESURES)
+    attendu = brut.sort_values(["date_jour", "pays_id"])
+    np.testing.assert_array_equal(df["nouveau_cas"].to_numpy(), attendu["nouveau_cas"].to_numpy(np.float32))
+
+    depuis = brut["date_jour"].min() + pd.Timedelta(days=30)
+    recent = training.charger_donnees(1, taille_chunk=7, depuis=depuis)
+    assert len(recent) == 5 * 10 and recent.index.min() == depuis
+    pd.testing.assert_frame_equal(recent, df[df.index >= depuis])
+
+
+def test_charger_donnees_par_pages(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'suivis.db'}")
+    generer(engine, n_pays=5, n_jours=40, n_pandemies=1, graine=0)
+    monkeypatch.setattr(training, "get_engine", lambda: engine)
+    pages = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def noter(conn, cursor, statement, parameters, context, executemany):
+        if "LIMIT" in statement:
+            pages.append(parameters)
+
+    df = training.charger_donnees(1, taille_chunk=37)
+    # 200 lignes : 5 pages pleines et une de 15, chacune une requête bornée par LIMIT
+    assert len(df) == 200 and len(pages) == 6
+    assert all(37 in p for p in pages)
+    pd.testing.assert_frame_equal(df, training.charger_donnees(1, taille_chunk=1000))
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+pandemie_api/tracing.py
+
+Traces légères par requête, sans collecteur : router -> crud -> SQL -> features -> modèle.
+- Une trace par requête HTTP (middleware enregistré dans main.py si TRACING_ACTIF=1) ; l'identifiant
+  est repris de l'en-tête W3C traceparent s'il est fourni et renvoyé dans X-Trace-Id et traceparent
+- Spans imbriqués via contextvars : @tracer() sur les fonctions (crud, charger_donnees,
+  creer_features...), `with span("model.predict")` sur un bloc ; le contexte suit les routes
+  synchrones dans le pool de threads de FastAPI
+- Requêtes SQL tracées par les événements SQLAlchemy before/after_cursor_execute (instrumenter_sqlalchemy) ;
+  une requête en erreur (handle_error) donne un span en erreur et ne laisse pas de début en attente
+  sur la connexion du pool
+- Hors requête tracée, @tracer et span ne coûtent qu'une lecture de contextvar
+- Export : une ligne JSON par trace au format OTLP/JSON (resourceSpans, comme le file exporter
+  d'OpenTelemetry) dans TRACING_FICHIER, renommé en .1 au-delà de TRACING_MAX_MO ; l'écriture
+  passe par le pool de threads, hors de la boucle d'évènements
+"""
+import os
+import json
+import time
+import secrets
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+ACTIF = os.getenv("TRACING_ACTIF", "0") == "1"
+FICHIER = os.getenv("TRACING_FICHIER", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".traces", "traces.jsonl"))
+MAX_MO = float(os.getenv("TRACING_MAX_MO", "100"))
+SERVICE = "pandemie_api"
+LONGUEUR_SQL = 500
+
+_trace = ContextVar("trace", default=None)
+_parent = ContextVar("span_parent", default=None)
+_verrou_fichier = threading.Lock()
+
+
+# ----------------------------------------------------------------------
+class Trace:
+    """Spans terminés d'une requête ; partagée par les threads qui la servent."""
+
+    def __init__(self, trace_id: str = None):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.spans = []
+        self._verrou = threading.Lock()
+
+    def ajouter(self, nom: str, debut_ns: int, fin_ns: int, parent: str, attributs: dict,
+                span_id: str = None, erreur: str = None):
+        s = {"traceId": self.trace_id, "spanId": span_id or secrets.token_hex(8), "parentSpanId": parent or "",
+             "name": nom, "kind": 1, "startTimeUnixNano": str(debut_ns), "endTimeUnixNano": str(fin_ns),
+             "attributes": [{"key": k, "value": _valeur_otlp(v)} for k, v in attributs.items()],
+             "status": {"code": 2, "message": erreur} if erreur else {"code": 1}}
+        with self._verrou:
+            self.spans.append(s)
+
+def _valeur_otlp(v) -> dict:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+@contextmanager
+def span(nom: str, **attributs):
+    """Span enfant du span courant ; ne fait rien hors d'une trace. Renvoie les attributs (modifiables)."""
+    trace = _trace.get()
+    if trace is None:
+        yield attributs
+        return
+    span_id, parent = secrets.token_hex(8), _parent.get()
+    jeton = _parent.set(span_id)
+    debut, erreur = time.time_ns(), None
+    try:
+        yield attributs
+    except Exception as e:
+        erreur = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _parent.reset(jeton)
+        trace.ajouter(nom, debut, time.time_ns(), parent, attributs, span_id, erreur)
+
+def tracer(nom: str = None):
+    """Décorateur : un span par appel, nommé `module.fonction` par défaut."""
+    def decorateur(fonction):
+        nom_span = nom or f"{fonction.__module__}.{fonction.__name__}"
+
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            if _trace.get() is None:
+                return fonction(*args, **kwargs)
+            with span(nom_span):
+                return fonction(*args, **kwargs)
+        return enveloppe
+    return decorateur
+
+# ----------------------------------------------------------------------
+def _avant_sql(conn, cursor, statement, parameters, context, executemany):
+    if _trace.get() is not None:
+        conn.info.setdefault("debuts_sql", []).append(time.time_ns())
+
+def _apres_sql(conn, cursor, statement, parameters, context, executemany):
+    trace = _trace.get()
+    debuts = conn.info.get("debuts_sql")
+    if trace is None or not debuts:
+        return
+    trace.ajouter("sql", debuts.pop(), time.time_ns(), _parent.get(), {
+        "db.system": conn.dialect.name,
+        "db.statement": " ".join(statement.split())[:LONGUEUR_SQL],
+        "db.executemany": executemany,
+        "db.rows": cursor.rowcount,
+    })
+
+def _erreur_sql(contexte):
+    trace = _trace.get()
+    if trace is None or contexte.connection is None:
+        return
+    debuts = contexte.connection.info.get("debuts_sql")
+    if not debuts:
+        return
+    trace.ajouter("sql", debuts.pop(), time.time_ns(), _parent.get(), {
+        "db.system": contexte.dialect.name,
+        "db.statement": " ".join((contexte.statement or "").split())[:LONGUEUR_SQL],
+    }, erreur=f"{type(contexte.original_exception).__name__}: {contexte.original_exception}")
+
+def instrumenter_sqlalchemy():
+    """Trace toutes les requêtes SQL de tous les Engine (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _avant_sql):
+        event.listen(Engine, "before_cursor_execute", _avant_sql)
+        event.listen(Engine, "after_cursor_execute", _apres_sql)
+        event.listen(Engine, "handle_error", _erreur_sql)
+
+# ----------------------------------------------------------------------
+def exporter(trace: Trace, fichier: str = None, max_mo: float = None):
+    """Ajoute la trace (OTLP/JSON, une ligne) au fichier d'export, avec rotation au-delà de max_mo."""
+    fichier = fichier or FICHIER
+    max_mo = MAX_MO if max_mo is None else max_mo
+    ligne = json.dumps({"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE}}]},
+        "scopeSpans": [{"scope": {"name": "tracing"}, "spans": trace.spans}],
+    }]})
+    with _verrou_fichier:
+        os.makedirs(os.path.dirname(fichier) or ".", exist_ok=True)
+        if os.path.exists(fichier) and os.path.getsize(fichier) > max_mo * 1e6:
+            os.replace(fichier, fichier + ".1")
+        with open(fichier, "a", encoding="utf-8") as f:
+            f.write(ligne + "\n")
+
+def _lire_traceparent(entete: str):
+    """(trace_id, span parent) d'un en-tête W3C 00-<32 hex>-<16 hex>-<flags>, ou (None, None)."""
+    parties = (entete or "").split("-")
+    if len(parties) == 4 and len(parties[1]) == 32 and len(parties[2]) == 16:
+        try:
+            int(parties[1], 16), int(parties[2], 16)
+            return parties[1], parties[2]
+        except ValueError:
+            pass
+    return None, None
+
+async def middleware_tracing(request, call_next):
+    if not ACTIF:
+        return await call_next(request)
+    trace_id, parent = _lire_traceparent(request.headers.get("traceparent"))
+    trace = Trace(trace_id)
+    jeton_trace, jeton_parent = _trace.set(trace), _parent.set(parent)
+    try:
+        with span(f"{request.method} {request.url.path}", **{
+                "http.method": request.method, "http.target": request.url.path}) as attributs:
+            reponse = await call_next(request)
+            attributs["http.status_code"] = reponse.status_code
+    finally:
+        _trace.reset(jeton_trace)
+        _parent.reset(jeton_parent)
+        racine = next(s for s in trace.spans if s["parentSpanId"] == (parent or ""))
+        # nom de route (/predict/{maladie}/{pays}) plutôt que le chemin, pour regrouper les traces
+        route = request.scope.get("route")
+        if route is not None:
+            racine["name"] = f"{request.method} {route.path}"
+            racine["attributes"].append({"key": "http.route", "value": {"stringValue": route.path}})
+        await run_in_threadpool(exporter, trace)
+    reponse.headers["X-Trace-Id"] = trace.trace_id
+    reponse.headers["traceparent"] = f"00-{trace.trace_id}-{racine['spanId']}-01"
+    return reponse
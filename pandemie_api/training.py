@@ -3,29 +3,63 @@
 """
 training.py
 
-Script d'entraînement d'un modèle RandomForest par pays.
+Script d'entraînement d'un modèle RandomForest (ou HistGradientBoosting, --model hgb) par pays.
+Le modèle est global (tous pays) ; shards.py entraîne des modèles par pays ou par continent.
 - Génération de lags, rolling stats, indicateurs et variables cycliques
 - Transformation log1p de la cible pour stabiliser la variance
 - TimeSeriesSplit en cross-validation pour robustesse
-- Recherche d'hyperparamètres (GridSearchCV)
-- Évaluation finale sur hold-out
-- Sauvegarde du meilleur modèle et des noms de features
+- Recherche d'hyperparamètres : grille exhaustive (GridSearchCV), successive halving
+  (sur n_estimators ou n_samples) ou aléatoire sous budget de fits / de temps (--search)
+- --reprise : scores (configuration, fold) persistés au fil de l'eau, une relance ne refait
+  que les fits manquants pour la même version des données et des features (magasin_recherche.py)
+- Évaluation finale sur hold-out (10 % les plus récents) ; --backtest N ajoute un backtest
+  à N origines glissantes de la prévision récursive, par pays et horizon (backtest.py),
+  écrit dans <base>_backtest.csv
+- Sauvegarde du meilleur modèle et des noms de features, nommés d'après le modèle, la pandémie
+  et la cible : RandomForest_<maladie>[_<cible>].pkl ou HistGradientBoosting_<maladie>[_<cible>].pkl
+  (voir orchestrateur.py pour plusieurs jobs, comparer_modeles.py pour comparer les deux backends)
+- Export de la forêt compacte (.npz) utilisée pour l'inférence (voir foret_compacte.py)
+- Métadonnées de l'artefact (<base>_meta.json) : date de coupure, hyperparamètres, métriques
+- --refresh : mise à jour quotidienne sans recherche (arbres ajoutés en warm_start sur les seules
+  lignes postérieures à la coupure, ou refit avec les hyperparamètres retenus), validée sur la
+  fenêtre la plus récente puis substituée atomiquement (os.replace) à l'artefact servi
 """
 import os
+import re
+import sys
+import copy
+import json
+import time
+import resource
 import joblib
 import argparse
+from functools import lru_cache
 import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import TimeSeriesSplit, GridSearchCV
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+from scipy.stats import randint, loguniform
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (TimeSeriesSplit, GridSearchCV, HalvingGridSearchCV, ParameterGrid,
+                                     ParameterSampler)
 from sklearn.metrics import mean_absolute_error, mean_squared_error
+from foret_compacte import exporter_foret
+from cache_features import charger_ou_calculer
+from magasin_recherche import MagasinResultats, evaluer_configs
+from tracing import tracer
 
 # ----------------------------------------------------------------------
+@lru_cache(maxsize=None)
 def get_engine():
-    """Initialise un SQLAlchemy Engine d'après le .env."""
+    """
+    Initialise (une fois par processus) un SQLAlchemy Engine d'après le .env : MySQL si DB_NAME
+    est défini, sinon DATABASE_URL comme database.py (ex. base SQLite de generateur.py).
+    """
     load_dotenv()
+    if not os.getenv('DB_NAME') and os.getenv('DATABASE_URL'):
+        return create_engine(os.getenv('DATABASE_URL'))
     uri = (
         f"mysql+mysqlconnector://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}"
         f"@{os.getenv('DB_HOST','localhost')}:{os.getenv('DB_PORT','3306')}/" 
@@ -34,20 +68,119 @@ def get_engine():
     return create_engine(uri)
 
 # ----------------------------------------------------------------------
-def charger_donnees(pandemie_id: int) -> pd.DataFrame:
-    df = pd.read_sql("SELECT * FROM suivi_pandemie WHERE id_pandemie = %s",
-                     con=get_engine(), params=(pandemie_id,))
-    if df.empty:
-        raise ValueError(f"Aucune donnée pour pandémie {pandemie_id}.")
-    df["date_jour"] = pd.to_datetime(df["date_jour"])
-    return df.set_index("date_jour").sort_index()
+# Colonnes réellement utilisées par les features et les indicateurs, et leur type en mémoire.
+# Les compteurs sont en float32 (NULL possibles) : au-delà de 2^24 les totaux sont arrondis
+# (erreur relative < 1e-7), sans effet sur les features.
+COLONNES_SUIVI = {
+    'pays_id': 'int32',
+    'nouveau_cas': 'float32',
+    'nouveau_mort': 'float32',
+    'total_cas': 'float32',
+    'total_mort': 'float32',
+}
+TAILLE_CHUNK = 100_000
+COLONNES_MESURES = [c for c in COLONNES_SUIVI if c != 'pays_id']
+
+def _typer_chunk(chunk: pd.DataFrame, pays: pd.Index) -> pd.DataFrame:
+    """Types finaux d'un chunk : dates parsées, compteurs float32, pays_id catégoriel sur `pays`."""
+    chunk['date_jour'] = pd.to_datetime(chunk['date_jour'])
+    chunk = chunk.astype({c: COLONNES_SUIVI[c] for c in COLONNES_MESURES})
+    chunk['pays_id'] = pd.Categorical(chunk['pays_id'], categories=pays)
+    return chunk
+
+def _pages(conn, select: str, where: str, params: dict, taille: int):
+    """
+    Pages de `taille` lignes au plus, triées par (date_jour, pays_id) et reprises après la dernière clé
+    lue (pagination par clé, unique par pandémie) : aucun driver ne tient plus d'une page en mémoire,
+    y compris mysqlconnector dont le curseur client charge tout le résultat d'une requête.
+    """
+    reprise = ""
+    while True:
+        page = pd.read_sql(text(f"{select} {where}{reprise} ORDER BY date_jour, pays_id LIMIT :taille"),
+                           con=conn, params={**params, "taille": taille})
+        if page.empty:
+            return
+        yield page
+        if len(page) < taille:
+            return
+        derniere = page.iloc[-1]
+        params = {**params, "d": pd.Timestamp(derniere['date_jour']).date(), "p": int(derniere['pays_id'])}
+        reprise = " AND (date_jour > :d OR (date_jour = :d AND pays_id > :p))"
+
+@tracer()
+def charger_donnees(pandemie_id: int, taille_chunk: int = TAILLE_CHUNK, depuis=None) -> pd.DataFrame:
+    """
+    Charge les suivis d'une pandémie, indexés par date_jour (triés côté SQL).
+    Seules les colonnes utiles sont lues, par pages de taille_chunk lignes (_pages), typées page par page
+    (int32/float32, dates parsées une fois, pays_id catégoriel aux catégories fixées d'avance) et
+    recopiées dans des tableaux préalloués d'après COUNT(*) : le résultat n'est jamais tenu deux fois.
+    depuis : ne lit que les dates >= depuis (mise à jour incrémentale).
+    """
+    params = {"id": pandemie_id}
+    filtre = ""
+    if depuis is not None:
+        filtre = " AND date_jour >= :depuis"
+        params["depuis"] = pd.Timestamp(depuis).date()
+    where = f"FROM suivi_pandemie WHERE id_pandemie = :id{filtre}"
+    select = f"SELECT date_jour, {', '.join(COLONNES_SUIVI)}"
+    with get_engine().connect() as conn:
+        # même transaction que la lecture des pages
+        n = conn.execute(text(f"SELECT COUNT(*) {where}"), params).scalar()
+        pays = pd.Index(conn.execute(text(f"SELECT DISTINCT pays_id {where} ORDER BY pays_id"), params).scalars().all(),
+                        dtype='int32')
+        if not n:
+            raise ValueError(f"Aucune donnée pour pandémie {pandemie_id}.")
+        dates = np.empty(n, dtype='datetime64[ns]')
+        codes = np.empty(n, dtype=np.int16 if len(pays) < 2**15 else np.int32)
+        mesures = np.empty((n, len(COLONNES_MESURES)), dtype=np.float32)
+        i = 0
+        for chunk in _pages(conn, select, where, params, taille_chunk):
+            chunk = _typer_chunk(chunk, pays)
+            j = i + len(chunk)
+            if j > n or (chunk['pays_id'].cat.codes < 0).any():
+                raise RuntimeError(f"suivi_pandemie modifiée pendant la lecture de la pandémie {pandemie_id}, relancer")
+            dates[i:j] = chunk['date_jour'].to_numpy()
+            codes[i:j] = chunk['pays_id'].cat.codes.to_numpy()
+            mesures[i:j] = chunk[COLONNES_MESURES].to_numpy()
+            i = j
+    # vues sur les tableaux (pas de copie) ; i < n si des lignes ont été supprimées entre-temps
+    df = pd.DataFrame(mesures[:i], columns=COLONNES_MESURES, copy=False)
+    df.insert(0, 'pays_id', pd.Categorical.from_codes(codes[:i], categories=pays))
+    df.index = pd.DatetimeIndex(dates[:i], name='date_jour')
+    return df
+
+def pic_memoire_mo() -> float:
+    """Pic de mémoire résidente (RSS) du processus, en Mo."""
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux : Ko, macOS : octets
+    return pic / 1024 if sys.platform != 'darwin' else pic / 1024**2
+
+# ----------------------------------------------------------------------
+def version_donnees(pandemie_id: int, engine=None) -> str:
+    """Empreinte légère des données d'une pandémie : nb de lignes, dernier lot ETL, dernière date."""
+    with (engine or get_engine()).connect() as conn:
+        ligne = conn.execute(
+            text("SELECT COUNT(*), MAX(id_logging), MAX(date_jour) FROM suivi_pandemie WHERE id_pandemie = :id"),
+            {"id": pandemie_id},
+        ).one()
+    return "-".join(str(v) for v in ligne)
+
+# ----------------------------------------------------------------------
+def serie_journaliere(group: pd.DataFrame) -> pd.DataFrame:
+    """Agrège les lignes d'un pays par jour et complète les dates manquantes par 0."""
+    return (group.groupby(level=0).agg({'nouveau_cas': 'sum', 'nouveau_mort': 'sum', 'total_cas': 'max'})
+                 .reindex(pd.date_range(group.index.min(), group.index.max(), freq='D'), fill_value=0))
 
 # ----------------------------------------------------------------------
-def creer_features(df: pd.DataFrame, n_lags: int = 7) -> pd.DataFrame:
+# à incrémenter à chaque changement de creer_features : invalide le cache disque des features
+VERSION_FEATURES = 1
+
+@tracer()
+def creer_features(df: pd.DataFrame, n_lags: int = 7, avec_pays: bool = False) -> pd.DataFrame:
+    """avec_pays=True ajoute une colonne pays_id (à exclure de X) pour regrouper par pays."""
     feats_list = []
-    for pays_id, group in df.groupby("pays_id"):
-        g = (group.groupby(level=0).agg({'nouveau_cas': 'sum', 'nouveau_mort': 'sum', 'total_cas': 'max'})
-                .reindex(pd.date_range(group.index.min(), group.index.max(), freq='D'), fill_value=0))
+    for pays_id, group in df.groupby("pays_id", observed=True):
+        g = serie_journaliere(group)
         feats = pd.DataFrame(index=g.index)
         feats[['nouveau_cas','nouveau_mort','total_cas']] = g[['nouveau_cas','nouveau_mort','total_cas']]
         # lags
@@ -72,64 +205,442 @@ def creer_features(df: pd.DataFrame, n_lags: int = 7) -> pd.DataFrame:
         feats = feats.replace([np.inf, -np.inf], np.nan)
         feats = feats.clip(lower=0)
         feats = feats.dropna()
+        if avec_pays:
+            feats.insert(0, 'pays_id', pays_id)
         feats_list.append(feats)
     return pd.concat(feats_list).sort_index()
 
+def features_pandemie(pandemie_id: int, n_lags: int = 7, utiliser_cache: bool = True) -> pd.DataFrame:
+    """
+    creer_features(avec_pays=True) de toute la pandémie, lu depuis le cache disque tant que
+    les données (version_donnees) et le code des features (VERSION_FEATURES) n'ont pas changé.
+    """
+    parties = ('features', pandemie_id, n_lags, VERSION_FEATURES, version_donnees(pandemie_id))
+    return charger_ou_calculer(
+        parties, lambda: creer_features(charger_donnees(pandemie_id), n_lags, avec_pays=True), utiliser_cache)
+
 # ----------------------------------------------------------------------
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('pandemie_id', type=int)
-    parser.add_argument('-l','--n_lags', type=int, default=7)
-    parser.add_argument('-o','--out', type=str, default='model/')
-    args = parser.parse_args()
+PARAM_GRID = {
+    'n_estimators': [100,200,300],
+    'max_depth': [5,10,None],
+    'min_samples_leaf': [1,2,5],
+    'max_features':[None, "sqrt", "log2"]
+}
+# espace de la recherche aléatoire : mêmes axes, valeurs intermédiaires possibles
+PARAM_DISTRIBUTIONS = {
+    'n_estimators': randint(50, 301),
+    'max_depth': [5, 10, 15, 20, None],
+    'min_samples_leaf': randint(1, 8),
+    'max_features': [None, "sqrt", "log2", 0.5]
+}
+# HistGradientBoosting : features binnées (256 bins), arbres peu profonds en boosting
+PARAM_GRID_HGB = {
+    'max_iter': [100,200,300],
+    'learning_rate': [0.05,0.1,0.2],
+    'max_leaf_nodes': [15,31,63],
+    'min_samples_leaf': [10,20,40]
+}
+PARAM_DISTRIBUTIONS_HGB = {
+    'max_iter': randint(50, 501),
+    'learning_rate': loguniform(0.01, 0.3),
+    'max_leaf_nodes': randint(8, 128),
+    'min_samples_leaf': randint(5, 60),
+    'l2_regularization': [0.0, 0.1, 1.0]
+}
+SCORING = 'neg_mean_absolute_error'
+N_SPLITS = 5
 
-    # données & features
-    df = charger_donnees(args.pandemie_id)
-    df_feats = creer_features(df, args.n_lags)
-    X = df_feats.drop(columns=['nouveau_cas','nouveau_mort','total_cas']).values
-    y = np.log1p(df_feats['nouveau_cas'].values)
-    feature_cols = df_feats.drop(columns=['nouveau_cas','nouveau_mort','total_cas']).columns.tolist()
+# backend -> (préfixe des artefacts, grille, distributions, paramètre "nombre d'arbres")
+MODELES = {
+    'rf': ('RandomForest', PARAM_GRID, PARAM_DISTRIBUTIONS, 'n_estimators'),
+    'hgb': ('HistGradientBoosting', PARAM_GRID_HGB, PARAM_DISTRIBUTIONS_HGB, 'max_iter'),
+}
+
+def creer_estimateur(modele: str = 'rf'):
+    """Estimateur de base du backend ; l'early stopping de HGB (split aléatoire) est désactivé
+    pour ne pas mélanger passé et futur, le nombre d'itérations est cherché en CV."""
+    if modele == 'hgb':
+        return HistGradientBoostingRegressor(early_stopping=False, random_state=42)
+    return RandomForestRegressor(random_state=42)
+
+def recherche_aleatoire_budget(estimateur, X, y, cv, budget_fits: int = None, budget_s: float = None,
+                               n_jobs: int = -1, random_state: int = 42, distributions: dict = None,
+                               magasin: MagasinResultats = None):
+    """
+    Évalue des configurations tirées de `distributions` (PARAM_DISTRIBUTIONS par défaut) jusqu'à
+    épuisement du budget (nombre de fits ou secondes). Les tirages étant reproductibles, une reprise
+    (magasin) relit les premières configurations sans les compter dans le budget.
+    Renvoie (meilleurs_params, DataFrame des résultats).
+    """
+    if budget_fits is None and budget_s is None:
+        budget_fits = 20 * cv.get_n_splits()
+    fin = time.perf_counter() + budget_s if budget_s else None
+    magasin = magasin if magasin is not None else MagasinResultats()
+    resultats, n_fits = [], 0
+    for params in ParameterSampler(distributions or PARAM_DISTRIBUTIONS, n_iter=10**6, random_state=random_state):
+        deja_faits = sum(magasin.score(params, k) is not None for k in range(cv.get_n_splits()))
+        if budget_fits is not None and n_fits + cv.get_n_splits() - deja_faits > budget_fits:
+            break
+        if fin is not None and time.perf_counter() >= fin and deja_faits < cv.get_n_splits():
+            break
+        df_config, nouveaux = evaluer_configs(estimateur, [params], X, y, cv, SCORING, magasin, n_jobs)
+        n_fits += nouveaux
+        resultats.append(df_config.iloc[0].to_dict())
+    if not resultats:
+        raise ValueError("Budget insuffisant pour évaluer une seule configuration.")
+    df_res = pd.DataFrame(resultats)
+    return df_res.loc[df_res['score'].idxmax(), 'params'], df_res
+
+def rechercher_hyperparametres(X, y, methode: str = 'grid', ressource: str = 'n_estimators',
+                               budget_fits: int = None, budget_s: float = None, n_jobs: int = -1,
+                               modele: str = 'rf', magasin: MagasinResultats = None):
+    """
+    Recherche d'hyperparamètres du backend `modele` ('rf' ou 'hgb') en TimeSeriesSplit (N_SPLITS folds).
+    methode : 'grid' (81 configs exhaustives), 'halving' (successive halving sur `ressource`,
+              'n_estimators' désignant le nombre d'arbres : max_iter pour hgb)
+              ou 'random' (tirages sous budget de fits et/ou de secondes).
+    magasin : scores (configuration, fold) déjà connus et persistés au fil de l'eau ('grid', 'random').
+    Renvoie (meilleur estimateur réentraîné, meilleurs params, DataFrame params/score/duree_s).
+    """
+    tscv = TimeSeriesSplit(n_splits=N_SPLITS)
+    _, param_grid, distributions, param_arbres = MODELES[modele]
+    estimateur = creer_estimateur(modele)
+
+    if methode == 'random':
+        best_params, df_res = recherche_aleatoire_budget(estimateur, X, y, tscv, budget_fits, budget_s,
+                                                         n_jobs, distributions=distributions, magasin=magasin)
+        best = clone(estimateur).set_params(**best_params).fit(X, y)
+        return best, best_params, df_res
+
+    if magasin is not None:
+        if methode == 'halving':
+            raise ValueError("La reprise n'est disponible qu'avec --search grid ou random.")
+        df_res, nouveaux = evaluer_configs(estimateur, list(ParameterGrid(param_grid)), X, y, tscv,
+                                           SCORING, magasin, n_jobs)
+        print(f"Reprise : {len(df_res) * N_SPLITS - nouveaux} fits relus, {nouveaux} exécutés")
+        best_params = df_res.loc[df_res['score'].idxmax(), 'params']
+        best = clone(estimateur).set_params(**best_params).fit(X, y)
+        return best, best_params, df_res
+
+    if methode == 'halving':
+        grille = dict(param_grid)
+        kwargs = {'resource': ressource, 'min_resources': 'exhaust', 'factor': 3}
+        if ressource == 'n_estimators':
+            kwargs['resource'] = param_arbres
+            kwargs['max_resources'] = max(grille.pop(param_arbres))
+        search = HalvingGridSearchCV(estimateur, grille, cv=tscv, scoring=SCORING, n_jobs=n_jobs, **kwargs)
+    else:
+        search = GridSearchCV(estimateur, param_grid, cv=tscv, scoring=SCORING, n_jobs=n_jobs)
+    search.fit(X, y)
+
+    cv = search.cv_results_
+    df_res = pd.DataFrame({
+        'params': cv['params'],
+        'score': cv['mean_test_score'],
+        'duree_s': np.asarray(cv['mean_fit_time']) * tscv.get_n_splits(),
+    })
+    if methode == 'halving':
+        df_res['ressource'] = cv['n_resources']
+    return search.best_estimator_, search.best_params_, df_res
+
+def afficher_recherche(df_res: pd.DataFrame, duree_totale: float, top: int = 10):
+    """Temps par configuration et meilleurs scores (MAE en log1p)."""
+    n_fits = len(df_res) * N_SPLITS
+    print(f"{len(df_res)} évaluations ({n_fits} fits) en {duree_totale:.1f}s, "
+          f"{df_res['duree_s'].mean():.2f}s par configuration en moyenne")
+    df_res = df_res.assign(mae=-df_res['score'])
+    if 'ressource' in df_res.columns:
+        # halving : les scores ne sont comparables qu'à ressource égale, dernière itération en tête
+        meilleurs = df_res.sort_values(['ressource', 'mae'], ascending=[False, True]).head(top)
+        print(meilleurs[['mae', 'duree_s', 'ressource', 'params']].to_string(index=False))
+    else:
+        meilleurs = df_res.sort_values('mae').head(top)
+        print(meilleurs[['mae', 'duree_s', 'params']].to_string(index=False))
+
+# ----------------------------------------------------------------------
+COLONNES_CIBLES = ['nouveau_cas','nouveau_mort','total_cas']
+
+def nom_pandemie(pandemie_id: int, engine=None) -> str:
+    with (engine or get_engine()).connect() as conn:
+        nom = conn.execute(text("SELECT nom_maladie FROM pandemie WHERE id_pandemie = :id"),
+                           {"id": pandemie_id}).scalar()
+    return nom or str(pandemie_id)
+
+def nom_artefact(nom_maladie: str, cible: str = 'nouveau_cas', modele: str = 'rf', n_lags: int = 7) -> str:
+    """Ex. RandomForest_covid-19 (nouveaux cas, 7 lags), RandomForest_covid-19_nouveau_mort,
+    HistGradientBoosting_covid-19 (--model hgb) ou RandomForest_covid-19_l14 (-l 14)."""
+    slug = re.sub(r'[^a-z0-9]+', '-', nom_maladie.lower()).strip('-')
+    base = f"{MODELES[modele][0]}_{slug}"
+    if cible != 'nouveau_cas':
+        base += f"_{cible}"
+    return base if n_lags == 7 else f"{base}_l{n_lags}"
+
+# nom des artefacts antérieurs à nom_artefact, encore servi tant que COVID-19 n'a pas été réentraîné
+ANCIEN_ARTEFACT_DEFAUT = 'RandomForest_covid'
+
+def artefact_defaut(dossier: str) -> str:
+    """
+    Artefact servi par défaut (predict.py, precalcul.py) : celui qu'écrit `training.py 1`
+    (<dossier>/RandomForest_covid-19.pkl), ou l'ancien RandomForest_covid.pkl s'il est seul présent.
+    """
+    chemin = os.path.join(dossier, f"{nom_artefact('COVID-19')}.pkl")
+    ancien = os.path.join(dossier, f"{ANCIEN_ARTEFACT_DEFAUT}.pkl")
+    return ancien if not os.path.exists(chemin) and os.path.exists(ancien) else chemin
+
+def evaluer(best, X_test: np.ndarray, y_test: np.ndarray) -> dict:
+    """Métriques sur le hold-out, à l'échelle réelle (après délog1p)."""
+    y_pred = np.clip(np.expm1(best.predict(X_test)), 0, None)
+    y_true = np.expm1(y_test)
+    return {
+        'mae': mean_absolute_error(y_true, y_pred),
+        'rmse': np.sqrt(mean_squared_error(y_true, y_pred)),
+        'mape': np.mean(np.abs((y_true - y_pred)/np.where(y_true==0,1,y_true))) *100,
+        'moyenne_cible': y_true.mean(),
+    }
+
+PART_TRAIN = 0.9
+
+def matrices(df_feats: pd.DataFrame, cible: str = 'nouveau_cas'):
+    """(X, y en log1p, noms des features) ; la colonne pays_id éventuelle est exclue de X."""
+    df_X = df_feats.drop(columns=COLONNES_CIBLES + ['pays_id'], errors='ignore')
+    return df_X.values, np.log1p(df_feats[cible].values), df_X.columns.tolist()
+
+def entrainer(df_feats: pd.DataFrame, cible: str = 'nouveau_cas', search: str = 'grid',
+              ressource: str = 'n_estimators', budget_fits: int = None, budget_s: float = None,
+              n_jobs: int = -1, modele: str = 'rf', magasin: MagasinResultats = None):
+    """
+    Split chronologique 90/10, recherche d'hyperparamètres et évaluation sur les features
+    de creer_features / features_pandemie (la colonne pays_id éventuelle est exclue de X).
+    Renvoie (meilleur estimateur, noms des features, métriques du hold-out).
+    """
+    X, y, feature_cols = matrices(df_feats, cible)
 
     # split train/test chrono
-    n = len(X)
-    split_idx = int(0.9*n)
+    split_idx = int(PART_TRAIN*len(X))
     X_train, X_test = X[:split_idx], X[split_idx:]
     y_train, y_test = y[:split_idx], y[split_idx:]
-    dates_test = df_feats.index[split_idx:]
-
-    # CV time-series
-    tscv = TimeSeriesSplit(n_splits=5)
-    param_grid = {
-        'n_estimators': [100,200,300],
-        'max_depth': [5,10,None],
-        'min_samples_leaf': [1,2,5],
-        'max_features':[None, "sqrt", "log2"]
+
+    # CV time-series + recherche d'hyperparamètres
+    debut = time.perf_counter()
+    best, best_params, df_res = rechercher_hyperparametres(
+        X_train, y_train, search, ressource, budget_fits, budget_s, n_jobs, modele, magasin)
+    afficher_recherche(df_res, time.perf_counter() - debut)
+    print('Best params:', best_params)
+
+    metriques = evaluer(best, X_test, y_test)
+    # dernière date vue à l'entraînement : le hold-out sera appris au prochain --refresh
+    metriques['date_coupure'] = str(df_feats.index[split_idx-1].date())
+    return best, feature_cols, metriques
+
+def meta_artefact(best, pandemie_id: int, cible: str, n_lags: int, modele: str, metriques: dict) -> dict:
+    """Métadonnées écrites à côté de l'artefact, relues par --refresh."""
+    return {
+        'pandemie_id': pandemie_id, 'cible': cible, 'n_lags': n_lags, 'modele': modele,
+        'date_coupure': metriques['date_coupure'],
+        'date_entrainement': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'params': best.get_params(),
+        'metriques': {k: v for k, v in metriques.items() if k != 'date_coupure'},
     }
-    rf = RandomForestRegressor(random_state=42)
-    grid = GridSearchCV(rf, param_grid, cv=tscv, scoring='neg_mean_absolute_error', n_jobs=-1)
-    grid.fit(X_train, y_train)
-    best = grid.best_estimator_
-    print('Best params:', grid.best_params_)
-
-    # prédiction & évaluation
-    y_pred_log = best.predict(X_test)
-    y_pred = np.clip(np.expm1(y_pred_log), 0, None)
-    y_true = np.expm1(y_test)
-    mae  = mean_absolute_error(y_true, y_pred)
-    mse  = mean_squared_error(y_true, y_pred)
-    rmse = np.sqrt(mse)
-    mape = np.mean(np.abs((y_true - y_pred)/np.where(y_true==0,1,y_true))) *100
 
-    # Calcul de la moyenne de la target réelle
-    mean_target = y_true.mean()
+def chemin_meta(path_pkl: str) -> str:
+    return os.path.splitext(path_pkl)[0] + '_meta.json'
+
+def lire_meta(path_pkl: str) -> dict:
+    chemin = chemin_meta(path_pkl)
+    if not os.path.exists(chemin):
+        raise FileNotFoundError(f"{chemin} absent : réentraîner une fois sans --refresh.")
+    with open(chemin, encoding='utf-8') as f:
+        return json.load(f)
+
+def _ecrire_atomique(ecrire, chemin: str):
+    """Écrit dans un fichier temporaire (même extension) puis le substitue via os.replace."""
+    racine, ext = os.path.splitext(chemin)
+    tmp = f"{racine}.tmp{ext}"
+    ecrire(tmp)
+    os.replace(tmp, chemin)
+
+def _ecrire_json(meta: dict, chemin: str):
+    with open(chemin, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False,
+                  default=lambda v: v.item() if hasattr(v, 'item') else str(v))
+
+def sauvegarder_artefact(best, feature_cols: list, out: str, base: str, meta: dict = None) -> str:
+    """
+    Écrit {base}_feature_names.pkl, pour une forêt {base}.npz, {base}_meta.json puis {base}.pkl,
+    chacun atomiquement. Le .pkl est remplacé en dernier : son mtime déclenche le rechargement
+    dans predict.py une fois les autres fichiers en place.
+    """
+    os.makedirs(out, exist_ok=True)
+    chemin = os.path.join(out, f'{base}.pkl')
+    _ecrire_atomique(lambda p: joblib.dump(feature_cols, p), os.path.join(out, f'{base}_feature_names.pkl'))
+    if hasattr(best, 'estimators_'):
+        _ecrire_atomique(lambda p: exporter_foret(best, p), os.path.join(out, f'{base}.npz'))
+    if meta is not None:
+        _ecrire_atomique(lambda p: _ecrire_json(meta, p), chemin_meta(chemin))
+    _ecrire_atomique(lambda p: joblib.dump(best, p), chemin)
+    return chemin
+
+# ----------------------------------------------------------------------
+FENETRE_VALIDATION = 14
+ARBRES_AJOUTES = 50
+MAX_ARBRES = 600
+TOLERANCE = 0.05
+
+def mettre_a_jour(best, X: np.ndarray, y: np.ndarray, mode: str = 'warm', modele: str = 'rf',
+                  ajout: int = ARBRES_AJOUTES):
+    """
+    mode 'warm' : copie du modèle avec `ajout` arbres (ou itérations de boosting) appris sur (X, y) ;
+    mode 'refit' : même estimateur (hyperparamètres retenus) réentraîné de zéro sur (X, y).
+    """
+    if mode == 'refit':
+        return clone(best).fit(X, y)
+    param_arbres = MODELES[modele][3]
+    candidat = copy.deepcopy(best)
+    candidat.set_params(warm_start=True, **{param_arbres: getattr(best, param_arbres) + ajout})
+    candidat.fit(X, y)
+    return candidat.set_params(warm_start=False)
+
+def rafraichir_modele(best, meta: dict, df_feats: pd.DataFrame, mode: str = 'warm',
+                      fenetre: int = FENETRE_VALIDATION, ajout: int = ARBRES_AJOUTES,
+                      tolerance: float = TOLERANCE):
+    """
+    Met à jour `best` avec les lignes de df_feats postérieures à meta['date_coupure'] :
+    les `fenetre` dernières dates servent de validation, le reste à l'apprentissage
+    (seulement les nouvelles lignes en 'warm', tout l'historique en 'refit').
+    Renvoie (candidat, nouvelle meta, rapport) ; candidat vaut None s'il y a trop peu de
+    nouvelles dates ou si sa MAE dépasse celle du modèle courant de plus de `tolerance`.
+    """
+    coupure = pd.Timestamp(meta['date_coupure'])
+    dates = df_feats.index[df_feats.index > coupure].unique().sort_values()
+    rapport = {'nouvelles_dates': len(dates)}
+    if len(dates) <= fenetre:
+        return None, meta, rapport
+
+    debut_val = dates[-fenetre]
+    X, y, _ = matrices(df_feats, meta['cible'])
+    en_validation = np.asarray(df_feats.index >= debut_val)
+    a_apprendre = ~en_validation
+    if mode == 'warm':
+        a_apprendre &= np.asarray(df_feats.index > coupure)
+
+    debut = time.perf_counter()
+    candidat = mettre_a_jour(best, X[a_apprendre], y[a_apprendre], mode, meta['modele'], ajout)
+    rapport.update({
+        'mode': mode, 'lignes_apprises': int(a_apprendre.sum()), 'duree_s': time.perf_counter() - debut,
+        'courant': evaluer(best, X[en_validation], y[en_validation]),
+        'candidat': evaluer(candidat, X[en_validation], y[en_validation]),
+    })
+    if rapport['candidat']['mae'] > rapport['courant']['mae'] * (1 + tolerance):
+        return None, meta, rapport
+
+    nouvelle_meta = dict(meta, date_coupure=str(dates[-fenetre - 1].date()),
+                         date_entrainement=pd.Timestamp.now().isoformat(timespec='seconds'),
+                         params=candidat.get_params(), metriques=rapport['candidat'])
+    return candidat, nouvelle_meta, rapport
+
+def rafraichir(path_pkl: str, mode: str = 'warm', fenetre: int = FENETRE_VALIDATION,
+               ajout: int = ARBRES_AJOUTES, tolerance: float = TOLERANCE, utiliser_cache: bool = True) -> dict:
+    """--refresh : charge l'artefact et ses métadonnées, le met à jour et le substitue s'il est validé."""
+    meta = lire_meta(path_pkl)
+    best = joblib.load(path_pkl)
+    param_arbres = MODELES[meta['modele']][3]
+    if mode == 'warm' and getattr(best, param_arbres) + ajout > MAX_ARBRES:
+        print(f"{param_arbres} dépasserait {MAX_ARBRES} : refit avec les hyperparamètres retenus")
+        mode = 'refit'
+
+    if mode == 'warm':
+        # seules les lignes récentes sont lues : n_lags + 7 jours d'historique suffisent
+        # pour que les lags et stats glissantes des nouvelles dates soient identiques
+        depuis = pd.Timestamp(meta['date_coupure']) - pd.Timedelta(days=meta['n_lags'] + 7)
+        df_feats = creer_features(charger_donnees(meta['pandemie_id'], depuis=depuis),
+                                  meta['n_lags'], avec_pays=True)
+    else:
+        df_feats = features_pandemie(meta['pandemie_id'], meta['n_lags'], utiliser_cache)
+
+    candidat, nouvelle_meta, rapport = rafraichir_modele(best, meta, df_feats, mode, fenetre, ajout, tolerance)
+    if candidat is not None:
+        out, nom = os.path.split(path_pkl)
+        sauvegarder_artefact(candidat, matrices(df_feats, meta['cible'])[2], out,
+                             os.path.splitext(nom)[0], nouvelle_meta)
+    rapport['remplace'] = candidat is not None
+    return rapport
+
+# ----------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('pandemie_id', type=int)
+    parser.add_argument('-l','--n_lags', type=int, default=7)
+    parser.add_argument('-o','--out', type=str, default='model/')
+    parser.add_argument('-c','--cible', choices=['nouveau_cas','nouveau_mort'], default='nouveau_cas')
+    parser.add_argument('--model', choices=list(MODELES), default='rf',
+                        help="Backend : rf (RandomForest) ou hgb (HistGradientBoosting)")
+    parser.add_argument('--search', choices=['grid','halving','random'], default='grid',
+                        help="Stratégie de recherche d'hyperparamètres")
+    parser.add_argument('--resource', choices=['n_estimators','n_samples'], default='n_estimators',
+                        help="Ressource allouée progressivement par le successive halving")
+    parser.add_argument('--budget-fits', type=int, default=None,
+                        help="Nombre max de fits pour la recherche aléatoire")
+    parser.add_argument('--budget-temps', type=float, default=None,
+                        help="Budget en secondes pour la recherche aléatoire")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Recharge les données et recalcule les features sans le cache disque")
+    parser.add_argument('--refresh', nargs='?', const='warm', choices=['warm','refit'], default=None,
+                        help="Met à jour l'artefact existant sans recherche (warm : arbres ajoutés, "
+                             "refit : hyperparamètres retenus)")
+    parser.add_argument('--fenetre-validation', type=int, default=FENETRE_VALIDATION,
+                        help="Nombre de jours les plus récents réservés à la validation du --refresh")
+    parser.add_argument('--arbres-ajoutes', type=int, default=ARBRES_AJOUTES)
+    parser.add_argument('--reprise', action='store_true',
+                        help="Persiste chaque score (configuration, fold) et saute ceux déjà calculés")
+    parser.add_argument('--backtest', type=int, default=0, metavar='N',
+                        help="Évalue aussi les hyperparamètres retenus sur N origines glissantes (backtest.py, "
+                             "cible nouveau_cas)")
+    args = parser.parse_args()
+
+    if args.refresh:
+        base = nom_artefact(nom_pandemie(args.pandemie_id), args.cible, args.model, args.n_lags)
+        if not os.path.exists(chemin_meta(os.path.join(args.out, f'{base}.pkl'))):
+            parser.error(f"{base}.pkl ou ses métadonnées introuvables dans {args.out} : entraîner d'abord "
+                         f"(un ancien {ANCIEN_ARTEFACT_DEFAUT}.pkl n'a pas de métadonnées)")
+        r = rafraichir(os.path.join(args.out, f'{base}.pkl'), args.refresh, args.fenetre_validation,
+                       args.arbres_ajoutes, utiliser_cache=not args.no_cache)
+        if 'candidat' not in r:
+            print(f"{r['nouvelles_dates']} nouvelle(s) date(s) : pas assez pour valider, artefact inchangé")
+            return
+        print(f"Refresh {r['mode']} : {r['lignes_apprises']} lignes apprises en {r['duree_s']:.1f}s | "
+              f"MAE validation {r['courant']['mae']:.2f} -> {r['candidat']['mae']:.2f} | "
+              f"{'artefact remplacé' if r['remplace'] else 'artefact conservé (candidat moins bon)'}")
+        return
 
-    print(f"MAE:{mae:.2f}|RMSE:{rmse:.2f}|MAPE:{mape:.2f}%|Moyenne de la cible:{mean_target:.2f}")
+    debut = time.perf_counter()
+    df_feats = features_pandemie(args.pandemie_id, args.n_lags, utiliser_cache=not args.no_cache)
+    print(f"{len(df_feats)} lignes de features prêtes en {time.perf_counter() - debut:.1f}s "
+          f"({df_feats.memory_usage(deep=True).sum()/1e6:.1f} Mo), pic RSS {pic_memoire_mo():.0f} Mo")
+    base = nom_artefact(nom_pandemie(args.pandemie_id), args.cible, args.model, args.n_lags)
+    magasin = None
+    if args.reprise:
+        cle = f"{version_donnees(args.pandemie_id)}|f{VERSION_FEATURES}|l{args.n_lags}|{args.cible}|{args.model}"
+        magasin = MagasinResultats(os.path.join(args.out, 'recherche', f'{base}.jsonl'), cle)
+        print(f"Reprise : {magasin.nb_repris} scores (configuration, fold) déjà connus")
+    best, feature_cols, m = entrainer(df_feats, args.cible, args.search, args.resource,
+                                      args.budget_fits, args.budget_temps, modele=args.model, magasin=magasin)
+    print(f"MAE:{m['mae']:.2f}|RMSE:{m['rmse']:.2f}|MAPE:{m['mape']:.2f}%|Moyenne de la cible:{m['moyenne_cible']:.2f}")
+    if args.backtest:
+        if args.cible != 'nouveau_cas':
+            parser.error("--backtest évalue la prévision récursive des nouveaux cas (--cible nouveau_cas)")
+        # import local : backtest.py importe training
+        from backtest import origines_backtest, backtester, metriques_groupees
+        origines = origines_backtest(df_feats.index, args.backtest)
+        erreurs = backtester(df_feats, best, origines)
+        os.makedirs(args.out, exist_ok=True)
+        metriques_groupees(erreurs).to_csv(os.path.join(args.out, f'{base}_backtest.csv'), index=False)
+        print(f"\n=== Backtest : {len(origines)} origines, tous pays, par horizon ===")
+        print(metriques_groupees(erreurs, par=('horizon',)).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
 
     # sauvegarde
-    os.makedirs(args.out, exist_ok=True)
-    joblib.dump(best, os.path.join(args.out,'RandomForest_variole.pkl'))
-    joblib.dump(feature_cols, os.path.join(args.out,'feature_names.pkl'))
-    print('Model & features saved')
+    meta = meta_artefact(best, args.pandemie_id, args.cible, args.n_lags, args.model, m)
+    sauvegarder_artefact(best, feature_cols, args.out, base, meta)
+    print(f'Model & features saved (pic RSS {pic_memoire_mo():.0f} Mo)')
 
 if __name__=='__main__':
     main()